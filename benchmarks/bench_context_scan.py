@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark the session start command and agent scan.
+
+Builds a synthetic .claude tree (commands and agents spread over namespaced
+subfolders) and compares the original pathlib collectors (Path.rglob,
+Path.relative_to, a dict per file copied again to add its level) with the
+os.scandir scanner in context_scanner.py. Reported per variant: best wall
+time, and peak traced memory for one run.
+
+- list: walk the trees and build the per-file records, no file reads
+- collect: the above plus parsing every file, uncached
+- cached: SessionContext.collect_tree with a warm scan cache
+
+Usage: python benchmarks/bench_context_scan.py [--files N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+import context_scanner
+import session_context
+
+COMMAND_BODY = """---
+description: Review the staged changes
+allowed-tools: Bash(git diff:*), Read
+---
+Review the staged changes for correctness, style and missing tests.
+Summarize anything that should block the commit.
+"""
+
+
+CONTEXT = session_context.SessionContext(
+    {}, cache_file=lambda: os.path.join(os.environ['CLAUDE_INSIGHTS_STATE_DIR'], 'scan-cache.json'))
+
+
+def build_tree(cwd: str, files: int) -> None:
+    """Write `files` markdown files across the project commands and agents trees."""
+    per_namespace = 50
+    for i in range(files):
+        tree = 'commands' if i % 2 == 0 else 'agents'
+        namespace = f'ns{(i // 2) // per_namespace:03d}' if i % 10 else ''
+        directory = os.path.join(cwd, '.claude', tree, namespace)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'item{i:05d}.md'), 'w', encoding='utf-8') as f:
+            f.write(COMMAND_BODY)
+
+
+def legacy_collect(directory: Path, parse: bool) -> list:
+    """The original collect_project_commands/agents loop."""
+    if not directory.exists():
+        return []
+    entries = []
+    for md_file in directory.rglob('*.md'):
+        relative_path = md_file.relative_to(directory)
+        namespace = ''
+        if len(relative_path.parts) > 1:
+            namespace = relative_path.parts[0]
+        parsed = session_context.parse_command_file(md_file) if parse else {'metadata': {}, 'content': ''}
+        if parsed:
+            entries.append({
+                'name': relative_path.stem,
+                'namespace': namespace,
+                'metadata': parsed['metadata'],
+                'content': parsed['content'],
+            })
+    return entries
+
+
+def legacy(cwd: str, parse: bool) -> int:
+    commands = legacy_collect(Path(cwd) / '.claude' / 'commands', parse)
+    agents = legacy_collect(Path(cwd) / '.claude' / 'agents', parse)
+    # The payload copied every dict again to add its level
+    commands = [{**cmd, 'level': 'project'} for cmd in commands]
+    agents = [{**agent, 'level': 'project'} for agent in agents]
+    return len(commands) + len(agents)
+
+
+def scanner(cwd: str, parse: bool) -> int:
+    count = 0
+    for level, kind, root in context_scanner.context_roots(cwd)[:2]:
+        if not os.path.isdir(root):
+            continue
+        entries = []
+        for found in context_scanner.scan_tree(root, level, kind):
+            parsed = session_context.parse_command_file(found.path) if parse else {'metadata': {}, 'content': ''}
+            if parsed:
+                entries.append({
+                    'name': found.name,
+                    'namespace': found.namespace,
+                    'metadata': parsed['metadata'],
+                    'content': parsed['content'],
+                    'level': found.level,
+                })
+        count += len(entries)
+    return count
+
+
+def cached(cwd: str, parse: bool) -> int:
+    return sum(
+        len(CONTEXT.collect_tree(level, kind, root))
+        for level, kind, root in context_scanner.context_roots(cwd)[:2]
+    )
+
+
+def measure(fn, cwd: str, parse: bool, repeat: int) -> tuple:
+    """Return (best seconds, entries, peak traced bytes)."""
+    best = float('inf')
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn(cwd, parse)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(cwd, parse)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, count, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000, help='Markdown files to generate (default 5000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CLAUDE_INSIGHTS_STATE_DIR'] = os.path.join(tmp, 'state')
+        cwd = os.path.join(tmp, 'project')
+        build_tree(cwd, args.files)
+
+        # Backdate the tree so the scan cache trusts it
+        past = time.time() - 60
+        for dirpath, _, filenames in os.walk(cwd):
+            for name in filenames:
+                os.utime(os.path.join(dirpath, name), (past, past))
+            os.utime(dirpath, (past, past))
+        cached(cwd, True)
+
+        print(f'Tree: {args.files} files')
+        print(f'{"variant":<20}{"ms":>10}{"entries":>10}{"peak KiB":>12}')
+        for label, fn, parse in [
+            ('list/pathlib', legacy, False),
+            ('list/scandir', scanner, False),
+            ('collect/pathlib', legacy, True),
+            ('collect/scandir', scanner, True),
+            ('cached/scandir', cached, True),
+        ]:
+            seconds, count, peak = measure(fn, cwd, parse, args.repeat)
+            print(f'{label:<20}{seconds * 1000:>10.1f}{count:>10}{peak / 1024:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark SessionEnd with and without the conversation cache.
+
+For each transcript size, builds a synthetic transcript (mostly
+conversation text, see bench_parallel_parse.py) and times building
+SessionEnd's request body (parse_transcript(encoded=True) into
+transcript_body), with the line index already built as it is at SessionEnd:
+
+- cold: no cache, so every conversation line is decoded (the cache is
+  written as it goes);
+- warm: the Stop hook updated the cache before the last --tail lines were
+  appended, so only those are decoded and the rest is copied from the cache;
+- stop: the Stop hook's own cache update for those --tail lines.
+
+Best of --repeat runs, in ms.
+
+Usage: python benchmarks/bench_conversation_cache.py [--mb 1,8,64] [--tail N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS, '..', 'claude-insights-plugin', 'scripts'))
+sys.path.insert(0, BENCHMARKS)
+import session_end_transcript
+from bench_parallel_parse import conversation_transcript
+from bench_transcript_prefilter import best_of
+from transcript_index import TranscriptIndex
+
+
+def session_end(path: str) -> int:
+    """Build SessionEnd's request body; returns its size."""
+    transcript = session_end_transcript.parse_transcript(path, encoded=True)
+    return sum(len(chunk) for chunk in session_end_transcript.transcript_body('bench', transcript))
+
+
+def stop_hook(path: str):
+    """Run the Stop hook's cache update."""
+    with TranscriptIndex(path) as index:
+        session_end_transcript.update_cache(index)
+
+
+def remove_cache(path: str):
+    """Delete the conversation cache, if any."""
+    try:
+        os.remove(session_end_transcript.conversation_cache_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mb', default='1,8,64', help='Comma-separated transcript sizes in MiB (default 1,8,64)')
+    parser.add_argument('--tail', type=int, default=4, help='Lines appended after the last Stop hook (default 4)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    print(f'{"MiB":>8}{"lines":>9}{"cold ms":>10}{"warm ms":>10}{"speedup":>10}{"stop ms":>10}')
+    for mb in [float(size) for size in args.mb.split(',')]:
+        lines = conversation_transcript(int(mb * 1024 * 1024)).splitlines(keepends=True)
+        head, tail = b''.join(lines[:-args.tail]), b''.join(lines[-args.tail:])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'session.jsonl')
+            with open(path, 'wb') as f:
+                f.write(head + tail)
+            TranscriptIndex(path).close()
+
+            def cold():
+                remove_cache(path)
+                session_end(path)
+
+            cold_seconds = best_of(cold, args.repeat)
+
+            def warm_up():
+                # Cache as the last Stop hook left it: everything but the tail
+                remove_cache(path)
+                with open(path, 'wb') as f:
+                    f.write(head)
+                stop_hook(path)
+                with open(path, 'ab') as f:
+                    f.write(tail)
+                TranscriptIndex(path).close()
+
+            warm_seconds = stop_seconds = float('inf')
+            for _ in range(args.repeat):
+                warm_up()
+                warm_seconds = min(warm_seconds, best_of(lambda: session_end(path), 1))
+                warm_up()
+                stop_seconds = min(stop_seconds, best_of(lambda: stop_hook(path), 1))
+
+        print(f'{mb:>8.1f}{len(lines):>9}{cold_seconds * 1000:>10.1f}{warm_seconds * 1000:>10.1f}'
+              f'{cold_seconds / warm_seconds:>9.1f}x{stop_seconds * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
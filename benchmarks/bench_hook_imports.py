@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure the import cost of the local insights hooks.
+
+Each hook runs as a fresh process on every event, so whatever it imports is
+paid on every tool call. For each hook module (and for insights_client and
+requests on their own, for reference) this runs `python -X importtime` in a
+clean interpreter and reports the cumulative import time of the module, the
+number of modules it pulled in and whether `requests` was among them.
+
+Usage: python benchmarks/bench_hook_imports.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'claude-insights-local-plugin', 'scripts')
+
+MODULES = [
+    'insights_client',
+    'pre_tool_use',
+    'post_tool_use',
+    'user_prompt_submit',
+    'notification',
+    'permission_request',
+    'stop',
+    'subagent_start',
+    'subagent_stop',
+    'pre_compact',
+    'session_start',
+    'session_end',
+    'requests',
+]
+
+
+def import_profile(module: str) -> tuple:
+    """Return (cumulative import microseconds, modules imported, requests imported) for one module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR,
+        capture_output=True,
+        text=True,
+    )
+    cumulative = 0
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = [part.strip() for part in line.split('|')]
+        imported.append(name)
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, len(imported), 'requests' in imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per module; the median is reported')
+    args = parser.parse_args()
+
+    print(f'{"module":<22}{"import ms":>12}{"modules":>10}{"requests":>10}')
+    for module in MODULES:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        median_us = statistics.median(run[0] for run in runs)
+        _, count, has_requests = runs[-1]
+        print(f'{module:<22}{median_us / 1000:>12.1f}{count:>10}{"yes" if has_requests else "no":>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Compare the cold-start latency of the hot local insights hooks per transport.
+
+Starts a throwaway HTTP backend, then runs pre_tool_use.py and
+post_tool_use.py as fresh processes (the way Claude Code does on every tool
+call) with the event sent in-process, once through the stdlib http.client
+transport and once through requests. A bare `python -c pass` run is included
+as the floor. Reports median, p90 and min wall-clock milliseconds.
+
+Usage: python benchmarks/bench_hook_startup.py [--runs N]
+"""
+import argparse
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'claude-insights-local-plugin', 'scripts')
+HOOKS = ('pre_tool_use', 'post_tool_use')
+
+
+class OkHandler(http.server.BaseHTTPRequestHandler):
+    """Accept any hook request."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def time_runs(command: list, event: bytes, env: dict, runs: int) -> list:
+    """Return wall-clock milliseconds for each run of a command."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, input=event, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='Runs per hook and transport')
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        transcript_path = os.path.join(tmp, 'session.jsonl')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "user", "message": {"role": "user", "content": "hi"}}\n')
+        event = json.dumps({
+            'session_id': 'bench-session',
+            'transcript_path': transcript_path,
+            'tool_name': 'Read',
+            'tool_input': {'file_path': '/tmp/example.py'},
+        }).encode('utf-8')
+
+        base_env = {
+            **os.environ,
+            'CLAUDE_INSIGHTS_DAEMON': '0',
+            'CLAUDE_INSIGHTS_FULL_TRANSCRIPT': '1',
+            'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(tmp, 'state'),
+            'CLAUDE_INSIGHTS_API_URL': f'http://127.0.0.1:{server.server_address[1]}',
+        }
+
+        rows = [('python -c pass', time_runs([sys.executable, '-c', 'pass'], b'', base_env, args.runs))]
+        for hook in HOOKS:
+            script = os.path.join(SCRIPTS_DIR, f'{hook}.py')
+            for transport in ('stdlib', 'requests'):
+                env = {**base_env, 'CLAUDE_INSIGHTS_TRANSPORT': transport}
+                rows.append((f'{hook} ({transport})', time_runs([sys.executable, script], event, env, args.runs)))
+
+    server.shutdown()
+
+    print(f'{"run":<28}{"median ms":>11}{"p90 ms":>9}{"min ms":>9}')
+    for label, timings in rows:
+        p90 = statistics.quantiles(timings, n=10)[-1] if len(timings) > 1 else timings[0]
+        print(f'{label:<28}{statistics.median(timings):>11.1f}{p90:>9.1f}{min(timings):>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
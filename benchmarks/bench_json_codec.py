@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON codecs (json_codec.py) at each call site that uses them.
+
+For every codec installed here (stdlib json always; orjson and msgspec if
+importable) this times the JSON work of:
+
+- transcript decode: SessionEnd's parse_transcript and read_jsonl, which
+  decode each user/assistant text line with decode_entry;
+- transcript encode: SessionEnd's streamed request body;
+- tts chat: the text-to-speech --chat dump, which decodes every line and
+  writes it back indented;
+- session start: encoding a session start payload with command and agent
+  bodies, which stays on json: a hook pays the codec import below once,
+  and that is more than a payload's encoding saves;
+- import: choosing the codec in a fresh interpreter.
+
+The transcript is the tool-heavy synthetic one from
+bench_transcript_prefilter.py, or a real one. Best of --repeat runs, in ms,
+with the speedup over stdlib json.
+
+Usage: python benchmarks/bench_json_codec.py [transcript.jsonl] [--mb N] [--repeat N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.join(BENCHMARKS, '..', 'claude-insights-plugin', 'scripts')
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, BENCHMARKS)
+import json_codec
+import session_end_transcript
+from bench_transcript_prefilter import best_of, synthetic_transcript
+from transcript_index import VALID_TYPES, TranscriptIndex
+
+COMMAND_BODY = 'Review the staged changes for correctness, style and missing tests.\n' * 40
+
+
+def session_start_payload(items: int = 200) -> dict:
+    """A session start payload shaped like session_context's, with `items` commands and agents."""
+    entries = [
+        {'name': f'item{i}', 'namespace': f'ns{i % 7}', 'level': 'project' if i % 4 else 'user',
+         'metadata': {'description': 'Review the staged changes', 'allowed-tools': ['Bash', 'Read']},
+         'content': COMMAND_BODY}
+        for i in range(items)
+    ]
+    return {
+        'sessionId': 'bench-session', 'source': 'startup', 'projectName': 'project',
+        'projectMemory': '# Memory\n' + 'Follow the style guide.\n' * 200,
+        'readme': '# Project\n' + 'Usage notes.\n' * 2000,
+        'mcpServers': ['github', 'postgres'],
+        'commands': entries[::2], 'agents': entries[1::2],
+    }
+
+
+def import_seconds(name: str, repeat: int) -> float:
+    """Best time to import json_codec and load a codec, each in a fresh interpreter."""
+    code = ('import time; start = time.perf_counter(); import json_codec; '
+            f'json_codec.load_codec({name!r}); print(time.perf_counter() - start)')
+    return min(float(subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS, capture_output=True,
+                                    text=True, check=True).stdout) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcript', nargs='?', help='Real transcript to use instead of a synthetic one')
+    parser.add_argument('--mb', type=float, default=20, help='Synthetic transcript size in MiB (default 20)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    codecs = [json_codec.load_codec(name) for name in json_codec.PREFERENCE]
+    codecs = [codec for codec, name in zip(codecs, json_codec.PREFERENCE) if codec.name == name][::-1]
+    payload = session_start_payload()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'session.jsonl')
+        if args.transcript:
+            with open(args.transcript, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with open(path, 'wb') as f:
+                f.write(synthetic_transcript(int(args.mb * 1024 * 1024)))
+
+        # The lines each call site decodes, read up front so only JSON work is timed
+        with TranscriptIndex(path) as index:
+            text_lines = [index.line(i) for i in index.entries(types=('user', 'assistant'), skip_meta=True, skip_tools=True)]
+            all_lines = [index.line(i) for i in index.entries(types=VALID_TYPES)]
+        conversation = [item for line in text_lines
+                        for item in session_end_transcript.conversation_entries(json_codec.load_codec('json').loads(line))]
+
+        results = {}
+        for codec in codecs:
+            def decode():
+                for line in text_lines:
+                    for _ in session_end_transcript.conversation_entries(codec.decode_entry(line)):
+                        pass
+
+            def encode():
+                for entry in conversation:
+                    codec.dumps(entry)
+
+            def chat():
+                codec.dumps_indented([codec.loads(line) for line in all_lines])
+
+            results[codec.name] = {
+                'transcript decode': best_of(decode, args.repeat),
+                'transcript encode': best_of(encode, args.repeat),
+                'tts chat': best_of(chat, args.repeat),
+                'session start': best_of(lambda: codec.dumps(payload), args.repeat * 10),
+                'import': import_seconds(codec.name, args.repeat * 3),
+            }
+
+        size = os.path.getsize(path)
+        print(f'Transcript: {size / 1024 / 1024:.1f} MiB, {len(all_lines)} lines, {len(text_lines)} with conversation text; '
+              f'session start payload {len(json_codec.load_codec("json").dumps(payload)) / 1024:.0f} KiB')
+        others = [name for name in results if name != 'json']
+        print(f'{"call site":<20}{"json ms":>10}' + ''.join(f'{name + " ms":>12}{"speedup":>9}' for name in others))
+        for site, baseline in results['json'].items():
+            print(f'{site:<20}{baseline * 1000:>10.1f}' + ''.join(
+                f'{results[name][site] * 1000:>12.1f}{baseline / results[name][site]:>8.1f}x' for name in others))
+
+
+if __name__ == '__main__':
+    main()
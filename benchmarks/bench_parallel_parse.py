@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark SessionEnd's parallel transcript parsing.
+
+Builds a synthetic transcript where conversation text (long prompts,
+assistant text and thinking) is most of the bytes, since tool traffic is
+skipped before parsing anyway, or reads a real one. With the line index
+already built (as it is at SessionEnd), reports the best time to parse
+and encode the request body (parse_transcript(encoded=True) into
+transcript_body) in one process and with each worker count, and the CPUs
+available.
+
+Usage: python benchmarks/bench_parallel_parse.py [transcript.jsonl] [--mb N] [--workers 2,4,8] [--repeat N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from unittest.mock import patch
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS, '..', 'claude-insights-plugin', 'scripts'))
+sys.path.insert(0, BENCHMARKS)
+import session_end_transcript
+from bench_transcript_prefilter import WORDS, best_of
+from transcript_index import TranscriptIndex
+
+
+def conversation_transcript(target_bytes: int) -> bytes:
+    """Generate compact transcript lines, mostly conversation text, until target_bytes is reached."""
+    rng = random.Random(0)
+    lines = []
+    size = 0
+    n = 0
+    while size < target_bytes:
+        n += 1
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(200, 1500)))
+        if n % 4 == 0:
+            entry = {'parentUuid': f'{n - 1:032x}', 'type': 'user', 'message': {'role': 'user', 'content': text},
+                     'uuid': f'{n:032x}', 'timestamp': '2025-01-01T00:00:00.000Z'}
+        else:
+            block = {'type': 'thinking', 'thinking': text, 'signature': 'sig'} if n % 4 == 1 else {'type': 'text', 'text': text}
+            entry = {'parentUuid': f'{n - 1:032x}',
+                     'message': {'id': f'msg_{n}', 'type': 'message', 'role': 'assistant', 'content': [block]},
+                     'type': 'assistant', 'uuid': f'{n:032x}', 'timestamp': '2025-01-01T00:00:00.000Z'}
+        line = json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+        lines.append(line)
+        size += len(line)
+    return b''.join(lines)
+
+
+def parse(path: str, workers: int) -> int:
+    """Build SessionEnd's request body with the given number of workers (1 = in process); returns its size."""
+    threshold = '1' if workers > 1 else '0'
+    with patch.dict(os.environ, {'CLAUDE_INSIGHTS_PARALLEL_PARSE_BYTES': threshold}), \
+            patch.object(session_end_transcript, 'parse_workers', return_value=workers):
+        transcript = session_end_transcript.parse_transcript(path, encoded=True)
+        return sum(len(chunk) for chunk in session_end_transcript.transcript_body('bench', transcript))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcript', nargs='?', help='Real transcript to use instead of a synthetic one')
+    parser.add_argument('--mb', type=float, default=128, help='Synthetic transcript size in MiB (default 128)')
+    parser.add_argument('--workers', default='2,4,8', help='Comma-separated worker counts (default 2,4,8)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'session.jsonl')
+        if args.transcript:
+            with open(args.transcript, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with open(path, 'wb') as f:
+                f.write(conversation_transcript(int(args.mb * 1024 * 1024)))
+        TranscriptIndex(path).close()
+
+        body = parse(path, 1)
+        print(f'Transcript: {os.path.getsize(path) / 1024 / 1024:.1f} MiB, request body {body / 1024 / 1024:.1f} MiB; '
+              f'{session_end_transcript.parse_workers()} CPUs available (up to {session_end_transcript.MAX_PARSE_WORKERS} used)')
+        serial = best_of(lambda: parse(path, 1), args.repeat)
+        print(f'{"workers":>8}{"ms":>10}{"speedup":>10}')
+        print(f'{1:>8}{serial * 1000:>10.1f}{1:>9.1f}x')
+        for workers in [int(count) for count in args.workers.split(',')]:
+            seconds = best_of(lambda: parse(path, workers), args.repeat)
+            print(f'{workers:>8}{seconds * 1000:>10.1f}{serial / seconds:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared session start collection engine on growing projects.
+
+Builds synthetic projects of increasing size (CLAUDE.md, README.md,
+.mcp.json and command and agent trees, plus a user-level ~/.claude) and runs
+each insights plugin's SessionContext against them: collect under the
+deadline, then shape the payload and apply the byte budgets. Reported per
+size and plugin: best wall time without a scan cache, with a cold cache
+(first session start) and with a warm one, and the payload size.
+
+Usage: python benchmarks/bench_session_context.py [--sizes 10,100,1000,5000] [--repeat N]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'shared'))
+from session_context import SessionContext
+
+# Plugins whose schemas are benchmarked; each session_start.py defines SCHEMA
+PLUGINS = ['claude-insights-plugin', 'claude-insights-dev-plugin', 'claude-insights-local-plugin']
+
+COMMAND_BODY = """---
+description: Review the staged changes
+allowed-tools: [Bash, Read]
+---
+Review the staged changes for correctness, style and missing tests.
+Summarize anything that should block the commit.
+"""
+
+
+def load_schema(plugin: str) -> dict:
+    """Import a plugin's session_start.py just far enough to read its schema."""
+    scripts = os.path.join(ROOT, plugin, 'scripts')
+    sys.path.insert(0, scripts)
+    try:
+        spec = importlib.util.spec_from_file_location(f'{plugin}_session_start', os.path.join(scripts, 'session_start.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.SCHEMA
+    finally:
+        sys.path.remove(scripts)
+
+
+def write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def build_project(base: str, files: int) -> tuple:
+    """Write a project and home with `files` command and agent files; returns (cwd, home)."""
+    cwd = os.path.join(base, 'project')
+    home = os.path.join(base, 'home')
+    write(os.path.join(cwd, 'CLAUDE.md'), '# Memory\n' + 'Follow the style guide.\n' * 200)
+    write(os.path.join(cwd, 'README.md'), '# Project\n' + 'Usage notes.\n' * 2000)
+    write(os.path.join(cwd, '.mcp.json'), json.dumps({'mcpServers': {'github': {}, 'postgres': {}}}))
+
+    # A quarter of the files are user level
+    for i in range(files):
+        base_dir = home if i % 4 == 3 else cwd
+        tree = 'commands' if i % 2 == 0 else 'agents'
+        namespace = f'ns{i // 100:03d}' if i % 10 else ''
+        write(os.path.join(base_dir, '.claude', tree, namespace, f'item{i:05d}.md'), COMMAND_BODY)
+
+    # Backdate everything so the scan cache trusts it
+    past = time.time() - 60
+    for top in (cwd, home):
+        for dirpath, _, filenames in os.walk(top):
+            for name in filenames:
+                os.utime(os.path.join(dirpath, name), (past, past))
+            os.utime(dirpath, (past, past))
+    return cwd, home
+
+
+def run_once(context: SessionContext, cwd: str) -> int:
+    """One session start's collection; returns the payload size in bytes."""
+    collected, late = context.collect(cwd)
+    payload = context.build_payload({'session_id': 'bench', 'cwd': cwd, 'source': 'startup'}, collected, late)
+    return len(json.dumps(payload))
+
+
+def measure(make_context, cwd: str, repeat: int, warm: bool) -> tuple:
+    """Return (best seconds, payload bytes); each run gets a fresh context (a new hook process)."""
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        context = make_context()
+        if warm:
+            run_once(context, cwd)
+            context = make_context()
+        start = time.perf_counter()
+        size = run_once(context, cwd)
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000,5000', help='Comma-separated file counts (default 10,100,1000,5000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    schemas = {plugin: load_schema(plugin) for plugin in PLUGINS}
+    # The local plugin's git collector is its own; time the shared engine without it
+    schemas['claude-insights-local-plugin'] = {
+        field: source for field, source in schemas['claude-insights-local-plugin'].items() if source != 'gitRepository'
+    }
+
+    print(f'{"files":>6}  {"plugin":<30}{"uncached ms":>13}{"cold ms":>10}{"warm ms":>10}{"payload KiB":>13}')
+    for files in [int(size) for size in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd, home = build_project(tmp, files)
+            os.environ['HOME'] = home
+            cache_dir = os.path.join(tmp, 'state')
+
+            for plugin, schema in schemas.items():
+                cache_path = os.path.join(cache_dir, f'{plugin}.json')
+
+                def cold_context():
+                    # A cache that is removed before every run
+                    if os.path.exists(cache_path):
+                        os.unlink(cache_path)
+                    return SessionContext(schema, cache_file=lambda: cache_path)
+
+                uncached, size = measure(lambda: SessionContext(schema), cwd, args.repeat, warm=False)
+                cold, _ = measure(cold_context, cwd, args.repeat, warm=False)
+                warm, _ = measure(lambda: SessionContext(schema, cache_file=lambda: cache_path), cwd, args.repeat, warm=True)
+                print(f'{files:>6}  {plugin:<30}{uncached * 1000:>13.1f}{cold * 1000:>10.1f}{warm * 1000:>10.1f}{size / 1024:>13.1f}')
+
+
+if __name__ == '__main__':
+    # Collections beyond the deadline would be reported partial; don't let big trees hit it
+    os.environ.setdefault('CLAUDE_INSIGHTS_SESSION_START_DEADLINE', '600')
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark transcript payload encodings for the local insights plugin.
+
+Builds a synthetic transcript shaped like a real Claude Code session (user
+prompts, assistant turns and large tool results) and reports, for each
+CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING mode, the encode CPU time, the size of
+the request body on the wire and the peak memory allocated while streaming
+it (which should not grow with the transcript).
+
+Usage: python benchmarks/bench_transcript_encoding.py [transcript.jsonl] [--mb N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'claude-insights-local-plugin', 'scripts'))
+import transcript_cursor
+import transcript_encoding
+
+
+def synthetic_transcript(target_bytes: int) -> bytes:
+    """Generate JSONL transcript lines until target_bytes is reached."""
+    rng = random.Random(0)
+    words = ['def', 'return', 'import', 'self', 'value', 'path', 'config', 'error', 'result', 'data']
+    lines = []
+    size = 0
+    n = 0
+    while size < target_bytes:
+        n += 1
+        kind = n % 3
+        if kind == 0:
+            # Large tool result, e.g. a file read or command output
+            text = '\n'.join(
+                f'{i:>6}\t' + ' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+                for i in range(rng.randint(50, 400))
+            )
+            entry = {'type': 'user', 'message': {'role': 'user', 'content': [
+                {'type': 'tool_result', 'tool_use_id': f'toolu_{n:08d}', 'content': text}]}}
+        elif kind == 1:
+            entry = {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+                {'type': 'text', 'text': ' '.join(rng.choice(words) for _ in range(60))},
+                {'type': 'tool_use', 'id': f'toolu_{n + 2:08d}', 'name': 'Read', 'input': {'file_path': f'/src/mod{n}.py'}}]}}
+        else:
+            entry = {'type': 'user', 'message': {'role': 'user', 'content': 'please ' + ' '.join(rng.choice(words) for _ in range(20))}}
+        entry.update({'sessionId': 'bench-session', 'uuid': f'{n:032x}', 'timestamp': '2025-01-01T00:00:00.000Z'})
+        line = json.dumps(entry).encode('utf-8') + b'\n'
+        lines.append(line)
+        size += len(line)
+    return b''.join(lines)
+
+
+def consume(body) -> int:
+    """Drain a request body the way the HTTP client would, returning its size."""
+    if isinstance(body, bytes):
+        return len(body)
+    return sum(len(chunk) for chunk in body)
+
+
+def measure(encoding: str, payload: dict, transcript: dict, repeat: int) -> tuple:
+    """Return (best CPU seconds, body bytes, peak traced bytes) for one encoding."""
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        start = time.process_time()
+        body, _ = transcript_encoding.encode_request(payload, transcript, encoding)
+        size = consume(body)
+        best = min(best, time.process_time() - start)
+
+    tracemalloc.start()
+    body, _ = transcript_encoding.encode_request(payload, transcript, encoding)
+    consume(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcript', nargs='?', help='Real transcript JSONL to encode instead of synthetic data')
+    parser.add_argument('--mb', type=float, default=8, help='Synthetic transcript size in MiB (default 8)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per encoding; the best is reported')
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, 'rb') as f:
+            data = f.read()
+    else:
+        data = synthetic_transcript(int(args.mb * 1024 * 1024))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CLAUDE_INSIGHTS_STATE_DIR'] = os.path.join(tmp, 'state')
+        transcript_path = os.path.join(tmp, 'session.jsonl')
+        with open(transcript_path, 'wb') as f:
+            f.write(data)
+        transcript = transcript_cursor.read_transcript_delta({
+            'session_id': 'bench-session',
+            'transcript_path': transcript_path,
+        })
+        payload = {'sessionId': 'bench-session', 'transcriptOffset': 0, 'data': {'tool_name': 'Read'}}
+
+        modes = [('json', 'gzip'), ('gzip', 'gzip'), ('multipart', 'gzip'), ('chunks', 'gzip')]
+        try:
+            import zstandard  # noqa: F401
+            modes.append(('multipart', 'zstd'))
+        except ImportError:
+            print('zstandard not installed; skipping multipart/zstd')
+
+        line_count = data.count(b'\n')
+        print(f'Transcript: {len(data) / 1024 / 1024:.2f} MiB, {line_count} lines')
+        print(f'{"mode":<18}{"encode ms":>12}{"body KiB":>12}{"ratio":>8}{"peak KiB":>12}')
+        for encoding, codec in modes:
+            os.environ['CLAUDE_INSIGHTS_TRANSCRIPT_CODEC'] = codec
+            seconds, size, peak = measure(encoding, payload, transcript, args.repeat)
+            label = encoding if encoding != 'multipart' else f'multipart/{codec}'
+            print(f'{label:<18}{seconds * 1000:>12.1f}{size / 1024:>12.1f}{size / len(data):>8.2f}{peak / 1024:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
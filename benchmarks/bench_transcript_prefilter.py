@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the transcript index prefilter on tool-heavy transcripts.
+
+Builds a synthetic transcript laid out like Claude Code writes it (compact
+JSON, the assistant message before its "type", tool results repeated in
+toolUseResult, file-history-snapshot lines), where tool output is most of
+the bytes, or reads a real one. Reports:
+
+- index: building the sidecar from scratch, decoding every line vs. the
+  prefilter (lines it can't place are still decoded);
+- parse: SessionEnd's parse_transcript over a built index, decoding every
+  user/assistant line vs. skipping tool calls and results undecoded.
+
+Usage: python benchmarks/bench_transcript_prefilter.py [transcript.jsonl] [--mb N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'claude-insights-plugin', 'scripts'))
+import session_end_transcript
+import transcript_index
+from transcript_index import TranscriptIndex
+
+WORDS = ['def', 'return', 'import', 'self', 'value', 'path', 'config', 'error', 'result', 'data']
+
+
+def dumps(entry: dict) -> bytes:
+    return json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def synthetic_transcript(target_bytes: int) -> bytes:
+    """Generate Claude Code shaped transcript lines until target_bytes is reached."""
+    rng = random.Random(0)
+    common = {'userType': 'external', 'cwd': '/home/user/project', 'sessionId': 'bench-session',
+              'version': '2.0.0', 'gitBranch': 'main'}
+    lines = []
+    size = 0
+    n = 0
+    while size < target_bytes:
+        n += 1
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 60)))
+        kind = n % 6
+        if kind == 0:
+            entry = {'parentUuid': None, 'isSidechain': False, 'promptId': f'p{n}', 'type': 'user',
+                     'message': {'role': 'user', 'content': 'please ' + text},
+                     'uuid': f'{n:032x}', 'timestamp': '2025-01-01T00:00:00.000Z', **common}
+        elif kind in (1, 3):
+            block = {'type': 'thinking', 'thinking': text, 'signature': 'sig'} if kind == 1 else {'type': 'text', 'text': text}
+            entry = {'parentUuid': f'{n - 1:032x}', 'isSidechain': False,
+                     'message': {'model': 'claude', 'id': f'msg_{n}', 'type': 'message', 'role': 'assistant', 'content': [block]},
+                     'requestId': f'req_{n}', 'type': 'assistant', 'uuid': f'{n:032x}',
+                     'timestamp': '2025-01-01T00:00:00.000Z', **common}
+        elif kind == 2:
+            entry = {'parentUuid': f'{n - 1:032x}', 'isSidechain': False,
+                     'message': {'model': 'claude', 'id': f'msg_{n}', 'type': 'message', 'role': 'assistant', 'content': [
+                         {'type': 'tool_use', 'id': f'toolu_{n}', 'name': 'Read', 'input': {'file_path': f'/src/mod{n}.py'}}]},
+                     'requestId': f'req_{n}', 'type': 'assistant', 'uuid': f'{n:032x}',
+                     'timestamp': '2025-01-01T00:00:00.000Z', **common}
+        elif kind == 4:
+            # A file read: the output is in the message and again in toolUseResult
+            output = '\n'.join(
+                f'{i:>6}\t' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+                for i in range(rng.randint(100, 800))
+            )
+            entry = {'parentUuid': f'{n - 1:032x}', 'isSidechain': False, 'promptId': f'p{n}', 'type': 'user',
+                     'message': {'role': 'user', 'content': [
+                         {'tool_use_id': f'toolu_{n - 2}', 'type': 'tool_result', 'content': output}]},
+                     'uuid': f'{n:032x}', 'timestamp': '2025-01-01T00:00:00.000Z',
+                     'toolUseResult': {'type': 'text', 'file': {'filePath': f'/src/mod{n}.py', 'content': output}},
+                     **common}
+        else:
+            entry = {'type': 'file-history-snapshot', 'messageId': f'{n:032x}',
+                     'snapshot': {'trackedFileBackups': {f'/src/mod{i}.py': {'backupFileName': f'b{i}', 'version': 1}
+                                                         for i in range(rng.randint(5, 40))}},
+                     'isSnapshotUpdate': False}
+        line = dumps(entry)
+        lines.append(line)
+        size += len(line)
+    return b''.join(lines)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcript', nargs='?', help='Real transcript to use instead of a synthetic one')
+    parser.add_argument('--mb', type=float, default=50, help='Synthetic transcript size in MiB (default 50)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'session.jsonl')
+        if args.transcript:
+            with open(args.transcript, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with open(path, 'wb') as f:
+                f.write(synthetic_transcript(int(args.mb * 1024 * 1024)))
+        index_path = transcript_index.index_path_for(path)
+
+        def build_index():
+            if os.path.exists(index_path):
+                os.unlink(index_path)
+            TranscriptIndex(path).close()
+
+        with patch.object(transcript_index, 'prefilter', return_value=None):
+            decode_all = best_of(build_index, args.repeat)
+        with patch.object(transcript_index, 'classify', wraps=transcript_index.classify) as classify:
+            build_index()
+            decoded = classify.call_count
+        prefiltered = best_of(build_index, args.repeat)
+
+        with TranscriptIndex(path) as index:
+            lines = len(index)
+            tool_bytes = sum(index.record(i)[1] for i in range(lines) if index.record(i)[5])
+
+        def parse(skip_tools):
+            with TranscriptIndex(path) as index:
+                for i in index.entries(types=('user', 'assistant'), skip_meta=True, skip_tools=skip_tools):
+                    for _ in session_end_transcript.conversation_entries(index.load(i)):
+                        pass
+
+        parse_all = best_of(lambda: parse(False), args.repeat)
+        parse_text = best_of(lambda: parse(True), args.repeat)
+
+        size = os.path.getsize(path)
+        print(f'Transcript: {size / 1024 / 1024:.1f} MiB, {lines} lines, '
+              f'{tool_bytes / size:.0%} of bytes in tool calls/results, {decoded} lines decoded by the prefiltered index')
+        print(f'{"step":<10}{"decode all ms":>15}{"prefilter ms":>15}{"speedup":>10}')
+        print(f'{"index":<10}{decode_all * 1000:>15.1f}{prefiltered * 1000:>15.1f}{decode_all / prefiltered:>9.1f}x')
+        print(f'{"parse":<10}{parse_all * 1000:>15.1f}{parse_text * 1000:>15.1f}{parse_all / parse_text:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Scanner for the command and agent trees collected at session start.
+
+Commands and agents live in four trees (project and user level, commands and
+agents) that are all scanned the same way: every .md file, recursively, named
+after its stem and namespaced by its top-level subfolder. This walks a tree
+with os.scandir and an explicit stack (no pathlib objects, no recursion) and
+yields one ContextFile tuple per file, tagged with its level and kind.
+"""
+
+import os
+from typing import NamedTuple
+
+# (level, kind, tree path relative to the project or home directory)
+CONTEXT_TREES = (
+    ('project', 'command', os.path.join('.claude', 'commands')),
+    ('project', 'agent', os.path.join('.claude', 'agents')),
+    ('user', 'command', os.path.join('.claude', 'commands')),
+    ('user', 'agent', os.path.join('.claude', 'agents')),
+)
+
+
+class ContextFile(NamedTuple):
+    """One command or agent file found by the scanner."""
+    level: str
+    kind: str
+    namespace: str
+    name: str
+    path: str
+
+
+def context_roots(cwd: str) -> list:
+    """Return (level, kind, root directory) for each tree to scan."""
+    home_dir = os.path.expanduser('~')
+    roots = []
+    for level, kind, tree in CONTEXT_TREES:
+        base = cwd if level == 'project' else home_dir
+        if base:
+            roots.append((level, kind, os.path.join(base, tree)))
+    return roots
+
+
+def walk_markdown(root: str) -> tuple:
+    """
+    List the .md files under root (following symlinked directories once).
+    Returns the sorted file paths and the mtime of every directory walked.
+    """
+    files = []
+    dirs = {}
+    seen = set()
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
+        try:
+            real = os.path.realpath(directory)
+            if real in seen:
+                # Symlink loop; don't descend again
+                continue
+            seen.add(real)
+            dirs[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.md') and entry.is_file():
+                        files.append(entry.path)
+        except OSError:
+            continue
+
+    return sorted(files), dirs
+
+
+def scan_tree(root: str, level: str, kind: str, paths=None):
+    """
+    Yield a ContextFile for each .md file under root.
+    paths is the tree's file listing if the caller already has it (e.g. from
+    the scan cache); otherwise the tree is walked.
+    """
+    if paths is None:
+        paths = walk_markdown(root)[0]
+    prefix = len(root) + 1
+
+    for path in paths:
+        relative = path[prefix:]
+        # Namespace is the immediate subfolder for nested files, empty at the root
+        namespace, sep, _ = relative.partition(os.sep)
+        yield ContextFile(level, kind, namespace if sep else '', os.path.basename(relative)[:-3], path)
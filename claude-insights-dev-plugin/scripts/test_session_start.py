@@ -84,7 +84,7 @@ class TestSessionStart(unittest.TestCase):
             if 'AGENTS.md' in filename or 'README.md' in filename:
                 raise FileNotFoundError()
             elif 'CLAUDE.md' in filename:
-                return mock_open(read_data='# Project Memory\nThis is test content.')()
+                return mock_open(read_data=b'# Project Memory\nThis is test content.')()
             raise FileNotFoundError()
 
         # Act
@@ -340,7 +340,7 @@ class TestSessionStart(unittest.TestCase):
         # Mock the file open to return AGENTS.md content
         def open_side_effect(filename, *args, **kwargs):
             if 'AGENTS.md' in filename:
-                return mock_open(read_data='# Agents Memory\nThis is AGENTS.md content.')()
+                return mock_open(read_data=b'# Agents Memory\nThis is AGENTS.md content.')()
             elif 'README.md' in filename:
                 raise FileNotFoundError()
             raise FileNotFoundError()
@@ -377,7 +377,7 @@ class TestSessionStart(unittest.TestCase):
             if 'AGENTS.md' in filename or 'README.md' in filename:
                 raise FileNotFoundError()
             elif 'CLAUDE.md' in filename:
-                return mock_open(read_data='# Claude Memory\nThis is CLAUDE.md content.')()
+                return mock_open(read_data=b'# Claude Memory\nThis is CLAUDE.md content.')()
             raise FileNotFoundError()
 
         with patch('builtins.open', side_effect=open_side_effect) as mock_file:
@@ -476,7 +476,7 @@ class TestSessionStart(unittest.TestCase):
             if 'AGENTS.md' in filename or 'CLAUDE.md' in filename:
                 raise FileNotFoundError()
             elif 'README.md' in filename:
-                return mock_open(read_data='# Project README\nThis is README.md content.')()
+                return mock_open(read_data=b'# Project README\nThis is README.md content.')()
             raise FileNotFoundError()
 
         with patch('builtins.open', side_effect=open_side_effect) as mock_file:
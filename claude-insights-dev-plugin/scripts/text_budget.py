@@ -0,0 +1,113 @@
+"""
+Byte budgets for the text files sent at session start.
+
+The project memory, README and every command and agent file used to be read
+whole, so a multi-MB generated README or a stray large .md file slowed every
+session start and bloated the upload. Files are now read at most one byte
+past CLAUDE_INSIGHTS_MAX_FILE_BYTES (default 256 KiB); one larger than that
+only has its head and tail kept, joined by a truncation marker. The bodies of a
+payload together are then held to CLAUDE_INSIGHTS_MAX_TOTAL_BYTES (default
+2 MiB): once that is spent, later bodies are cut the same way.
+"""
+
+import codecs
+import os
+
+TRUNCATION_MARKER = '\n\n[... {omitted} bytes truncated ...]\n\n'
+
+
+def max_file_bytes() -> int:
+    """Return the most bytes read from any single file."""
+    return int(os.environ.get('CLAUDE_INSIGHTS_MAX_FILE_BYTES', str(256 * 1024)))
+
+
+def max_total_bytes() -> int:
+    """Return the most bytes of file content sent in one payload."""
+    return int(os.environ.get('CLAUDE_INSIGHTS_MAX_TOTAL_BYTES', str(2 * 1024 * 1024)))
+
+
+def decode_head(data: bytes) -> str:
+    """Decode bytes cut at the end, dropping a trailing partial character."""
+    return codecs.getincrementaldecoder('utf-8')(errors='replace').decode(data)
+
+
+def decode_tail(data: bytes) -> str:
+    """Decode bytes cut at the start, skipping a leading partial character."""
+    start = 0
+    while start < min(3, len(data)) and 0x80 <= data[start] < 0xC0:
+        start += 1
+    return data[start:].decode('utf-8', errors='replace')
+
+
+def normalize_newlines(text: str) -> str:
+    """Translate newlines the way text-mode open() does."""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def join_truncated(head: str, tail: str, omitted: int) -> str:
+    return head + TRUNCATION_MARKER.format(omitted=omitted) + tail
+
+
+def read_remaining(f, limit: int) -> str:
+    """
+    Read the rest of a binary file from its current position, keeping only
+    the head and tail if more than limit bytes remain.
+    """
+    # Most files fit; one bounded read tells without stat'ing the file
+    data = f.read(limit + 1)
+    if len(data) <= limit:
+        return normalize_newlines(data.decode('utf-8', errors='replace'))
+
+    start = f.tell() - len(data)
+    size = os.fstat(f.fileno()).st_size - start
+    head_size = limit // 2
+    tail_size = limit - head_size
+    head = data[:head_size]
+    f.seek(start + size - tail_size)
+    tail = f.read(tail_size)
+
+    return join_truncated(
+        normalize_newlines(decode_head(head)),
+        normalize_newlines(decode_tail(tail)),
+        size - head_size - tail_size,
+    )
+
+
+def read_text(path, limit: int = None) -> str:
+    """
+    Read a UTF-8 text file, keeping only its head and tail if it is larger
+    than limit bytes (default max_file_bytes()). An oversized file is never
+    loaded whole.
+    """
+    with open(path, 'rb') as f:
+        return read_remaining(f, max_file_bytes() if limit is None else limit)
+
+
+def truncate_text(text: str, limit: int) -> str:
+    """Cut text to its first and last limit/2 bytes if it is longer than limit bytes."""
+    data = text.encode('utf-8')
+    if len(data) <= limit:
+        return text
+    head_size = limit // 2
+    tail_size = limit - head_size
+    return join_truncated(
+        decode_head(data[:head_size]),
+        decode_tail(data[len(data) - tail_size:]) if tail_size else '',
+        len(data) - head_size - tail_size,
+    )
+
+
+def apply_total_budget(fields: list, limit: int = None) -> None:
+    """
+    Hold the text in a list of (container, key) fields to limit bytes in total
+    (default max_total_bytes()). Fields are charged in order; once the budget
+    is spent, the remaining ones are truncated to what is left.
+    """
+    remaining = max_total_bytes() if limit is None else limit
+
+    for container, key in fields:
+        text = container.get(key)
+        if not text:
+            continue
+        text = container[key] = truncate_text(text, max(remaining, 0))
+        remaining -= len(text.encode('utf-8'))
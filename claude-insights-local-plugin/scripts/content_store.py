@@ -0,0 +1,78 @@
+"""
+Content-addressed project context for session start payloads.
+
+Every SessionStart used to re-send the project memory, README and the full
+text of every command and agent, although they rarely change between
+sessions. With CLAUDE_INSIGHTS_CONTENT_DEDUP=1 those bodies are replaced by
+their hashes, and only the bodies the backend hasn't acknowledged yet are
+attached:
+
+    "memoryHash": "3f2a...",
+    "readmeHash": "9c1e...",
+    "commands": [{"name": "review", ..., "contentHash": "77b0..."}],
+    "contentData": {"9c1e...": "# Project\\n..."}
+
+Acknowledged hashes are kept in an append-only manifest shared by all
+projects (the same text is stored once by the backend), like the transcript
+chunk manifests in transcript_chunks.py. Delete it to make the next session
+start send every body again.
+"""
+
+import os
+
+from insights_state import append_manifest, load_manifest, state_path
+from transcript_chunks import chunk_hash
+
+# Top-level text fields replaced by a <field>Hash reference
+TEXT_FIELDS = ('memory', 'readme')
+
+# List fields whose items' content is replaced by a contentHash reference
+ITEM_FIELDS = ('commands', 'subagents')
+
+
+def dedup_enabled() -> bool:
+    """Return True if session start content should be sent by hash."""
+    return os.environ.get('CLAUDE_INSIGHTS_CONTENT_DEDUP', '0') == '1'
+
+
+def manifest_path() -> str:
+    """Return the manifest of content hashes the backend has acknowledged."""
+    return state_path('content-hashes.txt')
+
+
+def dedup_content(payload: dict) -> list:
+    """
+    Replace the text bodies in a session start payload with their hashes,
+    attaching under `contentData` only the bodies not acknowledged yet.
+    Returns every hash the payload references, to acknowledge once the
+    backend has accepted it.
+    """
+    known = load_manifest(manifest_path())
+    data = {}
+    referenced = []
+
+    def reference(text: str) -> str:
+        digest = chunk_hash(text.encode('utf-8'))
+        referenced.append(digest)
+        if digest not in known:
+            data[digest] = text
+        return digest
+
+    for field in TEXT_FIELDS:
+        # Empty bodies stay inline; there's nothing to save
+        if payload.get(field):
+            payload[f'{field}Hash'] = reference(payload.pop(field))
+
+    for field in ITEM_FIELDS:
+        for item in payload.get(field, []):
+            if item.get('content'):
+                item['contentHash'] = reference(item.pop('content'))
+
+    payload['contentData'] = data
+    return referenced
+
+
+def acknowledge_content(hashes: list) -> None:
+    """Append newly acknowledged content hashes to the manifest."""
+    if hashes:
+        append_manifest(manifest_path(), hashes)
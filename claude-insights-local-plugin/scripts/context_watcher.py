@@ -0,0 +1,305 @@
+"""
+inotify watcher that keeps session start context warm in the collector.
+
+Users who start and clear sessions dozens of times an hour pay for the same
+collection (memory, README, command and agent trees, git remote, .mcp.json)
+every time, although it almost never changes. With CLAUDE_INSIGHTS_WATCH=1
+the resident collector (insights_daemon.py) watches, for each project it has
+seen a session start in:
+
+- the project directory itself, for AGENTS.md, CLAUDE.md, README.md, .mcp.json
+  and the creation of .claude or .git;
+- <cwd>/.claude and every directory of its commands and agents trees;
+- the repository's git config;
+
+plus ~/.claude/commands and ~/.claude/agents for all projects. It keeps the
+last collected context per project and rebuilds it in the background shortly
+after anything there changes, so session_start.build_payload usually finds a
+fresh snapshot and skips the filesystem entirely.
+
+A snapshot is only served if no change was seen since its collection began,
+and pending events are read before every lookup. Projects whose trees can't
+be fully watched (out of inotify watches) are never served from a snapshot.
+Without inotify (not Linux) the watcher is simply not started.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from context_scanner import walk_markdown
+from git_remote import Unsupported, find_git_dirs
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+EVENT = struct.Struct('iIII')
+
+# Files in the project directory that session start reads
+PROJECT_NAMES = frozenset(('AGENTS.md', 'CLAUDE.md', 'README.md', '.mcp.json', '.claude', '.git'))
+CLAUDE_DIR_NAMES = frozenset(('commands', 'agents'))
+
+# Owner of the watches on ~/.claude, shared by every project
+USER = None
+
+MAX_PROJECTS = 20
+
+# Seconds without further changes before a snapshot is rebuilt
+DEBOUNCE = 0.5
+
+_watcher = None
+
+
+def watch_enabled() -> bool:
+    """Return True if the collector should watch project context (CLAUDE_INSIGHTS_WATCH=1)."""
+    return os.environ.get('CLAUDE_INSIGHTS_WATCH', '0') == '1'
+
+
+class Inotify:
+    """Thin ctypes wrapper over the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> list:
+        """Return the pending (wd, mask, name) events without blocking."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, pos)
+                pos += EVENT.size
+                name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', errors='replace')
+                pos += length
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def project_watches(cwd: str) -> dict:
+    """Return {directory: names filter (None for every event)} to watch for one project."""
+    claude_dir = os.path.join(cwd, '.claude')
+    watches = {cwd: PROJECT_NAMES, claude_dir: CLAUDE_DIR_NAMES}
+    for name in CLAUDE_DIR_NAMES:
+        watches.update(dict.fromkeys(walk_markdown(os.path.join(claude_dir, name))[1]))
+    try:
+        dirs = find_git_dirs(cwd)
+        if dirs:
+            watches[dirs[2]] = frozenset(('config',))
+    except (Unsupported, OSError):
+        pass
+    return watches
+
+
+def user_watches() -> dict:
+    """Return {directory: names filter} for the user-level command and agent trees."""
+    claude_dir = os.path.join(os.path.expanduser('~'), '.claude')
+    watches = {claude_dir: CLAUDE_DIR_NAMES}
+    for name in CLAUDE_DIR_NAMES:
+        watches.update(dict.fromkeys(walk_markdown(os.path.join(claude_dir, name))[1]))
+    return watches
+
+
+class ContextWatcher:
+    """
+    Per-project snapshots of collected session start context, invalidated by inotify.
+
+    collect(cwd) must return (collected, late) like session_start.collect_context.
+    """
+
+    def __init__(self, collect, inotify: Inotify = None):
+        self.collect = collect
+        self.inotify = inotify or Inotify()
+        self.lock = threading.Lock()
+        # cwd -> {'generation', 'snapshot': (generation, collected) | None, 'complete', 'used'}
+        self.projects = {}
+        # Changed projects waiting for a background rebuild: cwd -> time of last change
+        self.pending = {}
+        # wd -> {'path', 'owners': {owner: names filter}}
+        self.watches = {}
+        self.user_complete = self._watch(USER, user_watches())
+
+    def _watch(self, owner, wanted: dict) -> bool:
+        """Make owner's watches exactly wanted; returns False if some couldn't be added."""
+        complete = True
+        for wd, watch in list(self.watches.items()):
+            if owner in watch['owners'] and watch['path'] not in wanted:
+                del watch['owners'][owner]
+                if not watch['owners']:
+                    self._unwatch(wd)
+
+        for path, names in wanted.items():
+            try:
+                wd = self.inotify.add_watch(path)
+            except OSError:
+                # Directories that don't exist yet are covered by their parent's watch
+                if os.path.isdir(path):
+                    complete = False
+                continue
+            watch = self.watches.setdefault(wd, {'path': path, 'owners': {}})
+            watch['owners'][owner] = names
+        return complete
+
+    def _unwatch(self, wd: int) -> None:
+        if self.watches.pop(wd, None) is not None:
+            self.inotify.rm_watch(wd)
+
+    def _changed(self, owner) -> None:
+        """Invalidate the snapshots affected by a change to owner's watches."""
+        now = time.monotonic()
+        for cwd in (self.projects if owner is USER else [owner]):
+            project = self.projects.get(cwd)
+            if project is not None:
+                project['generation'] += 1
+                self.pending[cwd] = now
+
+    def _drain_events(self) -> None:
+        """Apply pending inotify events. Caller holds the lock."""
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; assume everything changed
+                self._changed(USER)
+                continue
+            watch = self.watches.get(wd)
+            if watch is None:
+                continue
+            if mask & IN_IGNORED:
+                # The directory went away; the kernel dropped the watch
+                self.watches.pop(wd, None)
+            for owner, names in list(watch['owners'].items()):
+                if names is None or not name or name in names:
+                    self._changed(owner)
+
+    def lookup(self, cwd: str) -> tuple:
+        """
+        Return (collected, token) for a project: its snapshot if still fresh,
+        else None and a token to pass to store() with a fresh collection.
+        """
+        with self.lock:
+            self._drain_events()
+            project = self.projects.get(cwd)
+            if project is None:
+                project = self._add_project(cwd)
+            project['used'] = time.monotonic()
+
+            snapshot = project['snapshot']
+            if snapshot is not None and snapshot[0] == project['generation']:
+                return snapshot[1], project['generation']
+            if cwd in self.pending:
+                # Re-watch now rather than in the background, so new directories are covered
+                project['complete'] = self._watch(cwd, project_watches(cwd))
+                del self.pending[cwd]
+            return None, project['generation']
+
+    def store(self, cwd: str, token: int, collected: dict) -> None:
+        """Keep a collection as the project's snapshot if nothing changed since token."""
+        with self.lock:
+            self._drain_events()
+            project = self.projects.get(cwd)
+            if project is None or project['generation'] != token:
+                return
+            if project['complete'] and self.user_complete:
+                project['snapshot'] = (token, collected)
+
+    def _add_project(self, cwd: str) -> dict:
+        """Start watching a project, evicting the least recently used one if needed. Caller holds the lock."""
+        if len(self.projects) >= MAX_PROJECTS:
+            oldest = min(self.projects, key=lambda key: self.projects[key]['used'])
+            del self.projects[oldest]
+            self.pending.pop(oldest, None)
+            self._watch(oldest, {})
+
+        project = self.projects[cwd] = {'generation': 0, 'snapshot': None, 'complete': False, 'used': time.monotonic()}
+        project['complete'] = self._watch(cwd, project_watches(cwd))
+        return project
+
+    def _rebuild_due(self) -> list:
+        """Pop the projects whose changes have settled and re-watch them. Caller holds the lock."""
+        now = time.monotonic()
+        due = [cwd for cwd, changed_at in self.pending.items() if now - changed_at >= DEBOUNCE]
+        for cwd in due:
+            del self.pending[cwd]
+            self.projects[cwd]['complete'] = self._watch(cwd, project_watches(cwd))
+        if due:
+            self.user_complete = self._watch(USER, user_watches())
+        return [(cwd, self.projects[cwd]['generation']) for cwd in due]
+
+    def run(self) -> None:
+        """Read events and rebuild changed snapshots in the background, forever."""
+        while True:
+            timeout = DEBOUNCE if self.pending else None
+            try:
+                select.select([self.inotify.fd], [], [], timeout)
+                with self.lock:
+                    self._drain_events()
+                    due = self._rebuild_due()
+            except (OSError, ValueError):
+                # The inotify descriptor was closed
+                return
+
+            for cwd, token in due:
+                try:
+                    collected, late = self.collect(cwd)
+                    if not late:
+                        self.store(cwd, token, collected)
+                except Exception as e:
+                    print(f"Error pre-warming session start context for {cwd}: {e}", file=sys.stderr)
+
+
+def start(collect) -> ContextWatcher:
+    """Start the process-wide watcher thread, or return None if inotify isn't available."""
+    global _watcher
+    if _watcher is None:
+        try:
+            _watcher = ContextWatcher(collect)
+        except (OSError, AttributeError):
+            return None
+        threading.Thread(target=_watcher.run, daemon=True).start()
+    return _watcher
+
+
+def active() -> ContextWatcher:
+    """Return the running watcher, if this process started one."""
+    return _watcher
@@ -0,0 +1,109 @@
+"""
+Stdlib-only client for the resident insights collector (insights_daemon.py).
+
+Hook entry points append their stdin JSON to the durable spool
+(event_spool.py), poke the collector over a Unix socket and return
+immediately, so they never pay for `uv` environment resolution, importing
+`requests` or waiting on the backend. The collector is started lazily by the
+first hook that cannot reach it and drains the spool in the background; if
+it doesn't come up within START_TIMEOUT seconds, the hook takes its event
+back and sends it itself.
+
+Set CLAUDE_INSIGHTS_DAEMON=0 to always send from the hook process itself.
+"""
+
+import os
+import socket
+import sys
+import time
+
+from insights_state import state_dir, state_path
+
+SOCKET_NAME = 'collector.sock'
+CONNECT_TIMEOUT = 0.5
+# How long a hook waits for a collector it started to answer
+START_TIMEOUT = 1.0
+START_POLL_INTERVAL = 0.05
+
+
+def daemon_enabled() -> bool:
+    """Return True if hooks should go through the resident collector."""
+    return hasattr(socket, 'AF_UNIX') and os.environ.get('CLAUDE_INSIGHTS_DAEMON', '1') != '0'
+
+
+def socket_path() -> str:
+    """Return the collector socket path."""
+    return os.path.join(state_dir(), SOCKET_NAME)
+
+
+def wake_daemon() -> None:
+    """Tell the collector new events are spooled, raising OSError if it isn't running."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path())
+        sock.sendall(b'wake\n')
+        if sock.recv(2) != b'ok':
+            raise ConnectionError("collector did not acknowledge the wake-up")
+
+
+def start_daemon() -> None:
+    """Spawn the collector in the background, detached from the hook process."""
+    import shutil
+    import subprocess
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'insights_daemon.py')
+    # The stdlib transport needs no environment; only the requests one goes through uv
+    uv = shutil.which('uv') if os.environ.get('CLAUDE_INSIGHTS_TRANSPORT') == 'requests' else None
+    command = [uv, 'run', '--script', script] if uv else [sys.executable, script]
+
+    with open(state_path('collector.log'), 'ab') as log:
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            cwd=state_dir(),
+            start_new_session=True,
+        )
+
+
+def spool_event(hook: str, raw: bytes) -> bool:
+    """
+    Spool a hook event for background delivery and make sure the collector runs.
+    Returns True once the event is durably queued, False if the caller should
+    send it in-process instead.
+    """
+    if not daemon_enabled():
+        return False
+
+    try:
+        from event_spool import enqueue, withdraw
+        event_id = enqueue(hook, raw)
+    except Exception:
+        return False
+
+    try:
+        wake_daemon()
+        return True
+    except OSError:
+        pass
+
+    # Not running: start it (a duplicate started in a race exits on the collector lock)
+    try:
+        start_daemon()
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(START_POLL_INTERVAL)
+            try:
+                wake_daemon()
+                return True
+            except OSError:
+                pass
+    except Exception:
+        pass
+
+    # The collector can't be reached: send in-process, unless it already took the event
+    try:
+        return not withdraw(event_id)
+    except Exception:
+        return True
@@ -0,0 +1,135 @@
+"""
+Batched delivery of spooled insights hook events.
+
+Instead of one HTTP request per event, the collector packs a run of spooled
+events from all hook types into a single gzip-compressed NDJSON POST to
+/api/hooks/batch. Lines keep enqueue order and look like
+
+    {"event": "post-tool-use", "sessionId": "...", "payload": {...}}
+
+where payload is exactly the body the per-event endpoint takes. New
+transcript lines for a session ride on its first record in the batch; later
+records for that session carry an empty transcript at the following offset.
+How the lines are attached follows CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING (see
+transcript_encoding.py).
+
+A run is flushed once it holds BATCH_SIZE events or CLAUDE_INSIGHTS_BATCH_BYTES
+of event data (default 1 MiB), once its oldest event is
+CLAUDE_INSIGHTS_BATCH_WINDOW seconds old (default 1), or at once when it
+contains a session end. Session start events are sent on their own because
+their payload is collected at send time.
+
+CLAUDE_INSIGHTS_BATCH=0 disables batching; so does a backend that answers the
+batch endpoint with 404/405, for the lifetime of the collector. Any other
+4xx (except 408 and 429) sends that run's events one by one, so a record the
+backend refuses is dropped without holding back the rest.
+"""
+
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+
+from insights_client import BASE_HEADERS, endpoint_for, should_retry
+from transcript_cursor import read_transcript_delta, commit_transcript_cursor, forget_session
+from transcript_encoding import compress_stream, delta_size, encode_batch_record, stream_threshold
+
+BATCH_ENDPOINT = endpoint_for('batch')
+BATCH_SIZE = 50
+UNBATCHED_HOOKS = ('session_start',)
+
+batch_supported = True
+
+
+def batching_enabled() -> bool:
+    """Return True if spooled events should be sent through the batch endpoint."""
+    return batch_supported and os.environ.get('CLAUDE_INSIGHTS_BATCH', '1') != '0'
+
+
+def flush_delay(run: list) -> float:
+    """Return how long to keep collecting before flushing a run of spool rows (0 to flush now)."""
+    max_bytes = int(os.environ.get('CLAUDE_INSIGHTS_BATCH_BYTES', str(1024 * 1024)))
+    window = float(os.environ.get('CLAUDE_INSIGHTS_BATCH_WINDOW', '1'))
+
+    if len(run) >= BATCH_SIZE or sum(len(event['body']) for event in run) >= max_bytes:
+        return 0.0
+    # Nothing follows a session end, and a retried run has already waited
+    if any(event['hook'] == 'session_end' for event in run) or run[0]['attempts'] > 0:
+        return 0.0
+    return max(0.0, window - (time.time() - run[0]['created_at']))
+
+
+def build_records(run: list) -> tuple:
+    """
+    Build the NDJSON lines for a run of spool rows.
+    Returns the lines (each an iterable of byte chunks, read lazily) and the
+    transcript deltas to commit once the batch is accepted.
+    """
+    lines = []
+    deltas = {}
+
+    for event in run:
+        hook = event['hook']
+        input_data = json.loads(event['body'])
+        session_id = input_data.get('session_id')
+
+        if session_id in deltas:
+            # This session's new lines already ride on an earlier record
+            transcript = {'offset': deltas[session_id]['end'], 'end': deltas[session_id]['end']}
+        else:
+            transcript = deltas[session_id] = read_transcript_delta(input_data)
+
+        payload = importlib.import_module(hook).build_payload(input_data, transcript)
+        record = {'event': hook.replace('_', '-'), 'sessionId': session_id, 'payload': payload}
+        lines.append(encode_batch_record(record, transcript))
+
+    return lines, list(deltas.values())
+
+
+def send_batch(run: list, session):
+    """
+    Send a run of spool rows as one gzip-compressed NDJSON request.
+    Returns True on success, False on a failure worth retrying and None if
+    the caller should send the events one by one: the backend has no batch
+    endpoint, or it rejected the batch (a bad record is then dropped alone).
+    """
+    global batch_supported
+
+    try:
+        lines, deltas = build_records(run)
+        body = compress_stream(itertools.chain.from_iterable(lines))
+
+        # Stream the body only when the transcripts it carries are large
+        if sum(delta_size(delta) for delta in deltas) <= stream_threshold():
+            body = b''.join(body)
+
+        headers = {
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+            **BASE_HEADERS,
+        }
+
+        response = session.post(BATCH_ENDPOINT, data=body, headers=headers, timeout=10)
+
+        if response.status_code in (404, 405):
+            batch_supported = False
+            print("Backend has no batch endpoint; sending events one by one", file=sys.stderr)
+            return None
+        if response.status_code not in [200, 201]:
+            if should_retry(response.status_code):
+                return False
+            print(f"Backend rejected the batch with HTTP {response.status_code}; sending its events one by one",
+                  file=sys.stderr)
+            return None
+
+        for delta in deltas:
+            commit_transcript_cursor(delta)
+        for event in run:
+            if event['hook'] == 'session_end':
+                forget_session(json.loads(event['body']).get('session_id'))
+        return True
+    except Exception as e:
+        print(f"Error sending event batch: {e}", file=sys.stderr)
+        return False
@@ -0,0 +1,113 @@
+"""
+Durable local spool for insights hook events.
+
+Hooks append their stdin JSON to a SQLite queue (WAL mode, so appends don't
+block the reader) and return at once; the collector drains it in the
+background. Delivery is strictly in enqueue order: when the head event
+fails, the whole queue backs off exponentially before retrying it, so a
+slow or stopped backend never adds latency to tool use. Only failures that
+may clear up (unreachable, 408, 429, 5xx) back off; an event the backend
+rejects for good is dropped at once.
+
+Events are dropped after MAX_ATTEMPTS failed deliveries, or once they are
+older than CLAUDE_INSIGHTS_SPOOL_TTL seconds (default 3600).
+
+The database holds raw hook input (prompts, tool input and output), so it
+is only readable by its owner; SQLite gives its -wal and -shm files the
+database's permissions.
+"""
+
+import os
+import sqlite3
+import time
+
+from insights_state import state_path
+
+SPOOL_NAME = 'spool.db'
+MAX_ATTEMPTS = 10
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+def connect() -> sqlite3.Connection:
+    """Open the spool database, creating the schema if needed."""
+    path = state_path(SPOOL_NAME)
+    # Create it owner-only before SQLite does (and tighten one left by an older version)
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+    os.chmod(path, 0o600)
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS events ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' hook TEXT NOT NULL,'
+        ' body BLOB NOT NULL,'
+        ' created_at REAL NOT NULL,'
+        ' attempts INTEGER NOT NULL DEFAULT 0,'
+        ' next_attempt_at REAL NOT NULL DEFAULT 0)'
+    )
+    return conn
+
+
+def enqueue(hook: str, raw: bytes) -> int:
+    """Append one hook event to the spool. Returns its id."""
+    conn = connect()
+    try:
+        return conn.execute(
+            'INSERT INTO events (hook, body, created_at) VALUES (?, ?, ?)',
+            (hook, raw, time.time())
+        ).lastrowid
+    finally:
+        conn.close()
+
+
+def withdraw(event_id: int) -> bool:
+    """Take an event back out of the spool. Returns False if it was no longer queued."""
+    conn = connect()
+    try:
+        return conn.execute('DELETE FROM events WHERE id = ?', (event_id,)).rowcount > 0
+    finally:
+        conn.close()
+
+
+def expire(conn: sqlite3.Connection) -> int:
+    """Drop events older than the spool TTL. Returns the number dropped."""
+    ttl = float(os.environ.get('CLAUDE_INSIGHTS_SPOOL_TTL', '3600'))
+    cursor = conn.execute('DELETE FROM events WHERE created_at < ?', (time.time() - ttl,))
+    return cursor.rowcount
+
+
+def peek(conn: sqlite3.Connection, limit: int) -> list:
+    """Return up to `limit` events from the head of the queue, oldest first."""
+    return conn.execute(
+        'SELECT id, hook, body, created_at, attempts, next_attempt_at FROM events ORDER BY id LIMIT ?',
+        (limit,)
+    ).fetchall()
+
+
+def ack(conn: sqlite3.Connection, event_ids: list) -> None:
+    """Remove delivered events from the spool in a single statement."""
+    if not event_ids:
+        return
+    placeholders = ','.join('?' * len(event_ids))
+    conn.execute(f'DELETE FROM events WHERE id IN ({placeholders})', list(event_ids))
+
+
+def retry_later(conn: sqlite3.Connection, event_id: int, attempts: int) -> bool:
+    """
+    Record a failed delivery and back off before the next attempt.
+    Returns False if the event ran out of attempts and was dropped.
+    """
+    attempts += 1
+    if attempts >= MAX_ATTEMPTS:
+        conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+        return False
+
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1)))
+    conn.execute(
+        'UPDATE events SET attempts = ?, next_attempt_at = ? WHERE id = ?',
+        (attempts, time.time() + delay, event_id)
+    )
+    return True
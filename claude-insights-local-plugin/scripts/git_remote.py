@@ -0,0 +1,253 @@
+"""
+In-process lookup of a project's git `remote.origin.url`.
+
+`git remote get-url origin` costs a fork and exec of git on every session
+start (more with slow fsmonitor hooks on large repos). All it needs is a
+single config value, so it is read here directly:
+
+- the repository is found by walking up from the project directory to a
+  `.git` directory, or a `.git` file (`gitdir: ...`) for worktrees and
+  submodules; worktrees read the shared config through their `commondir`;
+- the first `url` of the `[remote "origin"]` section is taken, as git does.
+
+Anything this reader doesn't model makes it fall back to the subprocess:
+`include`/`includeIf` sections, `insteadOf` url rewrites (in the repo or the
+user/system config), per-worktree config, and GIT_* environment overrides.
+
+Results are cached per repository root in the state dir, keyed by the stat of
+every config file that was consulted.
+"""
+
+import os
+import subprocess
+
+from insights_state import load_json, save_json, state_path
+
+# Environment variables that change where git looks for its repository or config
+GIT_ENV_OVERRIDES = (
+    'GIT_DIR', 'GIT_COMMON_DIR', 'GIT_CONFIG', 'GIT_CONFIG_GLOBAL', 'GIT_CONFIG_SYSTEM',
+    'GIT_CONFIG_COUNT', 'GIT_CONFIG_PARAMETERS', 'GIT_CEILING_DIRECTORIES',
+)
+
+MAX_CACHED_REPOS = 200
+
+
+class Unsupported(Exception):
+    """The config uses something only git itself can resolve."""
+
+
+def git_remote_origin_subprocess(cwd: str) -> str:
+    """Ask git for the origin URL (the slow path)."""
+    try:
+        result = subprocess.run(
+            ['git', 'remote', 'get-url', 'origin'],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+        return ''
+    except Exception:
+        return ''
+
+
+def find_git_dirs(cwd: str):
+    """
+    Walk up from cwd to the repository.
+    Returns (work tree root, git dir, common dir), or None outside a repository.
+    """
+    path = os.path.abspath(cwd)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return path, dot_git, common_dir(dot_git)
+        if os.path.isfile(dot_git):
+            git_dir = read_gitdir_file(dot_git)
+            return path, git_dir, common_dir(git_dir)
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def read_gitdir_file(dot_git: str) -> str:
+    """Resolve a `.git` file (gitdir: <path>) to the git dir it points at."""
+    with open(dot_git, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if not content.startswith('gitdir:'):
+        raise Unsupported(f"unrecognised .git file {dot_git}")
+    git_dir = content[len('gitdir:'):].strip()
+    return os.path.normpath(os.path.join(os.path.dirname(dot_git), git_dir))
+
+
+def common_dir(git_dir: str) -> str:
+    """Return the directory holding the shared config (differs from git_dir for worktrees)."""
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r', encoding='utf-8') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except FileNotFoundError:
+        return git_dir
+
+
+def user_config_paths() -> list:
+    """Return the system and user config files git would also read."""
+    xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return [
+        '/etc/gitconfig',
+        os.path.join(xdg, 'git', 'config'),
+        os.path.expanduser('~/.gitconfig'),
+    ]
+
+
+def unquote(value: str) -> str:
+    """Decode a config value: strip comments and whitespace, handle quotes and escapes."""
+    out = []
+    quoted = False
+    pending_space = ''
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == '\\':
+            i += 1
+            if i == len(value):
+                raise Unsupported('line continuation')
+            out.append(pending_space + {'n': '\n', 't': '\t', 'b': '\b'}.get(value[i], value[i]))
+            pending_space = ''
+        elif char == '"':
+            quoted = not quoted
+        elif char in '#;' and not quoted:
+            break
+        elif char.isspace() and not quoted:
+            # Inner whitespace is kept, trailing whitespace dropped
+            if out:
+                pending_space += char
+        else:
+            out.append(pending_space + char)
+            pending_space = ''
+        i += 1
+    return ''.join(out)
+
+
+def parse_section(line: str) -> tuple:
+    """Parse a `[section "subsection"]` header into (section, subsection, rest of line)."""
+    close = line.find(']')
+    if close < 0:
+        raise Unsupported(f"malformed section header {line!r}")
+    header = line[1:close].strip()
+    rest = line[close + 1:]
+
+    if '"' in header:
+        name, _, subsection = header.partition(' ')
+        subsection = subsection.strip()
+        if not (subsection.startswith('"') and subsection.endswith('"')):
+            raise Unsupported(f"malformed section header {line!r}")
+        return name.lower(), subsection[1:-1].replace('\\"', '"').replace('\\\\', '\\'), rest
+
+    # Deprecated [section.subsection] syntax
+    name, _, subsection = header.partition('.')
+    return name.lower(), subsection or None, rest
+
+
+def read_config(path: str) -> list:
+    """Return the (section, subsection, key, value) entries of a config file."""
+    entries = []
+    section, subsection = None, None
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('['):
+                section, subsection, line = parse_section(line)
+                line = line.strip()
+            if not line or line[0] in '#;':
+                continue
+
+            key, has_value, value = line.partition('=')
+            # A bare key is boolean true
+            entries.append((section, subsection, key.strip().lower(), unquote(value) if has_value else 'true'))
+    return entries
+
+
+def check_supported(entries: list) -> None:
+    """Raise Unsupported if the entries use includes or URL rewrites."""
+    for section, _, key, _ in entries:
+        if section in ('include', 'includeif'):
+            raise Unsupported('config includes')
+        if section == 'url' and key in ('insteadof', 'pushinsteadof'):
+            raise Unsupported('url rewrites')
+
+
+def stamp(paths: list) -> list:
+    """Return the (mtime, size) of each path, or None where it doesn't exist."""
+    result = []
+    for path in paths:
+        try:
+            stat_result = os.stat(path)
+            result.append([stat_result.st_mtime_ns, stat_result.st_size])
+        except OSError:
+            result.append(None)
+    return result
+
+
+def resolve_origin_url(cwd: str) -> str:
+    """
+    Read remote.origin.url for the repository containing cwd.
+    Returns '' outside a repository or without an origin remote. Raises
+    Unsupported (or OSError) when only git itself can answer.
+    """
+    if any(name in os.environ for name in GIT_ENV_OVERRIDES):
+        raise Unsupported('git environment overrides')
+
+    dirs = find_git_dirs(cwd)
+    if dirs is None:
+        return ''
+    root, git_dir, shared_dir = dirs
+    if os.path.exists(os.path.join(git_dir, 'config.worktree')):
+        raise Unsupported('per-worktree config')
+
+    repo_config = os.path.join(shared_dir, 'config')
+    config_paths = [repo_config] + user_config_paths()
+    current = stamp(config_paths)
+
+    cache_path = state_path('session-start', 'git-remotes.json')
+    cache = load_json(cache_path, {}) or {}
+    cached = cache.get(root)
+    if cached and cached['stamp'] == current:
+        return cached['url']
+
+    # The user and system configs only matter for url rewrites and includes
+    for path, path_stamp in zip(config_paths[1:], current[1:]):
+        if path_stamp is not None:
+            check_supported(read_config(path))
+
+    entries = read_config(repo_config)
+    check_supported(entries)
+    url = next((
+        value for section, subsection, key, value in entries
+        if section == 'remote' and subsection == 'origin' and key == 'url'
+    ), '')
+
+    # Most recently resolved last, so the oldest repos are dropped first
+    cache.pop(root, None)
+    cache[root] = {'stamp': current, 'url': url}
+    if len(cache) > MAX_CACHED_REPOS:
+        for stale in list(cache)[:len(cache) - MAX_CACHED_REPOS]:
+            del cache[stale]
+    try:
+        save_json(cache_path, cache)
+    except OSError:
+        pass
+    return url
+
+
+def get_origin_url(cwd: str) -> str:
+    """Return the origin URL of the repository containing cwd, or '' if there is none."""
+    if not cwd:
+        return ''
+    try:
+        return resolve_origin_url(cwd)
+    except (Unsupported, OSError, ValueError):
+        return git_remote_origin_subprocess(cwd)
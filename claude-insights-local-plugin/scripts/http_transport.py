@@ -0,0 +1,95 @@
+"""
+Stdlib HTTP transport for the insights hooks.
+
+Importing `requests` pulls in urllib3, charset-normalizer and idna and costs
+more than everything else a hook does. HttpSession speaks the small part of
+the requests.Session API the hooks use (request()/post() returning an object
+with status_code and json()) on top of http.client, and keeps one persistent
+connection per host so the collector reuses it across events.
+
+Request bodies may be bytes or an iterable of bytes; iterables are sent with
+chunked transfer encoding.
+"""
+
+import http.client
+import json
+from urllib.parse import urlsplit
+
+# Errors that mean the backend could not be reached or dropped the connection
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException)
+
+# Errors before any response that mean the server had closed the connection, so never
+# saw the request (http.client.RemoteDisconnected is a ConnectionResetError)
+STALE_CONNECTION_ERRORS = (ConnectionResetError, BrokenPipeError)
+
+
+class Response:
+    """The parts of a requests.Response the hooks look at."""
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpSession:
+    """A minimal keep-alive HTTP session built on http.client."""
+
+    def __init__(self):
+        self.connections = {}
+
+    def request(self, method: str, url: str, data=None, headers=None, timeout: float = 5) -> Response:
+        """Send a request, reusing the open connection to the host if there is one."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        streamed = data is not None and not isinstance(data, (bytes, bytearray))
+
+        while True:
+            connection = self.connections.get(key)
+            reused = connection is not None
+            if connection is None:
+                connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+                connection = self.connections[key] = connection_class(parts.netloc, timeout=timeout)
+
+            try:
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                connection.request(method, path, body=data, headers=headers or {})
+                response = connection.getresponse()
+            except TRANSPORT_ERRORS as e:
+                self.drop(key)
+                # The server closed an idle kept-alive connection; retry once on a fresh one.
+                # Anything else (a timeout above all) may come after the server got the request,
+                # and a streamed body can't be replayed, so those failures are left to the caller
+                if reused and not streamed and isinstance(e, STALE_CONNECTION_ERRORS):
+                    continue
+                raise
+
+            try:
+                content = response.read()
+            except TRANSPORT_ERRORS:
+                self.drop(key)
+                raise
+
+            if response.will_close:
+                self.drop(key)
+            return Response(response.status, content)
+
+    def post(self, url: str, **kwargs) -> Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> Response:
+        return self.request('PUT', url, **kwargs)
+
+    def drop(self, key) -> None:
+        """Close and forget the connection for a host."""
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+    def close(self) -> None:
+        for key in list(self.connections):
+            self.drop(key)
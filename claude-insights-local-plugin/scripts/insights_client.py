@@ -0,0 +1,198 @@
+"""
+Shared client for the local insights hooks.
+
+Every hook used to carry its own copy of the transcript read, header setup,
+HTTP call and error swallowing. They are now thin shims: each hook module
+defines build_payload(input_data, transcript) and calls run_hook() from its
+main; the actual delivery goes through send(event_type, input_data) here,
+both in the hook process and in the collector.
+
+Import cost matters because hooks run as fresh processes on every event, so
+this module only imports what spooling needs. The HTTP transport is loaded
+the first time an event is sent in-process (most events are spooled and
+never need it), and a single keep-alive session is reused for every send
+after that. By default that is the stdlib HttpSession (see
+http_transport.py), so the hooks need no third-party packages; set
+CLAUDE_INSIGHTS_TRANSPORT=requests to send through a requests.Session
+instead. CLAUDE_INSIGHTS_API_URL overrides the backend address.
+
+benchmarks/bench_hook_imports.py measures what each hook pays at import and
+benchmarks/bench_hook_startup.py compares cold-start latency per transport.
+"""
+
+import importlib
+import json
+import os
+import sys
+
+from daemon_client import spool_event
+from insights_timings import TIMED_EVENTS, report, span, start_timings, stop_timings
+from transcript_cursor import read_transcript_delta, commit_transcript_cursor, forget_session
+from transcript_encoding import encode_request
+
+BASE_URL = os.environ.get('CLAUDE_INSIGHTS_API_URL', 'http://localhost:3001').rstrip('/') + '/api/hooks'
+
+# Request settings for events that differ from a POST with a 5 second timeout
+EVENT_OPTIONS = {
+    'session_end': {'method': 'PUT', 'timeout': 10, 'require_success': True},
+}
+
+# Error statuses that may clear up on their own; any other 4xx is final
+RETRY_STATUSES = (408, 429)
+
+# Headers sent with every request, computed once per process
+BASE_HEADERS = {}
+if os.environ.get('CLAUDE_INSIGHTS_API_KEY'):
+    BASE_HEADERS['x-api-key'] = os.environ['CLAUDE_INSIGHTS_API_KEY']
+
+_session = None
+
+
+def endpoint_for(event_type: str) -> str:
+    """Return the backend endpoint for an event type (pre_tool_use -> .../pre-tool-use)."""
+    return f"{BASE_URL}/{event_type.replace('_', '-')}"
+
+
+def transport() -> str:
+    """Return the configured HTTP transport: stdlib (default) or requests."""
+    return 'requests' if os.environ.get('CLAUDE_INSIGHTS_TRANSPORT') == 'requests' else 'stdlib'
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        if transport() == 'requests':
+            import requests
+            _session = requests.Session()
+        else:
+            from http_transport import HttpSession
+            _session = HttpSession()
+    return _session
+
+
+def should_retry(status_code: int) -> bool:
+    """Return True if a request that failed with this status may succeed when sent again."""
+    return status_code in RETRY_STATUSES or status_code >= 500
+
+
+def unreachable_errors() -> tuple:
+    """Return the exception types that mean the backend could not be reached."""
+    from http_transport import TRANSPORT_ERRORS
+    requests = sys.modules.get('requests')
+    if requests is None:
+        return TRANSPORT_ERRORS
+    return TRANSPORT_ERRORS + (requests.exceptions.RequestException,)
+
+
+def send(event_type: str, input_data: dict, session=None):
+    """
+    Send one hook event along with any new transcript lines.
+    Uses the given session if provided, else the process-wide one.
+    Returns True on success, False if the backend rejected the event for
+    good (a 4xx, or a session end without success) and None if it could not
+    be reached or failed in a way worth retrying (408, 429, 5xx).
+    """
+    if event_type not in TIMED_EVENTS:
+        return _send(event_type, input_data, session)
+
+    # Time the payload build and the request (see insights_timings.py)
+    timings = start_timings()
+    ok = None
+    try:
+        ok = _send(event_type, input_data, session)
+        return ok
+    finally:
+        stop_timings()
+        report(event_type, timings, ok)
+
+
+def _send(event_type: str, input_data: dict, session=None):
+    options = EVENT_OPTIONS.get(event_type, {})
+    endpoint = endpoint_for(event_type)
+
+    try:
+        session = session or get_session()
+    except ImportError:
+        print("Error: requests library not available", file=sys.stderr)
+        return False
+
+    try:
+        # Only ship transcript lines the backend hasn't acknowledged yet
+        transcript = read_transcript_delta(input_data)
+        with span('build'):
+            payload = importlib.import_module(event_type).build_payload(input_data, transcript)
+
+        # Attach the transcript in the configured wire encoding
+        body, headers = encode_request(payload, transcript)
+        headers.update(BASE_HEADERS)
+
+        with span('http'):
+            response = session.request(
+                options.get('method', 'POST'),
+                endpoint,
+                data=body,
+                headers=headers,
+                timeout=options.get('timeout', 5)
+            )
+    except unreachable_errors() as e:
+        # Backend might not be running
+        print(f"Error: Could not reach {endpoint}: {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"Error sending {event_type} event: {e}", file=sys.stderr)
+        return False
+
+    if response.status_code not in [200, 201]:
+        if should_retry(response.status_code):
+            return None
+        print(f"Backend rejected {event_type} with HTTP {response.status_code}", file=sys.stderr)
+        return False
+    if options.get('require_success'):
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        if not result.get('success'):
+            print(f"Backend rejected {event_type}: {result.get('error', 'Unknown error')}", file=sys.stderr)
+            return False
+
+    commit_transcript_cursor(transcript)
+    if event_type == 'session_end':
+        # Nothing more will be sent for this session
+        forget_session(input_data.get('session_id'))
+    if transcript.get('content'):
+        # Remember the session start content the backend now has (content dedup only)
+        from content_store import acknowledge_content
+        try:
+            acknowledge_content(transcript['content'])
+        except OSError:
+            pass
+    return True
+
+
+def run_hook(event_type: str, required=('session_id',), failure_exit_code: int = 0) -> None:
+    """
+    Entry point for a hook script: read the event from stdin, then spool it
+    for the collector or send it in-process. Exits 0 so the hook never
+    blocks Claude Code, or with failure_exit_code if the event lacks a
+    required field or the backend rejected it for good (send() returned
+    False; 5xx and other failures worth retrying exit 0).
+    """
+    code = 0
+    try:
+        raw = sys.stdin.buffer.read()
+        input_data = json.loads(raw)
+
+        # Spool the event for the collector to deliver, or send it ourselves
+        missing = [key for key in required if not input_data.get(key)]
+        if missing:
+            print(f"Error: {', '.join(missing)} not found in input", file=sys.stderr)
+            code = failure_exit_code
+        elif not spool_event(event_type, raw) and send(event_type, input_data) is False:
+            code = failure_exit_code
+    except Exception:
+        # Never block the session on an insights failure
+        pass
+    sys.exit(code)
+
@@ -0,0 +1,215 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "requests",
+# ]
+# ///
+
+"""
+Resident insights collector.
+
+Hook entry points spool their events (see event_spool.py) and poke this
+process over a Unix socket (see daemon_client.py). The collector drains the
+spool in enqueue order, packing events into batch requests (see
+event_batcher.py) sent over a single keep-alive connection (see
+insights_client.get_session), and backs off when the backend is slow or
+down. It exits after CLAUDE_INSIGHTS_DAEMON_IDLE seconds (default 600)
+without new events; anything still spooled is picked up by the next
+collector. With CLAUDE_INSIGHTS_WATCH=1 it also keeps session start context
+warm between sessions (see context_watcher.py).
+"""
+
+import fcntl
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import context_watcher
+import event_batcher
+import event_spool
+import insights_client
+from daemon_client import socket_path
+from insights_state import state_path
+
+# Hook modules the collector may dispatch to; each exposes build_payload(input_data, transcript)
+HOOKS = (
+    'session_start',
+    'user_prompt_submit',
+    'session_end',
+    'pre_tool_use',
+    'post_tool_use',
+    'permission_request',
+    'notification',
+    'stop',
+    'subagent_start',
+    'subagent_stop',
+    'pre_compact',
+)
+
+wake = threading.Event()
+last_activity = time.monotonic()
+
+
+class WakeHandler(socketserver.StreamRequestHandler):
+    """Accept a wake-up from a hook that just spooled an event."""
+
+    def handle(self):
+        global last_activity
+        self.rfile.readline()
+        last_activity = time.monotonic()
+        wake.set()
+        self.wfile.write(b'ok')
+
+
+def deliver(hook: str, raw: bytes, session):
+    """
+    Send a spooled event from inside the collector using the shared session.
+    Returns what insights_client.send() does: True once delivered, False if
+    the backend rejected it for good and None if it should be retried.
+    """
+    if hook not in HOOKS:
+        # Unknown events can never be delivered; treat them as done
+        return True
+    return insights_client.send(hook, json.loads(raw), session=session)
+
+
+def drain(conn, session) -> float:
+    """
+    Deliver one batch from the head of the spool.
+    Returns how long to wait before the next drain (0 to continue at once).
+    """
+    global last_activity
+    event_spool.expire(conn)
+    batch = event_spool.peek(conn, event_batcher.BATCH_SIZE)
+    if not batch:
+        return 5.0
+
+    # Head of the queue is backing off; later events wait behind it
+    wait = batch[0]['next_attempt_at'] - time.time()
+    if wait > 0:
+        return wait
+
+    if event_batcher.batching_enabled():
+        run = []
+        for event in batch:
+            if event['hook'] not in HOOKS or event['hook'] in event_batcher.UNBATCHED_HOOKS:
+                break
+            run.append(event)
+
+        if run:
+            # Flush at once if an event that can't ride along is waiting behind the run
+            delay = 0.0 if len(run) < len(batch) else event_batcher.flush_delay(run)
+            if delay > 0:
+                return delay
+
+            ok = event_batcher.send_batch(run, session)
+            if ok:
+                event_spool.ack(conn, [event['id'] for event in run])
+                last_activity = time.monotonic()
+                return 0.0
+            if ok is False:
+                retry_head(conn, batch[0])
+                return 0.0
+            # No batch endpoint, or the batch was refused: fall back to per-event delivery below
+        else:
+            # Send the unbatchable head on its own; the events behind it batch next round
+            batch = batch[:1]
+
+    done = []
+    try:
+        for event in batch:
+            if event['next_attempt_at'] > time.time():
+                break
+
+            try:
+                ok = deliver(event['hook'], event['body'], session)
+            except Exception as e:
+                print(f"Error delivering {event['hook']} event: {e}", file=sys.stderr)
+                ok = None
+
+            if ok is False:
+                # Resending won't help; drop it so the events behind it keep flowing
+                print(f"Dropping {event['hook']} event rejected by the backend", file=sys.stderr)
+            elif not ok:
+                retry_head(conn, event)
+                return 0.0
+
+            done.append(event['id'])
+            last_activity = time.monotonic()
+    finally:
+        event_spool.ack(conn, done)
+    return 0.0
+
+
+def retry_head(conn, event) -> None:
+    """Back off the failed head event; the next drain waits out its delay."""
+    if not event_spool.retry_later(conn, event['id'], event['attempts']):
+        print(f"Dropping {event['hook']} event after {event_spool.MAX_ATTEMPTS} attempts", file=sys.stderr)
+
+
+def drainer(session) -> None:
+    """Keep draining the spool, sleeping until woken or the next retry is due."""
+    conn = event_spool.connect()
+    while True:
+        wake.clear()
+        try:
+            wait = drain(conn, session)
+        except Exception as e:
+            print(f"Error draining spool: {e}", file=sys.stderr)
+            wait = event_spool.BACKOFF_BASE
+        if wait > 0:
+            wake.wait(wait)
+
+
+def idle_watcher(server: socketserver.BaseServer, idle_timeout: float) -> None:
+    """Stop the server once no new events arrived for idle_timeout seconds."""
+    while True:
+        time.sleep(min(idle_timeout, 5))
+        if time.monotonic() - last_activity >= idle_timeout:
+            server.shutdown()
+            return
+
+
+def main():
+    idle_timeout = float(os.environ.get('CLAUDE_INSIGHTS_DAEMON_IDLE', '600'))
+
+    # Only one collector per state dir; a second one started in a race just exits
+    lock_file = open(state_path('collector.lock'), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        sys.exit(0)
+
+    path = socket_path()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    server = socketserver.ThreadingUnixStreamServer(path, WakeHandler)
+    os.chmod(path, 0o600)
+
+    if context_watcher.watch_enabled():
+        # Keep session start context warm so build_payload can skip the filesystem
+        import session_start
+        context_watcher.start(session_start.collect_context)
+
+    session = insights_client.get_session()
+    threading.Thread(target=drainer, args=(session,), daemon=True).start()
+    threading.Thread(target=idle_watcher, args=(server, idle_timeout), daemon=True).start()
+
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        os.unlink(path)
+        server.server_close()
+        session.close()
+        lock_file.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Persistent local state shared by the insights hooks.
+
+Hooks run as short-lived processes, so anything that must survive between
+events (transcript cursors, caches, queues) lives under a single state
+directory. Override it with CLAUDE_INSIGHTS_STATE_DIR.
+"""
+
+import json
+import os
+import re
+import tempfile
+
+
+def state_dir() -> str:
+    """Return the hook state directory, creating it if needed."""
+    path = os.environ.get('CLAUDE_INSIGHTS_STATE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.claude', 'insights-local'
+    )
+    # Owner-only: the spool and caches hold prompts and tool input and output
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def state_path(*parts: str) -> str:
+    """Return a path inside the state directory, creating parent folders."""
+    path = os.path.join(state_dir(), *parts)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    return path
+
+
+def safe_name(value: str) -> str:
+    """Turn an arbitrary id (session id, path hash) into a safe file name."""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(value)) or 'unknown'
+
+
+def load_json(path: str, default=None):
+    """Load a JSON state file, returning default if missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data) -> None:
+    """Atomically write a JSON state file so concurrent hooks never see a partial write."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_manifest(path: str) -> set:
+    """Load the hashes in an append-only manifest, one per line; empty if missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return set(f.read().split())
+    except (OSError, ValueError):
+        return set()
+
+
+def append_manifest(path: str, hashes) -> None:
+    """Append the hashes not in the manifest yet, each once."""
+    known = load_manifest(path)
+    new = list(dict.fromkeys(digest for digest in hashes if digest not in known))
+    if not new:
+        return
+    # A single O_APPEND write keeps concurrent hooks from clobbering each other
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, ''.join(f'{digest}\n' for digest in new).encode('ascii'))
+    finally:
+        os.close(fd)
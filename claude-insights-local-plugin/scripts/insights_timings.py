@@ -0,0 +1,119 @@
+"""
+Timing spans for session start.
+
+insights_client.send() starts a Timings for session start events; the
+payload build records a span per collector (see session_start.py) and send()
+adds the payload build and the HTTP request. The collector spans go to the
+backend in the payload's `timings` field. Once the request is done:
+
+- CLAUDE_INSIGHTS_METRICS=1 appends the whole breakdown as one JSON line to
+  metrics.jsonl in the state dir;
+- if the total exceeds CLAUDE_INSIGHTS_SLOW_START_MS (default 2000), a
+  slow-start warning with the breakdown is printed to stderr.
+
+Spans are kept per thread, so a collection running in the background (see
+context_watcher.py) never lands in another event's timings.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from insights_state import state_path
+
+# Events whose send is timed and reported
+TIMED_EVENTS = ('session_start',)
+
+_local = threading.local()
+
+
+class Timings:
+    """Named durations, in milliseconds, measured while handling one event."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.spans[name] = round(seconds * 1000, 2)
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+
+def start_timings() -> Timings:
+    """Start timing the event handled by this thread."""
+    _local.timings = Timings()
+    return _local.timings
+
+
+def current_timings():
+    """Return the Timings of the event this thread is handling, if it is timed."""
+    return getattr(_local, 'timings', None)
+
+
+def stop_timings() -> None:
+    _local.timings = None
+
+
+@contextmanager
+def span(name: str):
+    """Record a span in the current thread's timings, if any."""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    with timings.span(name):
+        yield
+
+
+def metrics_enabled() -> bool:
+    return os.environ.get('CLAUDE_INSIGHTS_METRICS', '0') == '1'
+
+
+def slow_start_budget_ms() -> float:
+    """Return the total time above which a slow start is reported."""
+    try:
+        return float(os.environ.get('CLAUDE_INSIGHTS_SLOW_START_MS', '2000'))
+    except ValueError:
+        return 2000.0
+
+
+def report(event_type: str, timings: Timings, ok) -> None:
+    """Log the breakdown of a timed event and warn if it was slow."""
+    total = timings.total_ms()
+    slow = total > slow_start_budget_ms()
+
+    if slow:
+        breakdown = ', '.join(f'{name} {ms:.0f}ms' for name, ms in sorted(timings.spans.items(), key=lambda item: -item[1]))
+        print(f"Slow {event_type}: {total:.0f}ms (budget {slow_start_budget_ms():.0f}ms): {breakdown}", file=sys.stderr)
+
+    if metrics_enabled():
+        line = json.dumps({
+            'ts': time.time(),
+            'event': event_type,
+            'ok': ok,
+            'slow': slow,
+            'totalMs': total,
+            'spans': timings.spans,
+        })
+        try:
+            # A single O_APPEND write keeps concurrent hooks from interleaving lines
+            fd = os.open(state_path('metrics.jsonl'), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, (line + '\n').encode('utf-8'))
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
@@ -1,382 +1,96 @@
 #!/usr/bin/env python3
-import json
-import sys
-import urllib.request
-import urllib.error
-import os
-import re
-from pathlib import Path
-
-
-def parse_command_file(file_path):
-    """Parse a command markdown file and extract metadata and content."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract frontmatter if present
-        frontmatter = {}
-        command_content = content
-
-        if content.startswith('---'):
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                # Parse frontmatter
-                frontmatter_text = parts[1].strip()
-                for line in frontmatter_text.split('\n'):
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        frontmatter[key.strip()] = value.strip()
-
-                # Get content after frontmatter
-                command_content = parts[2].strip()
-
-        return {
-            'metadata': frontmatter,
-            'content': command_content
-        }
-    except Exception as e:
-        print(f"Error parsing command file {file_path}: {e}", file=sys.stderr)
-        return None
-
-
-def collect_project_commands(cwd):
-    """Collect all slash commands from .claude/commands/ directory."""
-    if not cwd:
-        return []
-
-    commands_dir = Path(cwd) / '.claude' / 'commands'
-    if not commands_dir.exists():
-        return []
-
-    commands = []
-
-    # Recursively find all .md files in commands directory
-    for md_file in commands_dir.rglob('*.md'):
-        # Get command name and namespace from file path relative to commands dir
-        relative_path = md_file.relative_to(commands_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested commands)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Command is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Command name is just the filename without extension
-        command_name = relative_path.stem
-
-        # Parse the command file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            commands.append({
-                'name': command_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return commands
-
-
-def collect_project_agents(cwd):
-    """Collect all agents from .claude/agents/ directory."""
-    if not cwd:
-        return []
-
-    agents_dir = Path(cwd) / '.claude' / 'agents'
-    if not agents_dir.exists():
-        return []
-
-    agents = []
-
-    # Recursively find all .md files in agents directory
-    for md_file in agents_dir.rglob('*.md'):
-        # Get agent name and namespace from file path relative to agents dir
-        relative_path = md_file.relative_to(agents_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested agents)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Agent is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Agent name is just the filename without extension
-        agent_name = relative_path.stem
-
-        # Parse the agent file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            agents.append({
-                'name': agent_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return agents
-
-
-def collect_user_commands():
-    """Collect all user-level slash commands from ~/.claude/commands/ directory."""
-    home_dir = os.path.expanduser('~')
-    commands_dir = Path(home_dir) / '.claude' / 'commands'
-
-    if not commands_dir.exists():
-        return []
-
-    commands = []
-
-    # Recursively find all .md files in commands directory
-    for md_file in commands_dir.rglob('*.md'):
-        # Get command name and namespace from file path relative to commands dir
-        relative_path = md_file.relative_to(commands_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested commands)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Command is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Command name is just the filename without extension
-        command_name = relative_path.stem
-
-        # Parse the command file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            commands.append({
-                'name': command_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return commands
-
-
-def collect_user_agents():
-    """Collect all user-level agents from ~/.claude/agents/ directory."""
-    home_dir = os.path.expanduser('~')
-    agents_dir = Path(home_dir) / '.claude' / 'agents'
-
-    if not agents_dir.exists():
-        return []
-
-    agents = []
-
-    # Recursively find all .md files in agents directory
-    for md_file in agents_dir.rglob('*.md'):
-        # Get agent name and namespace from file path relative to agents dir
-        relative_path = md_file.relative_to(agents_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested agents)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Agent is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Agent name is just the filename without extension
-        agent_name = relative_path.stem
-
-        # Parse the agent file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            agents.append({
-                'name': agent_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return agents
-
-
-def read_transcript(input_data: dict) -> str:
-    """Read transcript file content."""
-    transcript_path = input_data.get('transcript_path') or input_data.get('transcript_file')
-    if transcript_path and os.path.exists(transcript_path):
-        try:
-            with open(transcript_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception:
-            pass
-    return ""
+import context_watcher
+from content_store import dedup_content, dedup_enabled
+from git_remote import get_origin_url
+from insights_client import run_hook
+from insights_state import state_path
+from insights_timings import current_timings, span
+from session_context import SessionContext, hook_input, leveled
 
 
 def get_git_remote_origin(cwd):
-    """Get the git remote origin URL for the project."""
-    if not cwd:
-        return ''
-
-    try:
-        import subprocess
-        result = subprocess.run(
-            ['git', 'remote', 'get-url', 'origin'],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-        return ''
-    except Exception:
-        return ''
-
-
-def collect_mcp_servers(cwd):
-    """Collect MCP server names from .mcp.json file at project root."""
-    if not cwd:
-        return []
-
-    mcp_json_path = Path(cwd) / '.mcp.json'
-    if not mcp_json_path.exists():
-        return []
-
-    try:
-        with open(mcp_json_path, 'r', encoding='utf-8') as f:
-            mcp_config = json.load(f)
-
-        # Extract server names from mcpServers object
-        mcp_servers = mcp_config.get('mcpServers', {})
-        return list(mcp_servers.keys())
-    except json.JSONDecodeError as e:
-        print(f"Error parsing .mcp.json: {e}", file=sys.stderr)
-        return []
-    except Exception as e:
-        print(f"Error reading .mcp.json: {e}", file=sys.stderr)
-        return []
+    """Get the git remote origin URL for the project (read in-process, see git_remote.py)."""
+    return get_origin_url(cwd)
+
+
+def scan_cache_file():
+    """Parsed command and agent files are kept in the state dir (see scan_cache.py)."""
+    return state_path('session-start', 'scan-cache.json')
+
+
+# Payload fields and where they come from (see session_context.py); the
+# transcript offset is added at send time
+SCHEMA = {
+    'sessionId': hook_input('session_id'),
+    'projectPath': hook_input('cwd', ''),
+    'commands': leveled('command'),
+    'subagents': leveled('agent'),
+    'memory': 'memory',
+    'readme': 'readme',
+    'source': hook_input('source'),
+    'gitRepository': 'gitRepository',
+    'mcpServers': 'mcpServers',
+}
+
+CONTEXT = SessionContext(
+    SCHEMA,
+    collectors={'gitRepository': (get_git_remote_origin, '')},
+    cache_file=scan_cache_file,
+)
+
+
+def collect_context(cwd):
+    """
+    Run every collector for a project concurrently under the deadline.
+    Returns the collected fields and the names of collectors that missed it.
+    """
+    return CONTEXT.collect(cwd, current_timings())
+
+
+def build_payload(input_data: dict, transcript: dict) -> dict:
+    """
+    Collect project context for the session start payload.
+    Runs at send time; the transcript itself is attached by encode_request().
+
+    Collection, deadline, `partial` and byte budgets are session_context.py's;
+    with the watcher running (see context_watcher.py) an unchanged project is
+    served from its last collection instead. With
+    CLAUDE_INSIGHTS_CONTENT_DEDUP=1 text bodies are sent by hash (see
+    content_store.py). When the send is timed, per-collector spans are sent
+    in `timings` (see insights_timings.py).
+    """
+    cwd = input_data.get('cwd', '')
+
+    watcher = context_watcher.active()
+    collected, token = None, None
+    if watcher:
+        with span('snapshot'):
+            collected, token = watcher.lookup(cwd)
+    if collected is not None:
+        late = []
+    else:
+        with span('collect'):
+            collected, late = collect_context(cwd)
+        if watcher and not late:
+            watcher.store(cwd, token, collected)
+
+    # Entries are copied by the schema, since budgets and dedup edit them and
+    # snapshots are reused; file content is held to the total budget
+    payload = CONTEXT.build_payload(input_data, collected, late)
+    payload['transcriptOffset'] = transcript['offset']
+    timings = current_timings()
+    if timings is not None:
+        # Where the collection time went, for the backend; the HTTP call is logged locally
+        payload['timings'] = dict(timings.spans)
+    if dedup_enabled():
+        # Send bodies by hash; insights_client acknowledges them once the backend accepted the payload
+        transcript['content'] = dedup_content(payload)
+    return payload
 
 
 def main():
-    try:
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-
-        # Extract session information
-        session_id = input_data.get('session_id', 'unknown')
-        session_source = input_data.get('source', 'unknown')
-        transcript_path = input_data.get('transcript_path', '')
-        cwd = input_data.get('cwd', '')
-
-        # Extract project name from cwd
-        project_name = os.path.basename(cwd) if cwd else 'unknown'
-
-        # Read AGENTS.md first, fallback to CLAUDE.md from project directory
-        project_memory = ''
-        if cwd:
-            # Try AGENTS.md first
-            agents_md_path = os.path.join(cwd, 'AGENTS.md')
-            claude_md_path = os.path.join(cwd, 'CLAUDE.md')
-
-            try:
-                with open(agents_md_path, 'r', encoding='utf-8') as f:
-                    project_memory = f.read()
-            except FileNotFoundError:
-                # AGENTS.md doesn't exist, try CLAUDE.md
-                try:
-                    with open(claude_md_path, 'r', encoding='utf-8') as f:
-                        project_memory = f.read()
-                except FileNotFoundError:
-                    # Neither file exists, leave empty
-                    pass
-                except Exception as e:
-                    # Log but don't fail if we can't read CLAUDE.md
-                    print(f"Could not read CLAUDE.md: {e}", file=sys.stderr)
-            except Exception as e:
-                # Log but don't fail if we can't read AGENTS.md
-                print(f"Could not read AGENTS.md: {e}", file=sys.stderr)
-
-        # Read README.md from project directory
-        project_readme = ''
-        if cwd:
-            readme_path = os.path.join(cwd, 'README.md')
-            try:
-                with open(readme_path, 'r', encoding='utf-8') as f:
-                    project_readme = f.read()
-            except FileNotFoundError:
-                # README.md doesn't exist, leave empty
-                pass
-            except Exception as e:
-                # Log but don't fail if we can't read README.md
-                print(f"Could not read README.md: {e}", file=sys.stderr)
-
-        # Collect project commands and agents
-        project_commands = collect_project_commands(cwd)
-        project_agents = collect_project_agents(cwd)
-
-        # Collect user-level commands and agents
-        user_commands = collect_user_commands()
-        user_agents = collect_user_agents()
-
-        # Combine commands with level information
-        commands = [
-            {**cmd, 'level': 'project'} for cmd in project_commands
-        ] + [
-            {**cmd, 'level': 'user'} for cmd in user_commands
-        ]
-
-        # Combine agents with level information
-        subagents = [
-            {**agent, 'level': 'project'} for agent in project_agents
-        ] + [
-            {**agent, 'level': 'user'} for agent in user_agents
-        ]
-
-        # Get git remote origin URL
-        git_repository = get_git_remote_origin(cwd)
-
-        # Collect MCP server names
-        mcp_servers = collect_mcp_servers(cwd)
-
-        # Prepare payload for API
-        payload = {
-            'sessionId': session_id,
-            'projectPath': cwd,
-            'commands': commands,
-            'subagents': subagents,
-            'memory': project_memory,
-            'readme': project_readme,
-            'source': session_source,
-            'gitRepository': git_repository,
-            'transcript': read_transcript(input_data),
-            'mcpServers': mcp_servers,
-        }
-
-        # Make POST request to localhost:3000/api/sessions
-        url = 'http://localhost:3001/api/hooks/session-start'
-        headers = {
-            'Content-Type': 'application/json'
-        }
-
-        # Add Authorization header if API key is set
-        api_key = os.environ.get('CLAUDE_INSIGHTS_API_KEY', '')
-        if api_key:
-            headers['x-api-key'] = api_key
-
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            response_data = response.read()
-            # Optionally log success
-            # print(f"Session {session_id} logged successfully", file=sys.stderr)
-
-        # Success
-        sys.exit(0)
-
-    except json.JSONDecodeError as e:
-        # Handle JSON decode errors gracefully
-        print(f"JSON decode error: {e}", file=sys.stderr)
-        sys.exit(0)
-    except urllib.error.URLError as e:
-        # Handle network errors gracefully (API might not be running)
-        print(f"Failed to connect to API: {e}", file=sys.stderr)
-        sys.exit(0)
-    except Exception as e:
-        # Handle any other errors gracefully
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(0)
+    run_hook('session_start', required=())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
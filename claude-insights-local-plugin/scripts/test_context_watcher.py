@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Unit tests for context_watcher.py inotify-backed session start snapshots."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import context_watcher
+
+try:
+    context_watcher.Inotify().close()
+    HAVE_INOTIFY = True
+except (OSError, AttributeError):
+    HAVE_INOTIFY = False
+
+
+@unittest.skipUnless(HAVE_INOTIFY, 'inotify not available')
+class TestContextWatcher(unittest.TestCase):
+    """Test cases for snapshot reuse and invalidation."""
+
+    def setUp(self):
+        """Set up a temporary project and home."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.tmp.name, 'project')
+        home = os.path.join(self.tmp.name, 'home')
+        os.makedirs(os.path.join(self.project, '.claude', 'commands'))
+        os.makedirs(os.path.join(home, '.claude', 'agents'))
+        self.env = patch.dict(os.environ, {'HOME': home})
+        self.env.start()
+        self.write('CLAUDE.md', '# Memory')
+        self.watcher = context_watcher.ContextWatcher(self.collect)
+
+    def tearDown(self):
+        self.watcher.inotify.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def write(self, name, content, base=None):
+        path = os.path.join(base or self.project, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def collect(self, cwd):
+        with open(os.path.join(cwd, 'CLAUDE.md'), encoding='utf-8') as f:
+            return {'memory': f.read()}, []
+
+    def warm(self):
+        collected, token = self.watcher.lookup(self.project)
+        self.assertIsNone(collected)
+        self.watcher.store(self.project, token, self.collect(self.project)[0])
+
+    def test_unchanged_project_is_served_from_snapshot(self):
+        """Test that a second lookup returns the stored context."""
+        self.warm()
+        self.assertEqual(self.watcher.lookup(self.project)[0], {'memory': '# Memory'})
+
+    def test_changes_invalidate_the_snapshot(self):
+        """Test that edits to memory, command trees and user agents are noticed at once."""
+        for name, base in [
+            ('CLAUDE.md', None),
+            (os.path.join('.claude', 'commands', 'git', 'commit.md'), None),
+            (os.path.join('.claude', 'agents', 'reviewer.md'), os.environ['HOME']),
+        ]:
+            self.warm()
+            self.write(name, 'changed', base)
+            self.assertIsNone(self.watcher.lookup(self.project)[0], name)
+
+    def test_unrelated_files_keep_the_snapshot(self):
+        """Test that files session start doesn't read don't invalidate it."""
+        self.warm()
+        self.write('main.py', 'print()')
+        self.assertEqual(self.watcher.lookup(self.project)[0], {'memory': '# Memory'})
+
+    def test_change_during_collection_is_not_stored(self):
+        """Test that a collection racing with an edit is not served later."""
+        _, token = self.watcher.lookup(self.project)
+        collected = self.collect(self.project)[0]
+        self.write('README.md', 'new readme')
+        self.watcher.store(self.project, token, collected)
+        self.assertIsNone(self.watcher.lookup(self.project)[0])
+
+    def test_background_rebuild_prewarms_after_a_change(self):
+        """Test that the watcher thread recollects a changed project on its own."""
+        self.warm()
+        warmed = self.watcher.projects[self.project]['generation']
+        threading.Thread(target=self.watcher.run, daemon=True).start()
+        self.write('CLAUDE.md', '# Updated')
+
+        deadline = time.monotonic() + 5
+        collected = None
+        while time.monotonic() < deadline:
+            with self.watcher.lock:
+                project = self.watcher.projects[self.project]
+                snapshot = project['snapshot']
+                if snapshot and snapshot[0] == project['generation'] > warmed:
+                    collected = snapshot[1]
+                    break
+            time.sleep(0.05)
+        self.assertEqual(collected, {'memory': '# Updated'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Unit tests for daemon_client.py event hand-off to the collector."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import daemon_client
+import event_spool
+
+
+class TestSpoolEvent(unittest.TestCase):
+    """Test cases for spooling an event or sending it in-process."""
+
+    def setUp(self):
+        """Point the spool at a temporary state dir."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': self.tmp.name, 'CLAUDE_INSIGHTS_DAEMON': '1'})
+        self.env.start()
+        self.conn = event_spool.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def queued(self):
+        return [event['body'] for event in event_spool.peek(self.conn, 10)]
+
+    @patch.object(daemon_client, 'start_daemon')
+    @patch.object(daemon_client, 'wake_daemon')
+    def test_running_collector_takes_the_event(self, wake, start):
+        """Test that the event stays spooled when the collector answers."""
+        self.assertTrue(daemon_client.spool_event('stop', b'{}'))
+
+        start.assert_not_called()
+        self.assertEqual(self.queued(), [b'{}'])
+
+    @patch.object(daemon_client, 'START_POLL_INTERVAL', 0.01)
+    @patch.object(daemon_client, 'start_daemon')
+    @patch.object(daemon_client, 'wake_daemon', side_effect=[OSError('not running'), OSError('starting'), None])
+    def test_started_collector_takes_the_event(self, wake, start):
+        """Test that a hook that starts the collector waits for it to answer."""
+        self.assertTrue(daemon_client.spool_event('stop', b'{}'))
+
+        start.assert_called_once()
+        self.assertEqual(wake.call_count, 3)
+        self.assertEqual(self.queued(), [b'{}'])
+
+    @patch.object(daemon_client, 'START_TIMEOUT', 0.05)
+    @patch.object(daemon_client, 'START_POLL_INTERVAL', 0.01)
+    @patch.object(daemon_client, 'wake_daemon', side_effect=OSError('not running'))
+    def test_unreachable_collector_falls_back_to_sending(self, wake):
+        """Test that the event is taken back for an in-process send if the collector never answers."""
+        for error in (None, OSError('cannot spawn')):
+            with self.subTest(error=error), patch.object(daemon_client, 'start_daemon', side_effect=error):
+                self.assertFalse(daemon_client.spool_event('stop', b'{}'))
+                self.assertEqual(self.queued(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
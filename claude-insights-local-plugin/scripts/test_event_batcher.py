@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Unit tests for event_batcher.py batched event delivery."""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import event_batcher
+from transcript_cursor import cursor_path
+
+
+def spool_row(hook, input_data, created_at=None, attempts=0):
+    """Build a dict shaped like an event_spool row."""
+    return {
+        'id': 1,
+        'hook': hook,
+        'body': json.dumps(input_data).encode('utf-8'),
+        'created_at': time.time() if created_at is None else created_at,
+        'attempts': attempts,
+        'next_attempt_at': 0,
+    }
+
+
+class TestEventBatcher(unittest.TestCase):
+    """Test cases for packing spooled events into batch requests."""
+
+    def setUp(self):
+        """Set up a temporary state dir and transcript."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state')})
+        self.env.start()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        with open(self.transcript_path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "user"}\n')
+        self.input_data = {'session_id': 'test-session-123', 'transcript_path': self.transcript_path}
+        event_batcher.batch_supported = True
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_flush_delay_waits_for_window(self):
+        """Test that a young, small run keeps collecting."""
+        run = [spool_row('pre_tool_use', self.input_data)]
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_BATCH_WINDOW': '5'}):
+            self.assertGreater(event_batcher.flush_delay(run), 0)
+
+    def test_flush_delay_flushes_old_run(self):
+        """Test that a run whose oldest event is past the window flushes now."""
+        run = [spool_row('pre_tool_use', self.input_data, created_at=time.time() - 10)]
+
+        self.assertEqual(event_batcher.flush_delay(run), 0)
+
+    def test_flush_delay_flushes_on_session_end(self):
+        """Test that a session end flushes the run immediately."""
+        run = [spool_row('stop', self.input_data), spool_row('session_end', self.input_data)]
+
+        self.assertEqual(event_batcher.flush_delay(run), 0)
+
+    def test_flush_delay_flushes_on_size(self):
+        """Test that a run over the byte threshold flushes immediately."""
+        run = [spool_row('pre_tool_use', self.input_data)]
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_BATCH_BYTES': '10'}):
+            self.assertEqual(event_batcher.flush_delay(run), 0)
+
+    def test_build_records_keeps_order_and_sends_transcript_once(self):
+        """Test that records keep enqueue order and only the first carries new lines."""
+        run = [spool_row('pre_tool_use', self.input_data), spool_row('post_tool_use', self.input_data)]
+
+        lines, deltas = event_batcher.build_records(run)
+        records = [json.loads(b''.join(line)) for line in lines]
+
+        self.assertEqual([record['event'] for record in records], ['pre-tool-use', 'post-tool-use'])
+        self.assertEqual(records[0]['sessionId'], 'test-session-123')
+        self.assertEqual(records[0]['payload']['transcript'], '{"type": "user"}\n')
+        self.assertEqual(records[1]['payload']['transcript'], '')
+        self.assertEqual(records[1]['payload']['transcriptOffset'], len('{"type": "user"}\n'))
+        self.assertEqual(len(deltas), 1)
+
+    def test_build_records_multipart_appends_raw_lines(self):
+        """Test that multipart encoding puts raw transcript lines after their record."""
+        run = [spool_row('stop', self.input_data)]
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING': 'multipart'}):
+            lines, deltas = event_batcher.build_records(run)
+
+        record_line, raw_line = b''.join(lines[0]).splitlines(keepends=True)
+        record = json.loads(record_line)
+        self.assertEqual(record['transcriptBytes'], len(raw_line))
+        self.assertNotIn('transcript', record['payload'])
+        self.assertEqual(raw_line, b'{"type": "user"}\n')
+
+    def test_send_batch_posts_gzip_ndjson(self):
+        """Test that a batch is one gzip-compressed NDJSON request."""
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=200)
+        run = [spool_row('stop', self.input_data)]
+
+        self.assertTrue(event_batcher.send_batch(run, session))
+
+        args, kwargs = session.post.call_args
+        self.assertEqual(args[0], event_batcher.BATCH_ENDPOINT)
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        record = json.loads(gzip.decompress(kwargs['data']).decode('utf-8'))
+        self.assertEqual(record['event'], 'stop')
+
+    def test_accepted_session_end_removes_the_cursor(self):
+        """Test that a batch holding a session end leaves no cursor for that session."""
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=200)
+
+        self.assertTrue(event_batcher.send_batch([spool_row('stop', self.input_data)], session))
+        self.assertTrue(os.path.exists(cursor_path(self.input_data['session_id'])))
+        self.assertTrue(event_batcher.send_batch([spool_row('session_end', self.input_data)], session))
+        self.assertFalse(os.path.exists(cursor_path(self.input_data['session_id'])))
+
+    def test_send_batch_failures(self):
+        """Test that a refused batch is sent per event and transient failures are retried, batching stays on."""
+        session = MagicMock()
+        for status, expected in ((400, None), (422, None), (408, False), (429, False), (502, False)):
+            with self.subTest(status=status), patch('sys.stderr'):
+                session.post.return_value = MagicMock(status_code=status)
+                self.assertIs(event_batcher.send_batch([spool_row('stop', self.input_data)], session), expected)
+                self.assertTrue(event_batcher.batching_enabled())
+
+    def test_send_batch_without_endpoint_disables_batching(self):
+        """Test that a 404 from the batch endpoint falls back to per-event delivery."""
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=404)
+
+        result = event_batcher.send_batch([spool_row('stop', self.input_data)], session)
+
+        self.assertIsNone(result)
+        self.assertFalse(event_batcher.batching_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
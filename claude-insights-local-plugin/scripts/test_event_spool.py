@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Unit tests for event_spool.py durable hook event queue."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import event_spool
+
+
+class TestEventSpool(unittest.TestCase):
+    """Test cases for the SQLite-backed spool."""
+
+    def setUp(self):
+        """Point the spool at a temporary state dir."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': self.tmp.name})
+        self.env.start()
+        self.conn = event_spool.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_events_are_returned_in_enqueue_order(self):
+        """Test that peek returns the oldest events first."""
+        event_spool.enqueue('pre_tool_use', b'{"n": 1}')
+        event_spool.enqueue('post_tool_use', b'{"n": 2}')
+
+        batch = event_spool.peek(self.conn, 10)
+
+        self.assertEqual([(event['hook'], event['body']) for event in batch], [
+            ('pre_tool_use', b'{"n": 1}'),
+            ('post_tool_use', b'{"n": 2}'),
+        ])
+
+    def test_spool_is_private(self):
+        """Test that the state dir and the spool database files are only accessible by their owner."""
+        state = os.path.join(self.tmp.name, 'state')
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': state}):
+            conn = event_spool.connect()
+            try:
+                event_spool.enqueue('stop', b'{}')
+                self.assertEqual(os.stat(state).st_mode & 0o777, 0o700)
+                self.assertEqual(sorted(os.listdir(state)), ['spool.db', 'spool.db-shm', 'spool.db-wal'])
+                for name in os.listdir(state):
+                    self.assertEqual(os.stat(os.path.join(state, name)).st_mode & 0o777, 0o600, name)
+            finally:
+                conn.close()
+
+    def test_withdraw_takes_an_event_back(self):
+        """Test that a withdrawn event leaves the spool, and withdrawing it twice says so."""
+        event_id = event_spool.enqueue('stop', b'{}')
+
+        self.assertTrue(event_spool.withdraw(event_id))
+        self.assertFalse(event_spool.withdraw(event_id))
+        self.assertEqual(event_spool.peek(self.conn, 10), [])
+
+    def test_ack_removes_events(self):
+        """Test that acknowledged events leave the spool."""
+        event_spool.enqueue('stop', b'{}')
+        event_spool.enqueue('stop', b'{}')
+        first_id = event_spool.peek(self.conn, 1)[0]['id']
+
+        event_spool.ack(self.conn, [first_id])
+
+        self.assertEqual(len(event_spool.peek(self.conn, 10)), 1)
+
+    def test_retry_later_backs_off_exponentially(self):
+        """Test that each failure pushes the next attempt further out."""
+        event_spool.enqueue('stop', b'{}')
+        event_id = event_spool.peek(self.conn, 1)[0]['id']
+
+        event_spool.retry_later(self.conn, event_id, 0)
+        first = event_spool.peek(self.conn, 1)[0]
+        event_spool.retry_later(self.conn, event_id, first['attempts'])
+        second = event_spool.peek(self.conn, 1)[0]
+
+        self.assertEqual(second['attempts'], 2)
+        self.assertGreater(first['next_attempt_at'], time.time())
+        self.assertGreater(second['next_attempt_at'], first['next_attempt_at'])
+
+    def test_retry_later_drops_after_max_attempts(self):
+        """Test that an event is dropped once it runs out of attempts."""
+        event_spool.enqueue('stop', b'{}')
+        event_id = event_spool.peek(self.conn, 1)[0]['id']
+
+        kept = event_spool.retry_later(self.conn, event_id, event_spool.MAX_ATTEMPTS - 1)
+
+        self.assertFalse(kept)
+        self.assertEqual(event_spool.peek(self.conn, 10), [])
+
+    def test_expire_drops_old_events(self):
+        """Test that events older than the TTL are discarded."""
+        event_spool.enqueue('stop', b'{}')
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_SPOOL_TTL': '-1'}):
+            dropped = event_spool.expire(self.conn)
+
+        self.assertEqual(dropped, 1)
+        self.assertEqual(event_spool.peek(self.conn, 10), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
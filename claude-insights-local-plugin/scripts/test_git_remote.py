@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Unit tests for git_remote.py in-process origin URL lookup."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import git_remote
+
+
+class TestGitRemote(unittest.TestCase):
+    """Test cases for reading remote.origin.url without forking git."""
+
+    def setUp(self):
+        """Set up a temporary home, state dir and repository."""
+        self.tmp = tempfile.TemporaryDirectory()
+        home = os.path.join(self.tmp.name, 'home')
+        os.makedirs(home)
+        self.env = patch.dict(os.environ, {
+            'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state'),
+            'HOME': home,
+            'XDG_CONFIG_HOME': os.path.join(home, '.config'),
+        })
+        self.env.start()
+        for name in git_remote.GIT_ENV_OVERRIDES:
+            os.environ.pop(name, None)
+
+        self.repo = os.path.join(self.tmp.name, 'repo')
+        os.makedirs(os.path.join(self.repo, '.git'))
+        os.makedirs(os.path.join(self.repo, 'src', 'pkg'))
+        self.write_config(
+            '[core]\n\tbare = false\n'
+            '[remote "upstream"]\n\turl = git@example.com:upstream/repo.git\n'
+            '[remote "origin"]\n'
+            '\turl = "git@example.com:org/repo.git" # the fork\n'
+            '\tfetch = +refs/heads/*:refs/remotes/origin/*\n'
+        )
+        # Any fork of git fails the test
+        self.subprocess = patch.object(git_remote, 'git_remote_origin_subprocess',
+                                       side_effect=AssertionError('forked git'))
+        self.subprocess.start()
+
+    def tearDown(self):
+        self.subprocess.stop()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def write_config(self, content, path=None):
+        with open(path or os.path.join(self.repo, '.git', 'config'), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_reads_origin_from_subdirectory(self):
+        """Test that the repository is found from a nested directory."""
+        self.assertEqual(git_remote.get_origin_url(os.path.join(self.repo, 'src', 'pkg')),
+                         'git@example.com:org/repo.git')
+
+    def test_outside_repository_returns_empty(self):
+        """Test that a directory with no repository above it has no origin."""
+        with patch.object(git_remote, 'find_git_dirs', return_value=None):
+            self.assertEqual(git_remote.get_origin_url(self.tmp.name), '')
+
+    def test_worktree_reads_common_config(self):
+        """Test that a linked worktree resolves its gitdir file and commondir."""
+        worktree_git_dir = os.path.join(self.repo, '.git', 'worktrees', 'feature')
+        os.makedirs(worktree_git_dir)
+        with open(os.path.join(worktree_git_dir, 'commondir'), 'w', encoding='utf-8') as f:
+            f.write('../..\n')
+        worktree = os.path.join(self.tmp.name, 'feature')
+        os.makedirs(worktree)
+        with open(os.path.join(worktree, '.git'), 'w', encoding='utf-8') as f:
+            f.write(f'gitdir: {worktree_git_dir}\n')
+
+        self.assertEqual(git_remote.get_origin_url(worktree), 'git@example.com:org/repo.git')
+
+    def test_result_is_cached_until_config_changes(self):
+        """Test that an unchanged config isn't parsed again."""
+        git_remote.get_origin_url(self.repo)
+        with patch.object(git_remote, 'read_config', side_effect=AssertionError('parsed again')):
+            self.assertEqual(git_remote.get_origin_url(self.repo), 'git@example.com:org/repo.git')
+
+        self.write_config('[remote "origin"]\n\turl = https://example.com/org/renamed.git\n')
+        self.assertEqual(git_remote.get_origin_url(self.repo), 'https://example.com/org/renamed.git')
+
+    def test_includes_and_rewrites_fall_back_to_git(self):
+        """Test that configs this reader doesn't model are left to git."""
+        self.subprocess.stop()
+        for config in ('[include]\n\tpath = extra.config\n',
+                       '[url "git@example.com:"]\n\tinsteadOf = https://example.com/\n'):
+            self.write_config(config + '[remote "origin"]\n\turl = https://example.com/org/repo.git\n')
+            with patch.object(git_remote, 'git_remote_origin_subprocess', return_value='from-git') as fallback:
+                self.assertEqual(git_remote.get_origin_url(self.repo), 'from-git')
+            fallback.assert_called_once_with(self.repo)
+        self.subprocess.start()
+
+
+if __name__ == '__main__':
+    unittest.main()
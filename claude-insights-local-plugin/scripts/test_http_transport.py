@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Unit tests for http_transport.py stdlib keep-alive session."""
+
+import http.server
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import http_transport
+
+
+class RecordingHandler(http.server.BaseHTTPRequestHandler):
+    """Echo each request's body size and client port back as JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    paths = []
+
+    def do_POST(self):
+        self.paths.append(self.path)
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            body = b''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if self.path == '/slow':
+            time.sleep(0.5)
+        out = json.dumps({'length': len(body), 'port': self.client_address[1]}).encode('utf-8')
+        self.send_response(200 if self.path == '/ok' else 404)
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpSession(unittest.TestCase):
+    """Test cases for the http.client based session."""
+
+    def setUp(self):
+        """Start a local HTTP/1.1 server."""
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.session = http_transport.HttpSession()
+        RecordingHandler.paths = []
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_kept_alive(self):
+        """Test that consecutive requests reuse one connection."""
+        first = self.session.post(f'{self.url}/ok', data=b'{}', timeout=5).json()
+        second = self.session.post(f'{self.url}/ok', data=b'{}', timeout=5).json()
+
+        self.assertEqual(first['port'], second['port'])
+
+    def test_iterable_body_is_streamed(self):
+        """Test that a generator body is sent with chunked transfer encoding."""
+        response = self.session.post(f'{self.url}/ok', data=(b'x' * 10 for _ in range(5)), timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['length'], 50)
+
+    def test_status_code_is_reported(self):
+        """Test that error statuses come back as responses, not exceptions."""
+        self.assertEqual(self.session.post(f'{self.url}/missing', data=b'', timeout=5).status_code, 404)
+
+    def test_stale_connection_is_retried(self):
+        """Test that a kept-alive connection closed by the server is replaced transparently."""
+        self.session.post(f'{self.url}/ok', data=b'{}', timeout=5)
+        for connection in self.session.connections.values():
+            connection.sock.shutdown(socket.SHUT_RDWR)
+
+        response = self.session.post(f'{self.url}/ok', data=b'{}', timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_timeout_is_not_retried(self):
+        """Test that a request that timed out on a kept-alive connection is not sent again."""
+        self.session.post(f'{self.url}/ok', data=b'{}', timeout=5)
+
+        with self.assertRaises(TimeoutError):
+            self.session.post(f'{self.url}/slow', data=b'{}', timeout=0.2)
+        time.sleep(0.5)
+
+        self.assertEqual(RecordingHandler.paths, ['/ok', '/slow'])
+        self.assertEqual(self.session.connections, {})
+
+    def test_unreachable_backend_raises_transport_error(self):
+        """Test that a refused connection raises one of TRANSPORT_ERRORS."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            closed_port = sock.getsockname()[1]
+
+        with self.assertRaises(http_transport.TRANSPORT_ERRORS):
+            self.session.post(f'http://127.0.0.1:{closed_port}/ok', data=b'{}', timeout=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
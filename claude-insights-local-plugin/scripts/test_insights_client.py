@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Unit tests for insights_client.py shared hook client."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import insights_client
+import transcript_cursor
+
+
+class TestInsightsClient(unittest.TestCase):
+    """Test cases for sending hook events through the shared client."""
+
+    def setUp(self):
+        """Set up a temporary state dir and transcript."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state')})
+        self.env.start()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        with open(self.transcript_path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "user"}\n')
+        self.input_data = {'session_id': 'test-session-123', 'transcript_path': self.transcript_path}
+        self.session = MagicMock()
+        self.session.request.return_value = MagicMock(status_code=200)
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_send_posts_payload_and_commits_cursor(self):
+        """Test that a successful send hits the event endpoint and advances the cursor."""
+        with patch.dict(insights_client.BASE_HEADERS, {'x-api-key': 'secret'}):
+            result = insights_client.send('pre_tool_use', self.input_data, session=self.session)
+
+        self.assertTrue(result)
+        args, kwargs = self.session.request.call_args
+        self.assertEqual(args, ('POST', 'http://localhost:3001/api/hooks/pre-tool-use'))
+        self.assertEqual(kwargs['headers']['x-api-key'], 'secret')
+        self.assertEqual(json.loads(kwargs['data'])['data'], self.input_data)
+        self.assertEqual(transcript_cursor.load_cursor('test-session-123')['offset'], len('{"type": "user"}\n'))
+
+    def test_send_rejected_keeps_cursor(self):
+        """Test that a rejected event is reported and the transcript is resent later."""
+        self.session.request.return_value = MagicMock(status_code=400)
+
+        with patch('sys.stderr'):
+            self.assertFalse(insights_client.send('stop', self.input_data, session=self.session))
+        self.assertEqual(transcript_cursor.load_cursor('test-session-123'), {})
+
+    def test_transient_failures_are_worth_retrying(self):
+        """Test that timeouts, rate limits and server errors return None, like an unreachable backend."""
+        for status in (408, 429, 500, 503):
+            with self.subTest(status=status):
+                self.session.request.return_value = MagicMock(status_code=status)
+                self.assertIsNone(insights_client.send('stop', self.input_data, session=self.session))
+
+    def test_session_end_uses_put_and_requires_success(self):
+        """Test that session end is a PUT whose body must report success."""
+        self.session.request.return_value.json.return_value = {'success': False, 'error': 'nope'}
+
+        result = insights_client.send('session_end', self.input_data, session=self.session)
+
+        self.assertFalse(result)
+        self.assertEqual(self.session.request.call_args[0][0], 'PUT')
+        self.assertEqual(self.session.request.call_args[1]['timeout'], 10)
+
+    def test_session_end_exit_codes(self):
+        """Test that the session end hook exits 1 only when the backend rejected it for good."""
+        raw = json.dumps(self.input_data).encode('utf-8')
+        for status, body, code in ((200, {'success': False}, 1), (400, {}, 1), (503, {}, 0), (200, {'success': True}, 0)):
+            with self.subTest(status=status, body=body):
+                self.session.request.return_value = MagicMock(status_code=status)
+                self.session.request.return_value.json.return_value = body
+                with patch('sys.stdin', io.TextIOWrapper(io.BytesIO(raw))), patch('sys.stderr'), \
+                        patch.object(insights_client, 'spool_event', return_value=False), \
+                        patch.object(insights_client, 'get_session', return_value=self.session):
+                    with self.assertRaises(SystemExit) as cm:
+                        insights_client.run_hook('session_end', failure_exit_code=1)
+                self.assertEqual(cm.exception.code, code)
+
+    def test_accepted_session_end_removes_the_cursor(self):
+        """Test that nothing is kept for a session once its end has been accepted."""
+        self.session.request.return_value.json.return_value = {'success': True}
+        insights_client.send('stop', self.input_data, session=self.session)
+        self.assertTrue(os.path.exists(transcript_cursor.cursor_path('test-session-123')))
+
+        self.assertTrue(insights_client.send('session_end', self.input_data, session=self.session))
+        self.assertFalse(os.path.exists(transcript_cursor.cursor_path('test-session-123')))
+
+    def test_unreachable_backend_returns_none(self):
+        """Test that a connection error is distinguished from a rejection."""
+        self.session.request.side_effect = requests.exceptions.ConnectionError()
+
+        self.assertIsNone(insights_client.send('notification', self.input_data, session=self.session))
+
+    def test_run_hook_spools_event(self):
+        """Test that a hook hands its raw event to the spool and exits 0."""
+        raw = json.dumps(self.input_data).encode('utf-8')
+
+        with patch('sys.stdin', io.TextIOWrapper(io.BytesIO(raw))), \
+                patch.object(insights_client, 'spool_event', return_value=True) as spool, \
+                patch.object(insights_client, 'send') as send:
+            with self.assertRaises(SystemExit) as cm:
+                insights_client.run_hook('post_tool_use')
+
+        self.assertEqual(cm.exception.code, 0)
+        spool.assert_called_once_with('post_tool_use', raw)
+        send.assert_not_called()
+
+    def test_run_hook_failure_exit_code(self):
+        """Test that failure_exit_code is used for rejected or incomplete events, and 0 otherwise."""
+        def run(input_data, sent, **kwargs):
+            raw = json.dumps(input_data).encode('utf-8')
+            with patch('sys.stdin', io.TextIOWrapper(io.BytesIO(raw))), patch('sys.stderr'), \
+                    patch.object(insights_client, 'spool_event', return_value=False), \
+                    patch.object(insights_client, 'send', return_value=sent):
+                with self.assertRaises(SystemExit) as cm:
+                    insights_client.run_hook('session_end', **kwargs)
+            return cm.exception.code
+
+        self.assertEqual(run(self.input_data, False, failure_exit_code=1), 1)
+        self.assertEqual(run(self.input_data, None, failure_exit_code=1), 0)
+        self.assertEqual(run({}, True, failure_exit_code=1), 1)
+        self.assertEqual(run(self.input_data, True, failure_exit_code=1), 0)
+        # Unreachable is not a rejection
+        self.assertEqual(run(self.input_data, None, failure_exit_code=1), 0)
+        self.assertEqual(run(self.input_data, False), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Unit tests for insights_daemon.py spool draining."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import event_batcher
+import event_spool
+import insights_daemon
+
+DELIVER = insights_daemon.deliver
+
+
+class TestDrain(unittest.TestCase):
+    """Test cases for delivering spooled events in order."""
+
+    def setUp(self):
+        """Point the spool at a temporary state dir and record deliveries."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': self.tmp.name,
+                                           'CLAUDE_INSIGHTS_BATCH_WINDOW': '0'})
+        self.env.start()
+        self.conn = event_spool.connect()
+        self.delivered = []
+        self.failing = set()
+        self.rejected = set()
+        deliver = patch.object(insights_daemon, 'deliver', side_effect=self.deliver)
+        deliver.start()
+        self.addCleanup(deliver.stop)
+
+    def tearDown(self):
+        self.conn.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def deliver(self, hook, raw, session):
+        n = json.loads(raw)['n']
+        if n in self.failing:
+            return None
+        if n in self.rejected:
+            return False
+        self.delivered.append(n)
+        return True
+
+    def spool(self, *hooks):
+        for n, hook in enumerate(hooks):
+            event_spool.enqueue(hook, json.dumps({'n': n}).encode('utf-8'))
+
+    def queued(self):
+        return [json.loads(event['body'])['n'] for event in event_spool.peek(self.conn, 100)]
+
+    def drain(self):
+        return insights_daemon.drain(self.conn, session=None)
+
+    @patch('event_batcher.batching_enabled', return_value=False)
+    def test_events_are_delivered_in_order(self, _):
+        """Test that the spool is delivered oldest first and emptied."""
+        self.spool('user_prompt_submit', 'pre_tool_use', 'post_tool_use', 'stop')
+
+        self.assertEqual(self.drain(), 0.0)
+
+        self.assertEqual(self.delivered, [0, 1, 2, 3])
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.drain(), 5.0)
+
+    @patch('event_batcher.batching_enabled', return_value=False)
+    def test_failed_head_blocks_the_queue(self, _):
+        """Test that a failed event backs off and the events behind it wait for it."""
+        self.spool('pre_tool_use', 'post_tool_use', 'stop')
+        self.failing = {1}
+
+        self.drain()
+        self.assertEqual(self.delivered, [0])
+        self.assertEqual(self.queued(), [1, 2])
+        head = event_spool.peek(self.conn, 1)[0]
+        self.assertEqual(head['attempts'], 1)
+
+        # Still backing off: nothing is sent, and the drain says how long to wait
+        wait = self.drain()
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, event_spool.BACKOFF_BASE)
+        self.assertEqual(self.delivered, [0])
+
+        # Once the delay is over the head goes first
+        self.failing = set()
+        self.conn.execute('UPDATE events SET next_attempt_at = 0')
+        self.drain()
+        self.assertEqual(self.delivered, [0, 1, 2])
+
+    @patch('event_batcher.batching_enabled', return_value=False)
+    def test_rejected_event_is_dropped_at_once(self, _):
+        """Test that an event the backend rejects for good is dropped without blocking the queue."""
+        self.spool('pre_tool_use', 'post_tool_use', 'stop')
+        self.rejected = {1}
+
+        with patch('sys.stderr'):
+            self.assertEqual(self.drain(), 0.0)
+
+        self.assertEqual(self.delivered, [0, 2])
+        self.assertEqual(self.queued(), [])
+
+    @patch('event_batcher.batching_enabled', return_value=False)
+    def test_unknown_hooks_are_dropped(self, _):
+        """Test that events for hooks the collector doesn't know don't block the queue."""
+        self.spool('pre_tool_use', 'no_such_hook', 'stop')
+        insights_daemon.deliver.side_effect = DELIVER
+
+        with patch('insights_client.send', return_value=True) as send:
+            self.drain()
+
+        self.assertEqual([call.args[0] for call in send.call_args_list], ['pre_tool_use', 'stop'])
+        self.assertEqual(self.queued(), [])
+
+    @patch('event_batcher.batching_enabled', return_value=True)
+    def test_batch_is_sent_in_one_request(self, _):
+        """Test that a run of batchable events goes out as one batch and is acknowledged."""
+        self.spool('pre_tool_use', 'post_tool_use', 'stop')
+
+        with patch('event_batcher.send_batch', return_value=True) as send_batch:
+            self.drain()
+
+        self.assertEqual([json.loads(event['body'])['n'] for event in send_batch.call_args.args[0]], [0, 1, 2])
+        self.assertEqual(self.delivered, [])
+        self.assertEqual(self.queued(), [])
+
+    @patch('event_batcher.batching_enabled', return_value=True)
+    def test_failed_batch_backs_off_the_head(self, _):
+        """Test that a failed batch keeps every event and backs off the head."""
+        self.spool('pre_tool_use', 'post_tool_use')
+
+        with patch('event_batcher.send_batch', return_value=False):
+            self.drain()
+
+        self.assertEqual(self.queued(), [0, 1])
+        self.assertEqual([event['attempts'] for event in event_spool.peek(self.conn, 100)], [1, 0])
+        self.assertEqual(self.delivered, [])
+
+    @patch('event_batcher.batching_enabled', return_value=True)
+    def test_missing_batch_endpoint_falls_back_to_single_events(self, _):
+        """Test that without a batch endpoint the run is delivered event by event, in order."""
+        self.spool('pre_tool_use', 'post_tool_use', 'stop')
+
+        with patch('event_batcher.send_batch', return_value=None):
+            self.drain()
+
+        self.assertEqual(self.delivered, [0, 1, 2])
+        self.assertEqual(self.queued(), [])
+
+    @patch('event_batcher.batching_enabled', return_value=True)
+    def test_rejected_batch_drops_only_the_bad_record(self, _):
+        """Test that a 4xx batch is resent event by event, and only the record the backend refuses is dropped."""
+        self.spool('pre_tool_use', 'post_tool_use', 'stop')
+        self.rejected = {1}
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=422)
+
+        with patch.object(event_batcher, 'batch_supported', True), \
+                patch('event_batcher.build_records', return_value=([], [])), patch('sys.stderr'):
+            self.assertEqual(insights_daemon.drain(self.conn, session), 0.0)
+            self.assertTrue(event_batcher.batch_supported)
+
+        session.post.assert_called_once()
+        self.assertEqual(self.delivered, [0, 2])
+        self.assertEqual(self.queued(), [])
+
+    @patch('event_batcher.batching_enabled', return_value=True)
+    def test_unbatched_head_is_sent_alone(self, _):
+        """Test that an event that can't be batched goes on its own, and the rest batch behind it."""
+        self.spool('session_start', 'pre_tool_use', 'post_tool_use')
+
+        with patch('event_batcher.send_batch', return_value=True) as send_batch:
+            self.drain()
+            self.assertEqual(self.delivered, [0])
+            send_batch.assert_not_called()
+
+            self.drain()
+        self.assertEqual([json.loads(event['body'])['n'] for event in send_batch.call_args.args[0]], [1, 2])
+        self.assertEqual(self.queued(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
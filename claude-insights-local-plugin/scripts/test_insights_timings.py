@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Unit tests for insights_timings.py session start timing spans."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import insights_client
+import insights_timings
+
+
+class TestInsightsTimings(unittest.TestCase):
+    """Test cases for recording and reporting timing spans."""
+
+    def setUp(self):
+        """Set up a temporary state dir and project."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {
+            'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state'),
+            'HOME': self.tmp.name,
+        })
+        self.env.start()
+        self.metrics_path = os.path.join(self.tmp.name, 'state', 'metrics.jsonl')
+
+    def tearDown(self):
+        insights_timings.stop_timings()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_spans_only_record_while_timing(self):
+        """Test that span() is a no-op outside a timed event."""
+        with insights_timings.span('ignored'):
+            pass
+        timings = insights_timings.start_timings()
+        with insights_timings.span('collect'):
+            pass
+        self.assertEqual(list(timings.spans), ['collect'])
+
+    def test_metrics_line_and_slow_warning(self):
+        """Test that a slow event is logged with its breakdown."""
+        timings = insights_timings.Timings()
+        timings.record('gitRepository', 0.25)
+        stderr = io.StringIO()
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_METRICS': '1', 'CLAUDE_INSIGHTS_SLOW_START_MS': '0'}), \
+                patch('sys.stderr', stderr):
+            insights_timings.report('session_start', timings, True)
+
+        self.assertIn('Slow session_start', stderr.getvalue())
+        self.assertIn('gitRepository 250ms', stderr.getvalue())
+        with open(self.metrics_path, encoding='utf-8') as f:
+            line = json.loads(f.read())
+        self.assertEqual(line['event'], 'session_start')
+        self.assertTrue(line['slow'])
+        self.assertEqual(line['spans'], {'gitRepository': 250.0})
+
+    def test_fast_event_is_quiet_by_default(self):
+        """Test that nothing is printed or logged under the budget without metrics enabled."""
+        stderr = io.StringIO()
+        with patch('sys.stderr', stderr):
+            insights_timings.report('session_start', insights_timings.Timings(), True)
+        self.assertEqual(stderr.getvalue(), '')
+        self.assertFalse(os.path.exists(self.metrics_path))
+
+    def test_session_start_send_reports_collectors_and_http(self):
+        """Test that a session start carries collector timings and logs the HTTP span."""
+        session = MagicMock()
+        session.request.return_value = MagicMock(status_code=200)
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_METRICS': '1'}):
+            ok = insights_client.send('session_start', {'session_id': 'test-session-123', 'cwd': self.tmp.name},
+                                      session=session)
+        self.assertTrue(ok)
+
+        payload = json.loads(session.request.call_args.kwargs['data'])
+        self.assertIn('gitRepository', payload['timings'])
+        self.assertIn('collect', payload['timings'])
+        with open(self.metrics_path, encoding='utf-8') as f:
+            spans = json.loads(f.read())['spans']
+        self.assertIn('http', spans)
+        self.assertIn('build', spans)
+        self.assertIsNone(insights_timings.current_timings())
+
+
+if __name__ == '__main__':
+    unittest.main()
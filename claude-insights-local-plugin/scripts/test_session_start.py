@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Unit tests for session_start.py payload collection."""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import insights_client
+import session_start
+
+
+class TestSessionStart(unittest.TestCase):
+    """Test cases for building the session start payload."""
+
+    def setUp(self):
+        """Set up a temporary project, home and state dir."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.tmp.name, 'project')
+        home = os.path.join(self.tmp.name, 'home')
+        os.makedirs(os.path.join(self.project, '.claude', 'commands'))
+        os.makedirs(home)
+        with open(os.path.join(self.project, 'CLAUDE.md'), 'w', encoding='utf-8') as f:
+            f.write('# Memory')
+        with open(os.path.join(self.project, '.claude', 'commands', 'review.md'), 'w', encoding='utf-8') as f:
+            f.write('---\ndescription: Review\n---\nReview the code')
+        self.env = patch.dict(os.environ, {
+            'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state'),
+            'HOME': home,
+        })
+        self.env.start()
+        session_start.CONTEXT.cache = None
+        self.input_data = {'session_id': 'test-session-123', 'cwd': self.project, 'source': 'startup'}
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_build_payload_collects_project_context(self):
+        """Test that every collector's result lands in the payload."""
+        payload = session_start.build_payload(self.input_data, {'offset': 0})
+        self.assertEqual(payload['memory'], '# Memory')
+        self.assertEqual(payload['commands'], [{
+            'name': 'review', 'namespace': '', 'metadata': {'description': 'Review'},
+            'content': 'Review the code', 'level': 'project',
+        }])
+        self.assertNotIn('partial', payload)
+
+    def test_slow_collector_is_sent_as_partial(self):
+        """Test that a collector missing the deadline doesn't hold up the payload."""
+        release = threading.Event()
+
+        def slow_git(cwd):
+            release.wait(5)
+            return 'git@example.com:org/repo.git'
+
+        with patch.dict(session_start.CONTEXT.collectors, {'gitRepository': (slow_git, '')}), \
+                patch.dict(os.environ, {'CLAUDE_INSIGHTS_SESSION_START_DEADLINE': '0.2'}):
+            payload = session_start.build_payload(self.input_data, {'offset': 0})
+        release.set()
+
+        self.assertEqual(payload['partial'], ['gitRepository'])
+        self.assertEqual(payload['gitRepository'], '')
+        self.assertEqual(payload['memory'], '# Memory')
+
+    def test_failing_collector_leaves_field_empty(self):
+        """Test that a collector raising doesn't break the rest of the payload."""
+        failing = MagicMock(side_effect=RuntimeError('boom'))
+        with patch.dict(session_start.CONTEXT.collectors, {'mcpServers': (failing, [])}):
+            payload = session_start.build_payload(self.input_data, {'offset': 0})
+        self.assertEqual(payload['mcpServers'], [])
+        self.assertEqual(payload['partial'], ['mcpServers'])
+
+    def test_content_dedup_sends_known_bodies_by_hash(self):
+        """Test that bodies are attached until the backend acknowledged them."""
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_CONTENT_DEDUP': '1'}):
+            transcript = {'offset': 0}
+            first = session_start.build_payload(self.input_data, transcript)
+            self.assertNotIn('memory', first)
+            self.assertEqual(first['contentData'][first['memoryHash']], '# Memory')
+            command_hash = first['commands'][0]['contentHash']
+            self.assertEqual(first['contentData'][command_hash], 'Review the code')
+
+            # Not acknowledged yet: the bodies go again
+            second = session_start.build_payload(self.input_data, {'offset': 0})
+            self.assertEqual(second['contentData'], first['contentData'])
+
+            # Acknowledged once the backend accepted a session start
+            session = MagicMock()
+            session.request.return_value = MagicMock(status_code=500)
+            insights_client.send('session_start', self.input_data, session=session)
+            self.assertNotEqual(session_start.build_payload(self.input_data, {'offset': 0})['contentData'], {})
+            session.request.return_value = MagicMock(status_code=200)
+            insights_client.send('session_start', self.input_data, session=session)
+            third = session_start.build_payload(self.input_data, {'offset': 0})
+            self.assertEqual(third['contentData'], {})
+            self.assertEqual(third['memoryHash'], first['memoryHash'])
+            self.assertEqual(third['commands'][0]['contentHash'], command_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
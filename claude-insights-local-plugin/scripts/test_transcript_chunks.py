@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Unit tests for transcript_chunks.py content-addressed transcript upload."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import transcript_chunks
+import transcript_cursor
+import transcript_encoding
+
+
+class TestTranscriptChunks(unittest.TestCase):
+    """Test cases for chunk manifests and chunked payloads."""
+
+    def setUp(self):
+        """Set up a temporary state dir and transcript file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {
+            'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state'),
+            'CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING': 'chunks',
+        })
+        self.env.start()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        with open(self.transcript_path, 'w', encoding='utf-8') as f:
+            f.write('{"a": 1}\n{"b": 2}\n')
+        self.input_data = {'session_id': 'test-session-123', 'transcript_path': self.transcript_path}
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def encode(self):
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+        body, _ = transcript_encoding.encode_request({'sessionId': 'test-session-123'}, delta)
+        return delta, json.loads(body)
+
+    def test_first_upload_carries_every_chunk(self):
+        """Test that nothing is deduplicated before the backend acknowledged anything."""
+        _, payload = self.encode()
+
+        self.assertEqual(payload['transcriptChunks'], [
+            transcript_chunks.chunk_hash(b'{"a": 1}'),
+            transcript_chunks.chunk_hash(b'{"b": 2}'),
+        ])
+        self.assertEqual(sorted(payload['transcriptChunkData'].values()), ['{"a": 1}', '{"b": 2}'])
+
+    def test_acknowledged_chunks_are_sent_by_hash_only(self):
+        """Test that a resend from offset 0 only carries chunks the backend lacks."""
+        delta, _ = self.encode()
+        transcript_cursor.commit_transcript_cursor(delta)
+        with open(self.transcript_path, 'a', encoding='utf-8') as f:
+            f.write('{"c": 3}\n')
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_FULL_TRANSCRIPT': '1'}):
+            _, payload = self.encode()
+
+        self.assertEqual(len(payload['transcriptChunks']), 3)
+        self.assertEqual(list(payload['transcriptChunkData'].values()), ['{"c": 3}'])
+
+    def test_uncommitted_upload_is_not_acknowledged(self):
+        """Test that chunks of a rejected upload are sent again."""
+        self.encode()
+
+        _, payload = self.encode()
+
+        self.assertEqual(len(payload['transcriptChunkData']), 2)
+
+    def test_acknowledge_appends_only_new_hashes(self):
+        """Test that the manifest never records a hash twice."""
+        transcript_chunks.acknowledge_chunks('test-session-123', ['aa', 'bb'])
+        transcript_chunks.acknowledge_chunks('test-session-123', ['bb', 'cc', 'cc'])
+
+        with open(transcript_chunks.manifest_path('test-session-123'), encoding='ascii') as f:
+            self.assertEqual(f.read().split(), ['aa', 'bb', 'cc'])
+
+    def test_forgotten_session_has_no_manifest(self):
+        """Test that a finished session's manifest is removed along with its cursor."""
+        transcript_cursor.commit_transcript_cursor(self.encode()[0])
+        self.assertTrue(os.path.exists(transcript_chunks.manifest_path('test-session-123')))
+
+        transcript_cursor.forget_session('test-session-123')
+
+        self.assertFalse(os.path.exists(transcript_chunks.manifest_path('test-session-123')))
+        self.assertFalse(os.path.exists(transcript_cursor.cursor_path('test-session-123')))
+
+
+if __name__ == '__main__':
+    unittest.main()
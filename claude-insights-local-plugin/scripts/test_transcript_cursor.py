@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Unit tests for transcript_cursor.py incremental transcript shipping."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import transcript_cursor
+
+
+class TestTranscriptCursor(unittest.TestCase):
+    """Test cases for per-session transcript cursors."""
+
+    def setUp(self):
+        """Set up a temporary state dir and transcript file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state')})
+        self.env.start()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        self.input_data = {'session_id': 'test-session-123', 'transcript_path': self.transcript_path}
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def write(self, content, mode='a'):
+        with open(self.transcript_path, mode, encoding='utf-8') as f:
+            f.write(content)
+
+    def test_first_read_returns_whole_file(self):
+        """Test that the first hook ships everything from offset 0."""
+        self.write('{"a": 1}\n{"b": 2}\n')
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"a": 1}\n{"b": 2}\n')
+        self.assertEqual(delta['offset'], 0)
+
+    def test_only_new_lines_after_commit(self):
+        """Test that committed lines are not shipped again."""
+        self.write('{"a": 1}\n')
+        transcript_cursor.commit_transcript_cursor(transcript_cursor.read_transcript_delta(self.input_data))
+        self.write('{"b": 2}\n')
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"b": 2}\n')
+        self.assertEqual(delta['offset'], len('{"a": 1}\n'))
+
+    def test_uncommitted_delta_is_resent(self):
+        """Test that a failed upload (no commit) resends the same lines."""
+        self.write('{"a": 1}\n')
+        transcript_cursor.read_transcript_delta(self.input_data)
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"a": 1}\n')
+
+    def test_partial_line_is_held_back(self):
+        """Test that a half-written trailing line waits for the next hook."""
+        self.write('{"a": 1}\n{"b": ')
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+        transcript_cursor.commit_transcript_cursor(delta)
+        self.write('2}\n')
+        next_delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"a": 1}\n')
+        self.assertEqual(transcript_cursor.read_delta_bytes(next_delta), b'{"b": 2}\n')
+
+    def test_truncation_triggers_full_resync(self):
+        """Test that a truncated transcript is resent from the start."""
+        self.write('{"a": 1}\n{"b": 2}\n')
+        transcript_cursor.commit_transcript_cursor(transcript_cursor.read_transcript_delta(self.input_data))
+        self.write('{"c": 3}\n', mode='w')
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(delta['offset'], 0)
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"c": 3}\n')
+
+    def test_rotation_triggers_full_resync(self):
+        """Test that a replaced file (new inode) is resent from the start."""
+        self.write('{"a": 1}\n')
+        transcript_cursor.commit_transcript_cursor(transcript_cursor.read_transcript_delta(self.input_data))
+        rotated_path = self.transcript_path + '.new'
+        with open(rotated_path, 'w', encoding='utf-8') as f:
+            f.write('{"a": 1}\n{"b": 2}\n')
+        os.replace(rotated_path, self.transcript_path)
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(delta['offset'], 0)
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"a": 1}\n{"b": 2}\n')
+
+    def test_full_transcript_override(self):
+        """Test that CLAUDE_INSIGHTS_FULL_TRANSCRIPT disables incremental shipping."""
+        self.write('{"a": 1}\n')
+        transcript_cursor.commit_transcript_cursor(transcript_cursor.read_transcript_delta(self.input_data))
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_FULL_TRANSCRIPT': '1'}):
+            delta = transcript_cursor.read_transcript_delta(self.input_data)
+
+        self.assertEqual(delta['offset'], 0)
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'{"a": 1}\n')
+
+    def test_delta_streams_in_chunks(self):
+        """Test that a delta larger than the read size is streamed piece by piece."""
+        self.write('{"a": 1}\n' * 100 + '{"b": ')
+
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+        blocks = list(transcript_cursor.iter_transcript(delta, chunk_size=64))
+
+        self.assertEqual(delta['end'], len('{"a": 1}\n') * 100)
+        self.assertTrue(all(len(block) <= 64 for block in blocks))
+        self.assertEqual(b''.join(blocks), b'{"a": 1}\n' * 100)
+
+    def test_replaced_transcript_fails_stream(self):
+        """Test that a file replaced after the delta was read is not streamed."""
+        self.write('{"a": 1}\n')
+        delta = transcript_cursor.read_transcript_delta(self.input_data)
+        rotated_path = self.transcript_path + '.new'
+        with open(rotated_path, 'w', encoding='utf-8') as f:
+            f.write('{"b": 2}\n')
+        os.replace(rotated_path, self.transcript_path)
+
+        with self.assertRaises(OSError):
+            transcript_cursor.read_delta_bytes(delta)
+
+    def test_missing_transcript(self):
+        """Test that a missing transcript yields an empty delta."""
+        delta = transcript_cursor.read_transcript_delta({'session_id': 'x', 'transcript_path': '/nonexistent.jsonl'})
+
+        self.assertEqual(transcript_cursor.read_delta_bytes(delta), b'')
+        self.assertEqual(delta['offset'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Unit tests for transcript_encoding.py payload wire encodings."""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import transcript_cursor
+import transcript_encoding
+
+
+class TestTranscriptEncoding(unittest.TestCase):
+    """Test cases for attaching transcript deltas to request bodies."""
+
+    def setUp(self):
+        """Set up a payload and a transcript delta."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'CLAUDE_INSIGHTS_STATE_DIR': os.path.join(self.tmp.name, 'state')})
+        self.env.start()
+        self.data = '{"type": "user", "text": "héllo"}\n'.encode('utf-8')
+        transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        with open(transcript_path, 'wb') as f:
+            f.write(self.data)
+        self.payload = {'sessionId': 'test-session-123', 'transcriptOffset': 0}
+        self.transcript = transcript_cursor.read_transcript_delta({
+            'session_id': 'test-session-123',
+            'transcript_path': transcript_path,
+        })
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_json_embeds_transcript_text(self):
+        """Test that the default encoding embeds the transcript as a string."""
+        body, headers = transcript_encoding.encode_request(self.payload, self.transcript, 'json')
+
+        self.assertEqual(headers, {'Content-Type': 'application/json'})
+        self.assertEqual(json.loads(body)['transcript'], '{"type": "user", "text": "héllo"}\n')
+
+    def test_gzip_compresses_json_body(self):
+        """Test that gzip encoding sends the same JSON body compressed."""
+        body, headers = transcript_encoding.encode_request(self.payload, self.transcript, 'gzip')
+
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(body))['transcriptOffset'], 0)
+
+    def test_multipart_sends_raw_compressed_transcript(self):
+        """Test that multipart encoding keeps the payload JSON and the transcript raw."""
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_TRANSCRIPT_CODEC': 'gzip'}):
+            body, headers = transcript_encoding.encode_request(self.payload, self.transcript, 'multipart')
+
+        boundary = headers['Content-Type'].split('boundary=')[1].encode('ascii')
+        parts = body.split(b'--' + boundary)
+        payload_part = parts[1].split(b'\r\n\r\n', 1)[1].rstrip(b'\r\n')
+        transcript_part = parts[2].split(b'\r\n\r\n', 1)[1][:-2]
+
+        self.assertEqual(json.loads(payload_part), self.payload)
+        self.assertIn(b'filename="transcript.jsonl.gz"', parts[2])
+        self.assertEqual(gzip.decompress(transcript_part), self.data)
+
+    def test_large_delta_is_streamed(self):
+        """Test that a delta over the threshold yields the same body in chunks."""
+        small_body, _ = transcript_encoding.encode_request(self.payload, self.transcript, 'json')
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_STREAM_THRESHOLD': '0'}):
+            body, _ = transcript_encoding.encode_request(self.payload, self.transcript, 'json')
+
+        self.assertNotIsInstance(body, bytes)
+        self.assertEqual(b''.join(body), small_body)
+
+    def test_streamed_json_escapes_split_characters(self):
+        """Test that a multi-byte character split across reads is decoded intact."""
+        with patch.object(transcript_encoding, 'iter_transcript', lambda delta: iter([self.data[:28], self.data[28:]])):
+            body, _ = transcript_encoding.encode_request(self.payload, self.transcript, 'json')
+
+        self.assertEqual(json.loads(body)['transcript'], self.data.decode('utf-8'))
+
+    def test_unknown_encoding_falls_back_to_json(self):
+        """Test that an unrecognised setting keeps the plain JSON body."""
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING': 'brotli'}):
+            self.assertEqual(transcript_encoding.transcript_encoding(), 'json')
+
+
+if __name__ == '__main__':
+    unittest.main()
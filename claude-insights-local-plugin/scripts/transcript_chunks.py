@@ -0,0 +1,79 @@
+"""
+Content-addressed transcript chunks.
+
+The byte cursor (see transcript_cursor.py) stops re-uploads along a single
+timeline, but hooks that run in parallel read the same delta before either
+one commits, and a transcript that is rewritten or resent from offset 0
+(compaction, CLAUDE_INSIGHTS_FULL_TRANSCRIPT=1) goes over the wire again.
+
+With CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING=chunks the transcript delta is split
+into one chunk per JSONL line, addressed by its hash. The upload lists the
+hashes of every line in order and carries the content of only those chunks
+the backend has not acknowledged yet:
+
+    "transcriptChunks": ["3f2a...", "9c1e...", ...],
+    "transcriptChunkData": {"9c1e...": "{\"type\": \"user\", ...}"}
+
+Acknowledged hashes are kept in a per-session manifest, one hash per line.
+It is only ever appended to, so concurrent hooks never lose each other's
+entries; a lost manifest just means chunks are sent again.
+"""
+
+import json
+
+from insights_state import append_manifest, load_manifest, safe_name, state_path
+
+
+def chunk_hash(line: bytes) -> str:
+    """Return the content address of one transcript line."""
+    # hashlib loads OpenSSL; only pay for it when the chunks encoding is in use
+    import hashlib
+    return hashlib.blake2b(line, digest_size=16).hexdigest()
+
+
+def iter_chunks(blocks):
+    """Yield (hash, line) chunks, one per non-empty line, from an iterable of byte blocks."""
+    pending = b''
+    for block in blocks:
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            if line:
+                yield chunk_hash(line), line
+    if pending:
+        yield chunk_hash(pending), pending
+
+
+def manifest_path(session_id: str) -> str:
+    """Return the manifest file of acknowledged chunks for a session."""
+    return state_path('chunks', f"{safe_name(session_id)}.txt")
+
+
+def iter_chunk_fields(transcript: dict, blocks):
+    """
+    Yield the JSON text of the chunk payload fields for a transcript delta,
+    reading its lines from blocks as it goes. The hashes are recorded on the
+    delta so commit_transcript_cursor() can acknowledge them once the backend
+    has accepted the upload.
+    """
+    session_id = transcript.get('session_id')
+    known = load_manifest(manifest_path(session_id)) if session_id else set()
+    hashes = transcript['chunks'] = []
+    sent = set()
+
+    yield b'"transcriptChunkData": {'
+    for digest, line in iter_chunks(blocks):
+        hashes.append(digest)
+        if digest in known or digest in sent:
+            continue
+        text = json.dumps(line.decode('utf-8', errors='replace'))
+        yield f'{", " if sent else ""}"{digest}": {text}'.encode('utf-8')
+        sent.add(digest)
+    yield b'}, "transcriptChunks": ' + json.dumps(hashes).encode('utf-8')
+
+
+def acknowledge_chunks(session_id: str, hashes: list) -> None:
+    """Append newly acknowledged chunk hashes to the session manifest."""
+    if not session_id or not hashes:
+        return
+    append_manifest(manifest_path(session_id), hashes)
@@ -0,0 +1,169 @@
+"""
+Incremental transcript shipping for the insights hooks.
+
+Every hook used to upload the whole JSONL transcript, which is O(n^2) bytes
+over a long session. Instead we keep a per-session cursor (byte offset of the
+last line the backend accepted, plus the file inode and size) and only ship
+the lines appended since then. The upload carries `transcriptOffset` so the
+backend can append; an offset of 0 means "replace what you have", which is
+also what happens after the file is truncated or rotated.
+
+Set CLAUDE_INSIGHTS_FULL_TRANSCRIPT=1 to always send the whole file. Lines
+that were already acknowledged can still be deduplicated by content; see
+transcript_chunks.py.
+"""
+
+import os
+
+from insights_state import load_json, safe_name, save_json, state_path
+from transcript_chunks import acknowledge_chunks, manifest_path
+
+# Read size for scanning and streaming transcripts; memory use never depends on file size
+CHUNK_SIZE = 64 * 1024
+
+
+def get_transcript_path(input_data: dict) -> str:
+    """Return the transcript path from hook input, if any."""
+    return input_data.get('transcript_path') or input_data.get('transcript_file') or ''
+
+
+def cursor_path(session_id: str) -> str:
+    """Return the cursor file for a session."""
+    return state_path('cursors', f"{safe_name(session_id)}.json")
+
+
+def load_cursor(session_id: str) -> dict:
+    """Load the stored cursor for a session, or an empty dict."""
+    if not session_id:
+        return {}
+    return load_json(cursor_path(session_id), {}) or {}
+
+
+def resume_offset(cursor: dict, transcript_path: str, stat_result) -> int:
+    """
+    Return the byte offset to resume from, or 0 when a full resync is needed.
+    A resync happens when the file was replaced (inode changed) or truncated.
+    """
+    if os.environ.get('CLAUDE_INSIGHTS_FULL_TRANSCRIPT', '') == '1':
+        return 0
+    if not cursor or cursor.get('path') != transcript_path:
+        return 0
+    if cursor.get('inode') != stat_result.st_ino:
+        return 0
+    offset = cursor.get('offset', 0)
+    if stat_result.st_size < offset or stat_result.st_size < cursor.get('size', 0):
+        return 0
+    return offset
+
+
+def last_line_end(f, offset: int, size: int) -> int:
+    """Return the position just past the last newline in [offset, size), or offset if none."""
+    pos = size
+    while pos > offset:
+        start = max(offset, pos - CHUNK_SIZE)
+        f.seek(start)
+        newline = f.read(pos - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        pos = start
+    return offset
+
+
+def read_transcript_delta(input_data: dict) -> dict:
+    """
+    Find the transcript lines appended since the last acknowledged upload.
+
+    Returns a dict with the byte range [`offset`, `end`) to ship and the
+    cursor values to persist with commit_transcript_cursor() once the backend
+    has accepted the upload. The lines themselves are not loaded; stream them
+    with iter_transcript(). Only complete lines are included; a line that is
+    still being written is picked up by the next hook.
+    """
+    session_id = input_data.get('session_id')
+    transcript_path = get_transcript_path(input_data)
+    delta = {
+        'session_id': session_id,
+        'path': transcript_path,
+        'offset': 0,
+        'end': 0,
+        'inode': None,
+        'size': 0,
+    }
+
+    if not transcript_path or not os.path.exists(transcript_path):
+        return delta
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            offset = resume_offset(load_cursor(session_id), transcript_path, stat_result)
+
+            # Stop at the last newline so a half-written line is never shipped
+            end = last_line_end(f, offset, stat_result.st_size)
+
+        delta.update({
+            'offset': offset,
+            'end': end,
+            'inode': stat_result.st_ino,
+            'size': stat_result.st_size,
+        })
+    except Exception:
+        pass
+
+    return delta
+
+
+def iter_transcript(delta: dict, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the delta's bytes from the transcript file in chunks of at most chunk_size.
+    Raises OSError if the file was replaced or truncated since the delta was read,
+    so the upload fails and is retried with a fresh delta.
+    """
+    remaining = delta.get('end', 0) - delta.get('offset', 0)
+    if remaining <= 0:
+        return
+
+    with open(delta['path'], 'rb') as f:
+        if os.fstat(f.fileno()).st_ino != delta['inode']:
+            raise OSError(f"Transcript {delta['path']} was replaced while being sent")
+        f.seek(delta['offset'])
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                raise OSError(f"Transcript {delta['path']} was truncated while being sent")
+            remaining -= len(block)
+            yield block
+
+
+def read_delta_bytes(delta: dict) -> bytes:
+    """Return the delta's bytes in one piece (for small deltas and tests)."""
+    return b''.join(iter_transcript(delta))
+
+
+def commit_transcript_cursor(delta: dict) -> None:
+    """Persist the cursor after the backend accepted the delta."""
+    if not delta.get('session_id') or delta.get('inode') is None:
+        return
+    try:
+        save_json(cursor_path(delta['session_id']), {
+            'path': delta['path'],
+            'inode': delta['inode'],
+            'offset': delta['end'],
+            'size': delta['size'],
+        })
+        # Remember the chunks the backend now has (chunks encoding only)
+        acknowledge_chunks(delta['session_id'], delta.get('chunks'))
+    except Exception:
+        # A lost cursor only means the next hook resends from the start
+        pass
+
+
+def forget_session(session_id: str) -> None:
+    """Delete a session's cursor and chunk manifest once the backend has accepted its session end."""
+    if not session_id:
+        return
+    for path in (cursor_path(session_id), manifest_path(session_id)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,172 @@
+"""
+Wire encodings for insights payloads that carry transcript lines.
+
+Embedding the JSONL transcript as a JSON string means escaping megabytes of
+text that is already JSON, and sending it uncompressed. Payload builders
+therefore leave the transcript out and it is attached here, according to
+CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING:
+
+- json (default): the transcript is a `transcript` string in the JSON body,
+  exactly as before.
+- gzip: same JSON body, sent with `Content-Encoding: gzip`.
+- multipart: a multipart/form-data body with the JSON payload in a `payload`
+  part and the raw transcript bytes, compressed, in a `transcript` part. The
+  transcript is never decoded or re-escaped. In batch requests the raw lines
+  follow their record instead (each line is JSON itself, so the body stays
+  valid NDJSON) and the record says how many bytes follow.
+- chunks: the JSON body lists the transcript as content-addressed line
+  chunks and only carries the ones the backend hasn't acknowledged yet
+  (see transcript_chunks.py).
+
+The multipart transcript part is gzip-compressed, or zstd-compressed when
+CLAUDE_INSIGHTS_TRANSCRIPT_CODEC=zstd and the `zstandard` package is installed.
+
+Bodies are produced as generators that read the transcript file in chunks,
+so memory use stays flat however large the transcript is. Deltas up to
+CLAUDE_INSIGHTS_STREAM_THRESHOLD bytes (default 1 MiB) are joined into a
+single body so small requests keep a Content-Length; larger ones go out with
+chunked transfer encoding.
+"""
+
+import codecs
+import itertools
+import json
+import os
+import zlib
+
+from transcript_chunks import iter_chunk_fields
+from transcript_cursor import iter_transcript
+
+ENCODINGS = ('json', 'gzip', 'multipart', 'chunks')
+
+
+def transcript_encoding() -> str:
+    """Return the configured transcript encoding, defaulting to json."""
+    encoding = os.environ.get('CLAUDE_INSIGHTS_TRANSCRIPT_ENCODING', 'json')
+    return encoding if encoding in ENCODINGS else 'json'
+
+
+def transcript_codec() -> str:
+    """Return the compression codec for raw transcript parts (zstd only if importable)."""
+    if os.environ.get('CLAUDE_INSIGHTS_TRANSCRIPT_CODEC', 'gzip') == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+            return 'zstd'
+        except ImportError:
+            pass
+    return 'gzip'
+
+
+def stream_threshold() -> int:
+    """Return the delta size above which request bodies are streamed."""
+    return int(os.environ.get('CLAUDE_INSIGHTS_STREAM_THRESHOLD', str(1024 * 1024)))
+
+
+def delta_size(transcript: dict) -> int:
+    """Return the number of transcript bytes a delta covers."""
+    return max(0, transcript.get('end', 0) - transcript.get('offset', 0))
+
+
+def compress_stream(chunks, codec: str = 'gzip'):
+    """Compress an iterable of byte chunks, yielding compressed chunks."""
+    if codec == 'zstd':
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_transcript_field(transcript: dict):
+    """Yield the JSON text of the `transcript` string field, escaping as it reads."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    yield b'"transcript": "'
+    for block in iter_transcript(transcript):
+        text = decoder.decode(block)
+        if text:
+            yield json.dumps(text)[1:-1].encode('utf-8')
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield json.dumps(text)[1:-1].encode('utf-8')
+    yield b'"'
+
+
+def iter_fields(transcript: dict, encoding: str):
+    """Yield the JSON text of the transcript fields for a JSON body."""
+    if encoding == 'chunks':
+        return iter_chunk_fields(transcript, iter_transcript(transcript))
+    return iter_transcript_field(transcript)
+
+
+def embed(obj: dict, fields):
+    """Yield obj as JSON with the streamed fields appended as its last members."""
+    head = json.dumps(obj).encode('utf-8')
+    yield head[:-1] + (b', ' if obj else b'')
+    yield from fields
+    yield b'}'
+
+
+def finish(body, transcript: dict):
+    """Join the body of a small delta into bytes; leave a large one streaming."""
+    if delta_size(transcript) <= stream_threshold():
+        return b''.join(body)
+    return body
+
+
+def iter_multipart(payload: dict, transcript: dict, boundary: str, codec: str):
+    """Yield a multipart/form-data body with the payload and compressed transcript parts."""
+    extension = 'zst' if codec == 'zstd' else 'gz'
+    yield b''.join([
+        f'--{boundary}\r\n'.encode('ascii'),
+        b'Content-Disposition: form-data; name="payload"\r\n',
+        b'Content-Type: application/json\r\n\r\n',
+        json.dumps(payload).encode('utf-8'),
+        f'\r\n--{boundary}\r\n'.encode('ascii'),
+        f'Content-Disposition: form-data; name="transcript"; filename="transcript.jsonl.{extension}"\r\n'.encode('ascii'),
+        f'Content-Type: application/{codec}\r\n\r\n'.encode('ascii'),
+    ])
+    yield from compress_stream(iter_transcript(transcript), codec)
+    yield f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+
+def encode_request(payload: dict, transcript: dict, encoding: str = None) -> tuple:
+    """
+    Encode a payload and its transcript delta for a single request.
+    Returns the body (bytes, or a generator of bytes for large deltas) and
+    the content headers to send with it.
+    """
+    encoding = encoding or transcript_encoding()
+
+    if encoding == 'multipart':
+        # Random boundary without importing uuid (and platform) on the hook path
+        boundary = os.urandom(16).hex()
+        body = iter_multipart(payload, transcript, boundary, transcript_codec())
+        return finish(body, transcript), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+    body = embed(payload, iter_fields(transcript, encoding))
+    if encoding == 'gzip':
+        return finish(compress_stream(body), transcript), {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+        }
+    return finish(body, transcript), {'Content-Type': 'application/json'}
+
+
+def encode_batch_record(record: dict, transcript: dict, encoding: str = None):
+    """Return one batch record (an NDJSON line) with its transcript delta, as byte chunks."""
+    encoding = encoding or transcript_encoding()
+
+    if encoding == 'multipart':
+        # Raw transcript lines follow the record verbatim
+        head = json.dumps({**record, 'transcriptBytes': delta_size(transcript)}).encode('utf-8') + b'\n'
+        return itertools.chain([head], iter_transcript(transcript))
+
+    head = {key: value for key, value in record.items() if key != 'payload'}
+    payload = embed(record['payload'], iter_fields(transcript, encoding))
+    return itertools.chain(embed(head, itertools.chain([b'"payload": '], payload)), [b'\n'])
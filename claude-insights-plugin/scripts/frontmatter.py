@@ -0,0 +1,319 @@
+"""
+Streaming YAML frontmatter reader for command and agent files.
+
+Command and agent files start with a YAML block between `---` lines. The
+file is read line by line up to the closing delimiter, so callers that only
+want the metadata (read_frontmatter(..., metadata_only=True)) never load
+the body; otherwise the body is read through the byte budget in
+text_budget.py.
+
+The frontmatter is parsed by a small YAML subset parser rather than PyYAML,
+which would cost more to import than the rest of the hook. It handles what
+these files use: nested mappings, plain/quoted scalars (null, booleans and
+numbers included, unless that would change their text), multi-line plain
+scalars, block (`- item`) and flow (`[a, b]`) lists, and literal/folded
+block strings (`|`, `>`, with `-`/`+` chomping). Anything else (anchors,
+flow mappings, ...) falls back to the old one `key: value` string per line.
+"""
+
+import json
+import re
+
+from text_budget import max_file_bytes, read_remaining
+
+# Frontmatter that hasn't closed within this many bytes is treated as body text
+MAX_FRONTMATTER_BYTES = 64 * 1024
+
+KEY_PATTERN = re.compile(r'^([^\s#\-\[\]{}][^:]*?|"[^"]*"|\'[^\']*\')\s*:(?:\s+(.*))?$')
+INT_PATTERN = re.compile(r'^[-+]?(0|[1-9][0-9]*)$')
+FLOAT_PATTERN = re.compile(r'^[-+]?([0-9]+\.[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?$')
+BLOCK_INDICATOR = re.compile(r'^[|>][-+]?$')
+
+
+class FrontmatterError(ValueError):
+    """The frontmatter uses YAML this parser doesn't support."""
+
+
+def indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def is_blank(line: str) -> bool:
+    stripped = line.strip()
+    return not stripped or stripped.startswith('#')
+
+
+def strip_comment(text: str) -> str:
+    """
+    Drop a trailing ` # comment` after a quoted value. Plain values keep
+    ` #...` (`Fix issue #123`), as the old parser sent them.
+    """
+    if text[:1] in ('"', "'"):
+        quote = text[0]
+        end = 1
+        while True:
+            end = text.find(quote, end)
+            if end < 0:
+                return text
+            if quote == "'" and text[end + 1:end + 2] == "'":
+                end += 2
+                continue
+            if quote == '"' and text[end - 1] == '\\':
+                end += 1
+                continue
+            return text[:end + 1]
+    return text
+
+
+def split_flow(text: str) -> list:
+    """
+    Split the inside of a flow list on commas outside of quotes and brackets.
+    Raises FrontmatterError unless its brackets and quotes balance, i.e. the
+    list's closing `]` is the one that ends the value.
+    """
+    items = []
+    depth = 0
+    quote = None
+    current = ''
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if depth < 0:
+                raise FrontmatterError(f"unbalanced flow list [{text}]")
+        elif char == ',' and depth == 0:
+            items.append(current)
+            current = ''
+            continue
+        current += char
+    if depth or quote:
+        raise FrontmatterError(f"unbalanced flow list [{text}]")
+    if current.strip():
+        items.append(current)
+    return items
+
+
+def parse_scalar(text: str):
+    """Convert a single-line YAML scalar (or flow list) to a Python value."""
+    text = text.strip()
+    if text in ('', '~', 'null', 'Null', 'NULL'):
+        return None
+    if text in ('true', 'True', 'TRUE'):
+        return True
+    if text in ('false', 'False', 'FALSE'):
+        return False
+    if text.startswith("'") and text.endswith("'") and len(text) > 1:
+        return text[1:-1].replace("''", "'")
+    if text.startswith('"') and text.endswith('"') and len(text) > 1:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text[1:-1]
+    if text.startswith('[') and text.endswith(']'):
+        return [parse_scalar(item) for item in split_flow(text[1:-1])]
+    if text[0] in '{&*!' or text.startswith(('"', "'")):
+        raise FrontmatterError(f"unsupported value {text!r}")
+    if INT_PATTERN.match(text):
+        return int(text)
+    if FLOAT_PATTERN.match(text):
+        # Keep the text of numbers a float would change (`version: 1.10`)
+        value = float(text)
+        return value if repr(value) == text.lstrip('+') else text
+    return text
+
+
+class Parser:
+    """Recursive descent over the frontmatter lines."""
+
+    def __init__(self, lines: list):
+        self.lines = lines
+        self.i = 0
+
+    def next_significant(self):
+        """Skip blank and comment lines; return the next line or None at the end."""
+        while self.i < len(self.lines) and is_blank(self.lines[self.i]):
+            self.i += 1
+        return self.lines[self.i] if self.i < len(self.lines) else None
+
+    def parse_document(self) -> dict:
+        line = self.next_significant()
+        if line is None:
+            return {}
+        result = self.parse_mapping(indent_of(line))
+        if self.next_significant() is not None:
+            raise FrontmatterError(f"unexpected line {self.lines[self.i]!r}")
+        return result
+
+    def parse_mapping(self, indent: int) -> dict:
+        result = {}
+        while True:
+            line = self.next_significant()
+            if line is None or indent_of(line) != indent or line.lstrip().startswith('- '):
+                return result
+            match = KEY_PATTERN.match(line.strip())
+            if not match:
+                raise FrontmatterError(f"expected a key in {line!r}")
+            key = match.group(1)
+            if key[:1] in ('"', "'"):
+                key = key[1:-1]
+            self.i += 1
+            result[key] = self.parse_value(strip_comment(match.group(2) or ''), indent)
+
+    def parse_sequence(self, indent: int) -> list:
+        result = []
+        while True:
+            line = self.next_significant()
+            if line is None or indent_of(line) != indent or not (line.strip() == '-' or line.lstrip().startswith('- ')):
+                return result
+            item = line.strip()[1:]
+            if not item.strip():
+                self.i += 1
+                # The item's value is on the following, more-indented lines
+                result.append(self.parse_value('', indent + 1))
+            elif KEY_PATTERN.match(item.strip()) and not item.strip().startswith(('"', "'")):
+                # "- key: value" starts a mapping indented to where the key is
+                item_indent = indent + 1 + indent_of(item)
+                self.lines[self.i] = ' ' * item_indent + item.strip()
+                result.append(self.parse_mapping(item_indent))
+            else:
+                self.i += 1
+                result.append(self.parse_value(strip_comment(item.strip()), indent))
+
+    def parse_block_string(self, indicator: str, indent: int) -> str:
+        """Read a | or > block string whose lines are indented past indent."""
+        block = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if line.strip() and indent_of(line) <= indent:
+                break
+            block.append(line)
+            self.i += 1
+
+        content_indent = min((indent_of(line) for line in block if line.strip()), default=indent + 1)
+        block = [line[content_indent:] if line.strip() else '' for line in block]
+        trailing = 0
+        while block and block[-1] == '':
+            block.pop()
+            trailing += 1
+
+        if indicator[0] == '|':
+            text = '\n'.join(block)
+        else:
+            # Folded: lines join with spaces and blank lines become newlines;
+            # more-indented lines keep their line breaks
+            text = ''
+            previous = None
+            for line in block:
+                if line == '':
+                    text += '\n'
+                elif previous in (None, ''):
+                    text += line
+                elif line.startswith(' ') or previous.startswith(' '):
+                    text += '\n' + line
+                else:
+                    text += ' ' + line
+                previous = line
+
+        if not block:
+            return ''
+        if indicator.endswith('-'):
+            return text
+        if indicator.endswith('+'):
+            return text + '\n' * (trailing + 1)
+        return text + '\n'
+
+    def parse_value(self, text: str, indent: int):
+        """Parse the value of a key (or list item) at indent, which may continue on following lines."""
+        if BLOCK_INDICATOR.match(text):
+            return self.parse_block_string(text, indent)
+
+        if not text:
+            line = self.next_significant()
+            if line is None:
+                return None
+            child = indent_of(line)
+            is_item = line.strip() == '-' or line.lstrip().startswith('- ')
+            if is_item and child >= indent:
+                return self.parse_sequence(child)
+            if child > indent and KEY_PATTERN.match(line.strip()):
+                return self.parse_mapping(child)
+            if child > indent:
+                # A plain scalar starting on the next line
+                self.i += 1
+                return self.parse_value(strip_comment(line.strip()), indent)
+            return None
+
+        # A plain scalar may continue on more-indented lines, folded with spaces
+        if text[0] not in '"\'[':
+            while self.i < len(self.lines):
+                line = self.lines[self.i]
+                if not line.strip() or indent_of(line) <= indent:
+                    break
+                text += ' ' + strip_comment(line.strip())
+                self.i += 1
+        return parse_scalar(text)
+
+
+def parse_legacy(lines: list) -> dict:
+    """The original parser: every `key: value` line as strings."""
+    frontmatter = {}
+    for line in '\n'.join(lines).strip().split('\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            frontmatter[key.strip()] = value.strip()
+    return frontmatter
+
+
+def parse_frontmatter(lines: list) -> dict:
+    """Parse frontmatter lines as YAML, falling back to plain `key: value` pairs."""
+    try:
+        metadata = Parser(list(lines)).parse_document()
+        if isinstance(metadata, dict):
+            return metadata
+    except (FrontmatterError, RecursionError):
+        pass
+    return parse_legacy(lines)
+
+
+def read_frontmatter(path, metadata_only: bool = False, limit: int = None) -> tuple:
+    """
+    Read a markdown file's frontmatter and body.
+    Returns (metadata, body); body is None when metadata_only is set, and is
+    otherwise read within limit bytes (default max_file_bytes()).
+    """
+    limit = max_file_bytes() if limit is None else limit
+
+    with open(path, 'rb') as f:
+        lines = []
+        closed = False
+        first = f.readline(MAX_FRONTMATTER_BYTES)
+        if first.rstrip(b'\r\n') == b'---':
+            consumed = len(first)
+            while consumed < MAX_FRONTMATTER_BYTES:
+                line = f.readline(MAX_FRONTMATTER_BYTES - consumed)
+                if not line:
+                    break
+                consumed += len(line)
+                text = line.decode('utf-8', errors='replace').rstrip('\r\n')
+                if text.rstrip() in ('---', '...'):
+                    closed = True
+                    break
+                lines.append(text)
+
+        if not closed:
+            # No (complete) frontmatter: the whole file is body
+            if metadata_only:
+                return {}, None
+            f.seek(0)
+            return {}, read_remaining(f, limit)
+
+        metadata = parse_frontmatter(lines)
+        if metadata_only:
+            return metadata, None
+        return metadata, read_remaining(f, limit).strip()
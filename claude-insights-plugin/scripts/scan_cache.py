@@ -0,0 +1,144 @@
+"""
+Persistent cache for the command and agent trees scanned at session start.
+
+SessionStart fires on startup, resume, clear and compact, and users keep
+hundreds of commands under ~/.claude. Instead of walking every tree and
+reparsing every markdown file each time, two things are cached on disk:
+
+- per file: the parsed frontmatter and content, keyed by path, mtime and size;
+- per tree: its markdown file list, with the mtime of every directory in it.
+  Adding, removing or renaming an entry bumps its directory's mtime, so a
+  tree whose directories are all unchanged is not listed again.
+
+Entries stamped within a second of being cached are not trusted (a change in
+the same mtime tick would go unnoticed), the same way git treats racily clean
+index entries.
+
+The cache file's location is up to the plugin (see session_context.py).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from context_scanner import walk_markdown
+
+CACHE_VERSION = 1
+MAX_TREES = 100
+
+# Entries whose mtime is this close to when they were cached are re-checked
+RACY_WINDOW_NS = 1_000_000_000
+
+
+def load_cache(path: str):
+    """Load a cache file, returning None if it is missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cache(path: str, data: dict) -> None:
+    """Atomically write a cache file, so concurrent session starts never see a partial one."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ScanCache:
+    """On-disk cache of markdown tree listings and parsed files."""
+
+    def __init__(self, path: str, settings: dict = None):
+        """settings are whatever the parser's output depends on; a cache built with other settings is discarded."""
+        self.path = path
+        self.settings = settings or {}
+        data = load_cache(self.path)
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('settings', {}) != self.settings:
+            data = {}
+        self.trees = data.get('trees', {})
+        self.files = data.get('files', {})
+        self.dirty = False
+        # The collector may scan from several threads at once
+        self.lock = threading.Lock()
+
+    def markdown_files(self, root: str) -> list:
+        """Return the .md files under root, re-listing only if a directory changed."""
+        root = str(root)
+        tree = self.trees.get(root)
+        if tree and self._tree_unchanged(tree):
+            tree['used'] = time.time()
+            return tree['files']
+
+        listed_at = time.time_ns()
+        files, dirs = walk_markdown(root)
+        with self.lock:
+            self.trees[root] = {'dirs': dirs, 'files': files, 'listed_at': listed_at, 'used': time.time()}
+            self.dirty = True
+        return files
+
+    def _tree_unchanged(self, tree: dict) -> bool:
+        trusted_before = tree.get('listed_at', 0) - RACY_WINDOW_NS
+        for directory, mtime in tree['dirs'].items():
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                return False
+            if current != mtime or current >= trusted_before:
+                return False
+        return True
+
+    def parse(self, path: str, parser):
+        """Return parser(path), reusing the cached result while the file's stat is unchanged."""
+        path = str(path)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+
+        key = [stat_result.st_mtime_ns, stat_result.st_size]
+        entry = self.files.get(path)
+        if entry and entry['stat'] == key and stat_result.st_mtime_ns < entry['parsed_at'] - RACY_WINDOW_NS:
+            return entry['parsed']
+
+        parsed_at = time.time_ns()
+        parsed = parser(path)
+        with self.lock:
+            self.files[path] = {'stat': key, 'parsed_at': parsed_at, 'parsed': parsed}
+            self.dirty = True
+        return parsed
+
+    def save(self) -> None:
+        """Write the cache back if anything changed, dropping trees and files no longer in use."""
+        with self.lock:
+            if not self.dirty:
+                return
+
+            if len(self.trees) > MAX_TREES:
+                recent = sorted(self.trees, key=lambda root: self.trees[root].get('used', 0), reverse=True)
+                self.trees = {root: self.trees[root] for root in recent[:MAX_TREES]}
+            listed = {path for tree in self.trees.values() for path in tree['files']}
+            self.files = {path: entry for path, entry in self.files.items() if path in listed}
+
+            try:
+                save_cache(self.path, {
+                    'version': CACHE_VERSION,
+                    'settings': self.settings,
+                    'trees': self.trees,
+                    'files': self.files,
+                })
+                self.dirty = False
+            except OSError:
+                # A lost cache only means the next session start rescans
+                pass
@@ -11,110 +11,314 @@ Session End Transcript Hook
 Parses Claude Code transcript into structured format and sends to backend.
 """
 
+import itertools
 import json
+import mmap
+import os
+import struct
 import sys
-import requests
-from typing import List, Dict, Any
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List
 
+import json_codec
+from transcript_index import TranscriptIndex, index_path_for
 
-def parse_transcript(transcript_path: str) -> List[Dict[str, Any]]:
+# Entries are encoded and sent in chunks of about this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Upper bound on worker processes for parallel parsing
+MAX_PARSE_WORKERS = 8
+
+# Only user and assistant lines can carry conversation text (see parse_transcript)
+CONVERSATION_LINES = {'types': ('user', 'assistant'), 'skip_meta': True, 'skip_tools': True}
+
+# Conversation cache header: magic, transcript inode, transcript bytes covered, bytes of entries
+CACHE_HEADER = struct.Struct('<4sQQQ')
+# Bump when conversation_entries changes what it yields, so old caches are rebuilt
+CACHE_MAGIC = b'TCC1'
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; cache updates are then unlocked
+    fcntl = None
+
+
+def parallel_parse_bytes() -> int:
     """
-    Parse NDJSON transcript into structured format.
-    Returns list of transcript entries (user and assistant messages).
+    Return how many bytes of conversation lines a transcript needs before it
+    is parsed across processes (CLAUDE_INSIGHTS_PARALLEL_PARSE_BYTES, 0 disables).
     """
     try:
-        conversations = []
-
-        with open(transcript_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                entry_type = entry.get('type')
-
-                # Skip metadata entries
-                if entry_type in ['file-history-snapshot', 'summary']:
-                    continue
-
-                # Skip meta user messages (like /exit commands)
-                if entry.get('isMeta'):
-                    continue
-
-                # Parse user messages
-                if entry_type == 'user':
-                    message = entry.get('message', {})
-                    if message.get('role') == 'user':
-                        content = message.get('content', '')
-                        timestamp = entry.get('timestamp', '')
-
-                        # Extract only text content from user messages
-                        if isinstance(content, str):
-                            content_str = content
-                        elif isinstance(content, list):
-                            # Extract only text items from array
-                            text_items = []
-                            for item in content:
-                                if isinstance(item, dict) and item.get('type') == 'text':
-                                    text_items.append(item.get('text', ''))
-                            content_str = '\n'.join(text_items) if text_items else None
-                        else:
-                            content_str = None
-
-                        # Only include if there's text content
-                        if content_str:
-                            conversations.append({
-                                'role': 'user',
-                                'text': content_str,
-                                'timestamp': timestamp,
-                                'type': 'text'
-                            })
-
-                # Parse assistant messages
-                elif entry_type == 'assistant':
-                    message = entry.get('message', {})
-                    if message.get('role') == 'assistant':
-                        content_blocks = message.get('content', [])
-                        timestamp = entry.get('timestamp', '')
-
-                        # Create separate entries for each content block
-                        for block in content_blocks:
-                            block_type = block.get('type')
-
-                            if block_type == 'text':
-                                text_content = block.get('text', '')
-                                if text_content:
-                                    conversations.append({
-                                        'role': 'assistant',
-                                        'type': 'text',
-                                        'text': text_content,
-                                        'timestamp': timestamp
-                                    })
-
-                            elif block_type == 'thinking':
-                                thinking_content = block.get('thinking', '')
-                                if thinking_content:
-                                    conversations.append({
-                                        'role': 'assistant',
-                                        'type': 'thinking',
-                                        'text': thinking_content,
-                                        'timestamp': timestamp
-                                    })
-
-        return conversations
+        return int(os.environ.get('CLAUDE_INSIGHTS_PARALLEL_PARSE_BYTES', str(64 * 1024 * 1024)))
+    except ValueError:
+        return 64 * 1024 * 1024
 
+
+def parse_workers() -> int:
+    """Return the number of worker processes to parse with (the CPUs this process may use)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        cpus = os.cpu_count() or 1
+    return min(cpus, MAX_PARSE_WORKERS)
+
+
+def conversation_entries(entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield the transcript entries (user text, assistant text and thinking) of one transcript line."""
+    entry_type = entry.get('type')
+
+    # Parse user messages
+    if entry_type == 'user':
+        message = entry.get('message', {})
+        if message.get('role') == 'user':
+            content = message.get('content', '')
+            timestamp = entry.get('timestamp', '')
+
+            # Extract only text content from user messages
+            if isinstance(content, str):
+                content_str = content
+            elif isinstance(content, list):
+                # Extract only text items from array
+                text_items = []
+                for item in content:
+                    if isinstance(item, dict) and item.get('type') == 'text':
+                        text_items.append(item.get('text', ''))
+                content_str = '\n'.join(text_items) if text_items else None
+            else:
+                content_str = None
+
+            # Only include if there's text content
+            if content_str:
+                yield {
+                    'role': 'user',
+                    'text': content_str,
+                    'timestamp': timestamp,
+                    'type': 'text'
+                }
+
+    # Parse assistant messages
+    elif entry_type == 'assistant':
+        message = entry.get('message', {})
+        if message.get('role') == 'assistant':
+            content_blocks = message.get('content', [])
+            timestamp = entry.get('timestamp', '')
+
+            # Create separate entries for each content block
+            for block in content_blocks:
+                block_type = block.get('type')
+
+                if block_type == 'text':
+                    text_content = block.get('text', '')
+                    if text_content:
+                        yield {
+                            'role': 'assistant',
+                            'type': 'text',
+                            'text': text_content,
+                            'timestamp': timestamp
+                        }
+
+                elif block_type == 'thinking':
+                    thinking_content = block.get('thinking', '')
+                    if thinking_content:
+                        yield {
+                            'role': 'assistant',
+                            'type': 'thinking',
+                            'text': thinking_content,
+                            'timestamp': timestamp
+                        }
+
+
+def parse_shard(transcript_path: str, spans: List[tuple], separator: bytes = None) -> list:
+    """
+    Parse the transcript lines at the given (offset, length) spans; runs in a
+    worker process. With a separator, the entries come back JSON-encoded and
+    joined by it into a single fragment, which is far cheaper to send back to
+    the parent than dicts or one bytes object per entry.
+    """
+    entries = []
+    with open(transcript_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset, length in spans:
+            entries.extend(conversation_entries(json_codec.decode_entry(data[offset:offset + length])))
+    if separator is not None:
+        return [separator.join(json_codec.dumps(entry) for entry in entries)] if entries else []
+    return entries
+
+
+def split_spans(spans: List[tuple], count: int) -> List[List[tuple]]:
+    """Split line spans into at most count consecutive shards of about equal bytes."""
+    total = sum(length for _, length in spans)
+    shards = [[]]
+    size = 0
+    for span in spans:
+        if size >= total * len(shards) / count and len(shards) < count:
+            shards.append([])
+        shards[-1].append(span)
+        size += span[1]
+    return [shard for shard in shards if shard]
+
+
+def parse_lines(index: TranscriptIndex, lines: List[int], separator: bytes = None) -> Iterator[Any]:
+    """
+    Yield the conversation entries of the given transcript lines, in order.
+    With a separator they are yielded JSON-encoded, as fragments of one or
+    more entries joined by it.
+
+    Lines adding up to at least parallel_parse_bytes() are split at line
+    boundaries into one shard per worker process, parsed concurrently; the
+    finished shards are held in memory until they are consumed.
+    """
+    spans = [index.record(i)[:2] for i in lines]
+
+    threshold = parallel_parse_bytes()
+    workers = parse_workers()
+    if threshold and workers > 1 and sum(length for _, length in spans) >= threshold:
+        executor = None
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            shards = executor.map(parse_shard, itertools.repeat(index.path),
+                                  split_spans(spans, workers), itertools.repeat(separator))
+        except (OSError, NotImplementedError) as e:
+            # No process support (e.g. no /dev/shm or fork failed): parse in this process
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            print(f"Parsing transcript in one process: {e}", file=sys.stderr)
+        else:
+            with executor:
+                for entries in shards:
+                    yield from entries
+            return
+
+    for i in lines:
+        for entry in conversation_entries(index.load_entry(i)):
+            yield json_codec.dumps(entry) if separator is not None else entry
+
+
+def conversation_cache_path(transcript_path: str) -> str:
+    """Return the path of a transcript's parsed conversation cache."""
+    return f"{transcript_path}.conversation"
+
+
+def update_cache(index: TranscriptIndex) -> tuple:
+    """
+    Bring the conversation cache up to date with the transcript's complete
+    lines, parsing only the lines added since it was last updated. The cache
+    holds the JSON-encoded entries one per line after a header recording the
+    transcript bytes they cover. Returns (bytes of entries, transcript bytes covered).
+    """
+    # Private like the transcript itself: it holds the whole conversation
+    fd = os.open(conversation_cache_path(index.path), os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, 'r+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+        header = f.read(CACHE_HEADER.size)
+        magic, inode, covered, size = (
+            CACHE_HEADER.unpack(header) if len(header) == CACHE_HEADER.size else (b'', 0, 0, 0)
+        )
+        if magic != CACHE_MAGIC or inode != index.inode or covered > index.complete \
+                or os.fstat(f.fileno()).st_size < CACHE_HEADER.size + size:
+            # New, replaced or truncated transcript (or a cache cut short): start over
+            covered, size = 0, 0
+
+        if covered < index.complete:
+            lines = list(index.entries(start=index.line_at(covered), stop=index.line_at(index.complete), **CONVERSATION_LINES))
+            # Entries past `size` are left over from an update that didn't finish
+            f.seek(CACHE_HEADER.size + size)
+            for fragment in parse_lines(index, lines, separator=b'\n'):
+                f.write(fragment + b'\n')
+                size += len(fragment) + 1
+            f.truncate()
+            covered = index.complete
+            # Header last, so a reader never sees entries it can't find
+            f.seek(0)
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, index.inode, covered, size))
+    return size, covered
+
+
+def remove_cache(transcript_path: str):
+    """Delete the transcript's conversation cache and line index (once the session is over)."""
+    for path in (conversation_cache_path(transcript_path), index_path_for(transcript_path)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def read_cache(transcript_path: str, size: int) -> Iterator[bytes]:
+    """Yield the first `size` bytes of cached entries as fragments of entries joined by ', '."""
+    with open(conversation_cache_path(transcript_path), 'rb') as f:
+        f.seek(CACHE_HEADER.size)
+        pending = b''
+        while size > 0:
+            block = f.read(min(STREAM_CHUNK_BYTES, size))
+            if not block:
+                break
+            size -= len(block)
+            # Cut after the last complete entry; the rest waits for the next block
+            block = pending + block
+            cut = block.rfind(b'\n') + 1
+            pending = block[cut:]
+            if cut:
+                yield block[:cut - 1].replace(b'\n', b', ')
+
+
+def parse_transcript(transcript_path: str, encoded: bool = False) -> Iterator[Any]:
+    """
+    Parse NDJSON transcript into structured format.
+    Yields transcript entries (user and assistant messages) as the file is
+    read, so only one transcript line is decoded at a time (large
+    transcripts are parsed in parallel, see parse_lines). A missing
+    transcript yields nothing; other read errors are raised to the consumer.
+
+    With encoded, entries are yielded as JSON bytes for transcript_body
+    (possibly several joined by ', '), and come from the conversation cache:
+    it is brought up to date first, so only the lines added since the last
+    Stop hook are decoded.
+    """
+    try:
+        index = TranscriptIndex(transcript_path)
     except FileNotFoundError:
         print(f"Error: Transcript file not found at {transcript_path}", file=sys.stderr)
-        return []
-    except Exception as e:
-        print(f"Error parsing transcript: {str(e)}", file=sys.stderr)
-        return []
+        return
+
+    # Jump straight to non-meta user/assistant entries via the line index
+    # (metadata entries, meta user messages like /exit and tool calls and
+    # results, which carry no conversation text, are skipped undecoded)
+    with index:
+        start = 0
+        if encoded:
+            try:
+                size, covered = update_cache(index)
+            except OSError as e:
+                # E.g. a read-only transcript directory: parse everything
+                print(f"Conversation cache unavailable: {e}", file=sys.stderr)
+            else:
+                yield from read_cache(transcript_path, size)
+                start = index.line_at(covered)
+
+        lines = list(index.entries(start=start, **CONVERSATION_LINES))
+        yield from parse_lines(index, lines, separator=b', ' if encoded else None)
+
+
+def transcript_body(session_id: str, transcript: Iterable[Any]) -> Iterator[bytes]:
+    """
+    Yield the JSON request body {"sessionId": ..., "transcript": [...]} in
+    chunks of about STREAM_CHUNK_BYTES, encoding entries as they arrive
+    (entries from parse_transcript(encoded=True) are JSON bytes already,
+    possibly several entries joined by ', ').
+    """
+    buffer = [b'{"sessionId": ' + json_codec.dumps(session_id) + b', "transcript": [']
+    size = 0
+    for n, entry in enumerate(transcript):
+        encoded = (b', ' if n else b'') + (entry if isinstance(entry, bytes) else json_codec.dumps(entry))
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(b']}')
+    yield b''.join(buffer)
 
 
 def format_conversations(conversations: List[Dict[str, Any]]) -> str:
@@ -195,16 +399,21 @@ def format_conversations(conversations: List[Dict[str, Any]]) -> str:
     return '\n'.join(formatted_lines)
 
 
-def send_to_backend(session_id: str, transcript: List[Dict[str, Any]], api_url: str = "http://localhost:3999") -> bool:
-    """Send structured transcript to backend API."""
+def send_to_backend(session_id: str, transcript: Iterable[Any], api_url: str = "http://localhost:3999") -> bool:
+    """
+    Send structured transcript to backend API.
+    The body is streamed with chunked transfer encoding while the transcript
+    is still being parsed, so it is never held in memory whole.
+    """
+    # Imported here, so the Stop hook can use the parser without loading requests
     try:
-        import os
+        import requests
+    except ImportError:
+        print("Error: requests library not available", file=sys.stderr)
+        return False
 
+    try:
         endpoint = f"{api_url}/api/sessions/{session_id}/transcript"
-        payload = {
-            "sessionId": session_id,
-            "transcript": transcript
-        }
 
         # Prepare headers with Authorization if API key is set
         headers = {"Content-Type": "application/json"}
@@ -214,7 +423,7 @@ def send_to_backend(session_id: str, transcript: List[Dict[str, Any]], api_url:
 
         response = requests.put(
             endpoint,
-            json=payload,
+            data=transcript_body(session_id, transcript),
             headers=headers,
             timeout=10
         )
@@ -241,11 +450,15 @@ def main():
         if not session_id or not transcript_path:
             sys.exit(0)
 
-        # Parse transcript into structured data
-        transcript = parse_transcript(transcript_path)
+        # Parse transcript into structured data, lazily: entries are parsed as they are uploaded
+        transcript = parse_transcript(transcript_path, encoded=True)
 
         # Send to backend
-        send_to_backend(session_id, transcript)
+        try:
+            send_to_backend(session_id, transcript)
+        finally:
+            # The session is over: don't leave a copy of the conversation behind
+            remove_cache(transcript_path)
 
         # Always exit successfully to not block session end
         sys.exit(0)
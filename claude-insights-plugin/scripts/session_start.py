@@ -1,302 +1,34 @@
 #!/usr/bin/env python3
-import json
-import sys
-import urllib.request
-import urllib.error
 import os
-import re
-from pathlib import Path
 
+from session_context import SessionContext, hook_input, project_name, run
 
-def parse_command_file(file_path):
-    """Parse a command markdown file and extract metadata and content."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+# Payload sent to the sessions API (see session_context.py for the schema format)
+SCHEMA = {
+    'sessionId': hook_input('session_id'),
+    'projectName': project_name,
+    'projectMemory': 'memory',
+    'projectReadme': 'readme',
+    'projectCommands': 'projectCommands',
+    'projectAgents': 'projectAgents',
+    'userCommands': 'userCommands',
+    'userAgents': 'userAgents',
+}
 
-        # Extract frontmatter if present
-        frontmatter = {}
-        command_content = content
+URL = 'http://localhost:3999/api/sessions'
 
-        if content.startswith('---'):
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                # Parse frontmatter
-                frontmatter_text = parts[1].strip()
-                for line in frontmatter_text.split('\n'):
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        frontmatter[key.strip()] = value.strip()
 
-                # Get content after frontmatter
-                command_content = parts[2].strip()
+def scan_cache_file():
+    """Parsed command and agent files are kept here between session starts."""
+    return os.path.join(os.path.expanduser('~'), '.claude', 'insights', 'scan-cache.json')
 
-        return {
-            'metadata': frontmatter,
-            'content': command_content
-        }
-    except Exception as e:
-        print(f"Error parsing command file {file_path}: {e}", file=sys.stderr)
-        return None
 
-
-def collect_project_commands(cwd):
-    """Collect all slash commands from .claude/commands/ directory."""
-    if not cwd:
-        return []
-
-    commands_dir = Path(cwd) / '.claude' / 'commands'
-    if not commands_dir.exists():
-        return []
-
-    commands = []
-
-    # Recursively find all .md files in commands directory
-    for md_file in commands_dir.rglob('*.md'):
-        # Get command name and namespace from file path relative to commands dir
-        relative_path = md_file.relative_to(commands_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested commands)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Command is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Command name is just the filename without extension
-        command_name = relative_path.stem
-
-        # Parse the command file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            commands.append({
-                'name': command_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return commands
-
-
-def collect_project_agents(cwd):
-    """Collect all agents from .claude/agents/ directory."""
-    if not cwd:
-        return []
-
-    agents_dir = Path(cwd) / '.claude' / 'agents'
-    if not agents_dir.exists():
-        return []
-
-    agents = []
-
-    # Recursively find all .md files in agents directory
-    for md_file in agents_dir.rglob('*.md'):
-        # Get agent name and namespace from file path relative to agents dir
-        relative_path = md_file.relative_to(agents_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested agents)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Agent is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Agent name is just the filename without extension
-        agent_name = relative_path.stem
-
-        # Parse the agent file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            agents.append({
-                'name': agent_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return agents
-
-
-def collect_user_commands():
-    """Collect all user-level slash commands from ~/.claude/commands/ directory."""
-    home_dir = os.path.expanduser('~')
-    commands_dir = Path(home_dir) / '.claude' / 'commands'
-
-    if not commands_dir.exists():
-        return []
-
-    commands = []
-
-    # Recursively find all .md files in commands directory
-    for md_file in commands_dir.rglob('*.md'):
-        # Get command name and namespace from file path relative to commands dir
-        relative_path = md_file.relative_to(commands_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested commands)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Command is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Command name is just the filename without extension
-        command_name = relative_path.stem
-
-        # Parse the command file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            commands.append({
-                'name': command_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return commands
-
-
-def collect_user_agents():
-    """Collect all user-level agents from ~/.claude/agents/ directory."""
-    home_dir = os.path.expanduser('~')
-    agents_dir = Path(home_dir) / '.claude' / 'agents'
-
-    if not agents_dir.exists():
-        return []
-
-    agents = []
-
-    # Recursively find all .md files in agents directory
-    for md_file in agents_dir.rglob('*.md'):
-        # Get agent name and namespace from file path relative to agents dir
-        relative_path = md_file.relative_to(agents_dir)
-
-        # Extract namespace (empty string for root, subfolder name for nested agents)
-        namespace = ''
-        if len(relative_path.parts) > 1:
-            # Agent is in a subfolder, use the immediate parent folder as namespace
-            namespace = relative_path.parts[0]
-
-        # Agent name is just the filename without extension
-        agent_name = relative_path.stem
-
-        # Parse the agent file
-        parsed = parse_command_file(md_file)
-        if parsed:
-            agents.append({
-                'name': agent_name,
-                'namespace': namespace,
-                'metadata': parsed['metadata'],
-                'content': parsed['content']
-            })
-
-    return agents
+CONTEXT = SessionContext(SCHEMA, cache_file=scan_cache_file)
 
 
 def main():
-    try:
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-
-        # Extract session information
-        session_id = input_data.get('session_id', 'unknown')
-        transcript_path = input_data.get('transcript_path', '')
-        cwd = input_data.get('cwd', '')
-
-        # Extract project name from cwd
-        project_name = os.path.basename(cwd) if cwd else 'unknown'
-
-        # Read AGENTS.md first, fallback to CLAUDE.md from project directory
-        project_memory = ''
-        if cwd:
-            # Try AGENTS.md first
-            agents_md_path = os.path.join(cwd, 'AGENTS.md')
-            claude_md_path = os.path.join(cwd, 'CLAUDE.md')
-
-            try:
-                with open(agents_md_path, 'r', encoding='utf-8') as f:
-                    project_memory = f.read()
-            except FileNotFoundError:
-                # AGENTS.md doesn't exist, try CLAUDE.md
-                try:
-                    with open(claude_md_path, 'r', encoding='utf-8') as f:
-                        project_memory = f.read()
-                except FileNotFoundError:
-                    # Neither file exists, leave empty
-                    pass
-                except Exception as e:
-                    # Log but don't fail if we can't read CLAUDE.md
-                    print(f"Could not read CLAUDE.md: {e}", file=sys.stderr)
-            except Exception as e:
-                # Log but don't fail if we can't read AGENTS.md
-                print(f"Could not read AGENTS.md: {e}", file=sys.stderr)
-
-        # Read README.md from project directory
-        project_readme = ''
-        if cwd:
-            readme_path = os.path.join(cwd, 'README.md')
-            try:
-                with open(readme_path, 'r', encoding='utf-8') as f:
-                    project_readme = f.read()
-            except FileNotFoundError:
-                # README.md doesn't exist, leave empty
-                pass
-            except Exception as e:
-                # Log but don't fail if we can't read README.md
-                print(f"Could not read README.md: {e}", file=sys.stderr)
-
-        # Collect project commands and agents
-        project_commands = collect_project_commands(cwd)
-        project_agents = collect_project_agents(cwd)
-
-        # Collect user-level commands and agents
-        user_commands = collect_user_commands()
-        user_agents = collect_user_agents()
-
-        # Prepare payload for API
-        payload = {
-            'sessionId': session_id,
-            'projectName': project_name,
-            'projectMemory': project_memory,
-            'projectReadme': project_readme,
-            'projectCommands': project_commands,
-            'projectAgents': project_agents,
-            'userCommands': user_commands,
-            'userAgents': user_agents,
-        }
-
-        # Make POST request to localhost:3000/api/sessions
-        url = 'http://localhost:3999/api/sessions'
-        headers = {
-            'Content-Type': 'application/json'
-        }
-
-        # Add Authorization header if API key is set
-        api_key = os.environ.get('CLAUDE_INSIGHTS_API_KEY', '')
-        if api_key:
-            headers['x-api-key'] = api_key
-
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            response_data = response.read()
-            # Optionally log success
-            # print(f"Session {session_id} logged successfully", file=sys.stderr)
-
-        # Success
-        sys.exit(0)
-
-    except json.JSONDecodeError as e:
-        # Handle JSON decode errors gracefully
-        print(f"JSON decode error: {e}", file=sys.stderr)
-        sys.exit(0)
-    except urllib.error.URLError as e:
-        # Handle network errors gracefully (API might not be running)
-        print(f"Failed to connect to API: {e}", file=sys.stderr)
-        sys.exit(0)
-    except Exception as e:
-        # Handle any other errors gracefully
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(0)
+    run(CONTEXT, URL)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
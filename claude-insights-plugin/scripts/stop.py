@@ -0,0 +1,42 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = []
+# ///
+
+"""
+Stop Hook
+Brings the transcript's conversation cache up to date after each response,
+so SessionEnd only has to parse the last few lines (see session_end_transcript.py).
+"""
+
+import json
+import sys
+
+from session_end_transcript import update_cache
+from transcript_index import TranscriptIndex
+
+
+def main():
+    try:
+        # Read JSON input from stdin
+        input_data = json.loads(sys.stdin.read())
+
+        transcript_path = input_data.get('transcript_path')
+        if not transcript_path:
+            sys.exit(0)
+
+        with TranscriptIndex(transcript_path) as index:
+            update_cache(index)
+
+        # Always exit successfully to not block the session
+        sys.exit(0)
+
+    except json.JSONDecodeError:
+        sys.exit(0)
+    except Exception:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
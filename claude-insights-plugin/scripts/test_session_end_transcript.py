@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Unit tests for session_end_transcript.py streamed transcript upload."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import session_end_transcript
+import stop
+from transcript_index import TranscriptIndex
+
+
+class TestSessionEndTranscript(unittest.TestCase):
+    """Test cases for parsing and streaming the transcript."""
+
+    def setUp(self):
+        """Set up a temporary transcript with user, assistant and meta lines."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        lines = [
+            {'type': 'user', 'timestamp': 't1', 'message': {'role': 'user', 'content': 'Fix the bug'}},
+            {'type': 'user', 'isMeta': True, 'message': {'role': 'user', 'content': '/exit'}},
+            {'type': 'assistant', 'timestamp': 't2', 'message': {'role': 'assistant', 'content': [
+                {'type': 'thinking', 'thinking': 'Looking'},
+                {'type': 'tool_use', 'name': 'Read'},
+                {'type': 'text', 'text': 'Fixed'},
+            ]}},
+            {'type': 'file-history-snapshot', 'snapshot': {}},
+        ]
+        with open(self.transcript_path, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_transcript_yields_conversation_entries(self):
+        """Test that text and thinking entries are yielded in order, meta lines skipped."""
+        entries = session_end_transcript.parse_transcript(self.transcript_path)
+        self.assertNotIsInstance(entries, list)
+        self.assertEqual([(entry['role'], entry['type'], entry['text']) for entry in entries], [
+            ('user', 'text', 'Fix the bug'),
+            ('assistant', 'thinking', 'Looking'),
+            ('assistant', 'text', 'Fixed'),
+        ])
+
+    def test_text_after_tool_blocks_is_kept(self):
+        """Test that text in a message that starts with a tool block is still yielded."""
+        with open(self.transcript_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'user', 'timestamp': 't3', 'message': {'role': 'user', 'content': [
+                {'type': 'tool_result', 'content': 'ok'}, {'type': 'text', 'text': 'Now run the tests'}]}}) + '\n')
+            f.write(json.dumps({'type': 'assistant', 'timestamp': 't4', 'message': {'role': 'assistant', 'content': [
+                {'type': 'tool_use', 'name': 'Bash'}, {'type': 'text', 'text': 'Running them'}]}}) + '\n')
+
+        texts = [entry['text'] for entry in session_end_transcript.parse_transcript(self.transcript_path)]
+        self.assertEqual(texts, ['Fix the bug', 'Looking', 'Fixed', 'Now run the tests', 'Running them'])
+        self.assertEqual([entry['text'] for entry in self.encoded_transcript()], texts)
+
+    def test_missing_transcript_yields_nothing(self):
+        """Test that a missing transcript is an empty transcript."""
+        with patch('sys.stderr'):
+            self.assertEqual(list(session_end_transcript.parse_transcript(os.path.join(self.tmp.name, 'gone.jsonl'))), [])
+
+    def test_split_spans_keeps_lines_in_order(self):
+        """Test that shards are consecutive runs of lines of about equal bytes."""
+        spans = [(i * 100, 90 if i % 3 else 10) for i in range(30)]
+        shards = session_end_transcript.split_spans(spans, 4)
+
+        self.assertEqual([span for shard in shards for span in shard], spans)
+        self.assertEqual(len(shards), 4)
+        sizes = [sum(length for _, length in shard) for shard in shards]
+        self.assertLess(max(sizes) - min(sizes), 200)
+        # Fewer lines than workers: one line per shard
+        self.assertEqual(session_end_transcript.split_spans([(0, 50), (60, 50)], 4), [[(0, 50)], [(60, 50)]])
+
+    def test_large_transcript_is_parsed_in_parallel(self):
+        """Test that transcripts over the threshold are parsed in worker processes, in order."""
+        with open(self.transcript_path, 'a', encoding='utf-8') as f:
+            for n in range(200):
+                f.write(json.dumps({'type': 'user', 'timestamp': f't{n}', 'message': {'role': 'user', 'content': f'Prompt {n}'}}) + '\n')
+        serial = list(session_end_transcript.parse_transcript(self.transcript_path))
+
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_PARALLEL_PARSE_BYTES': '1'}), \
+                patch.object(session_end_transcript, 'parse_workers', return_value=3), \
+                patch.object(session_end_transcript, 'ProcessPoolExecutor',
+                             wraps=session_end_transcript.ProcessPoolExecutor) as executor:
+            parallel = list(session_end_transcript.parse_transcript(self.transcript_path))
+            # Encoded shards come back as one JSON fragment per worker
+            with TranscriptIndex(self.transcript_path) as index:
+                lines = list(index.entries(**session_end_transcript.CONVERSATION_LINES))
+                fragments = list(session_end_transcript.parse_lines(index, lines, separator=b', '))
+
+        self.assertEqual(executor.call_count, 2)
+        executor.assert_called_with(max_workers=3)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(len(parallel), 203)
+        self.assertEqual(len(fragments), 3)
+        body = b''.join(session_end_transcript.transcript_body('s', fragments))
+        self.assertEqual(json.loads(body), {'sessionId': 's', 'transcript': serial})
+
+    def encoded_transcript(self):
+        """Return the transcript as SessionEnd sends it, decoded."""
+        fragments = session_end_transcript.parse_transcript(self.transcript_path, encoded=True)
+        return json.loads(b''.join(session_end_transcript.transcript_body('s', fragments)))['transcript']
+
+    def test_conversation_cache_parses_only_new_lines(self):
+        """Test that SessionEnd decodes only the lines added since the cache was updated."""
+        with TranscriptIndex(self.transcript_path) as index:
+            self.assertEqual(session_end_transcript.update_cache(index)[1], os.path.getsize(self.transcript_path))
+        with open(self.transcript_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'user', 'timestamp': 't3', 'message': {'role': 'user', 'content': 'Thanks'}}) + '\n')
+            # Still being written: never cached
+            f.write('{"type": "user", "timestamp": "t4", "message": {"role": "user", "content": "Bye"}}')
+
+        with patch.object(session_end_transcript, 'conversation_entries',
+                          wraps=session_end_transcript.conversation_entries) as parsed:
+            transcript = self.encoded_transcript()
+
+        self.assertEqual(parsed.call_count, 2)
+        self.assertEqual(transcript, list(session_end_transcript.parse_transcript(self.transcript_path)))
+        self.assertEqual([entry['text'] for entry in transcript], ['Fix the bug', 'Looking', 'Fixed', 'Thanks', 'Bye'])
+
+    def test_conversation_cache_is_rebuilt_for_a_new_transcript(self):
+        """Test that a rewritten transcript, or a cache cut short, starts the cache over."""
+        self.encoded_transcript()
+        with open(self.transcript_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'user', 'message': {'role': 'user', 'content': 'Compacted'}}) + '\n')
+        self.assertEqual([entry['text'] for entry in self.encoded_transcript()], ['Compacted'])
+
+        with open(session_end_transcript.conversation_cache_path(self.transcript_path), 'r+b') as f:
+            f.truncate(session_end_transcript.CACHE_HEADER.size + 3)
+        self.assertEqual([entry['text'] for entry in self.encoded_transcript()], ['Compacted'])
+
+    def test_stop_hook_updates_the_cache(self):
+        """Test that the Stop hook brings the cache up to date, so SessionEnd decodes nothing."""
+        with patch('sys.stdin', io.StringIO(json.dumps({'transcript_path': self.transcript_path}))), \
+                self.assertRaises(SystemExit) as exit:
+            stop.main()
+        self.assertEqual(exit.exception.code, 0)
+
+        with patch.object(session_end_transcript, 'conversation_entries') as parsed:
+            self.assertEqual([entry['text'] for entry in self.encoded_transcript()], ['Fix the bug', 'Looking', 'Fixed'])
+        parsed.assert_not_called()
+
+    def test_streamed_body_matches_the_json_payload(self):
+        """Test that the chunked body decodes to the same payload as before."""
+        entries = list(session_end_transcript.parse_transcript(self.transcript_path)) * 500
+        with patch.object(session_end_transcript, 'STREAM_CHUNK_BYTES', 1024):
+            chunks = list(session_end_transcript.transcript_body('test-session-123', iter(entries)))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks)), {'sessionId': 'test-session-123', 'transcript': entries})
+        self.assertEqual(json.loads(b''.join(session_end_transcript.transcript_body('s', []))),
+                         {'sessionId': 's', 'transcript': []})
+
+    def test_conversation_cache_is_private(self):
+        """Test that the cache, which holds the whole conversation, is only readable by its owner."""
+        self.encoded_transcript()
+        self.assertEqual(os.stat(session_end_transcript.conversation_cache_path(self.transcript_path)).st_mode & 0o777, 0o600)
+
+    @patch.object(session_end_transcript, 'send_to_backend', return_value=False)
+    def test_session_end_removes_the_cache(self, send):
+        """Test that SessionEnd deletes the cache and line index after sending, even if sending failed."""
+        with TranscriptIndex(self.transcript_path) as index:
+            session_end_transcript.update_cache(index)
+        stdin = json.dumps({'session_id': 's', 'transcript_path': self.transcript_path})
+        with patch('sys.stdin', io.StringIO(stdin)), self.assertRaises(SystemExit):
+            session_end_transcript.main()
+
+        send.assert_called_once()
+        self.assertEqual(os.listdir(self.tmp.name), ['session.jsonl'])
+
+    @patch('requests.put')
+    def test_send_to_backend_streams_the_body(self, mock_put):
+        """Test that the transcript is handed to requests as a generator."""
+        mock_put.return_value = MagicMock(status_code=200)
+        ok = session_end_transcript.send_to_backend(
+            'test-session-123', session_end_transcript.parse_transcript(self.transcript_path))
+
+        self.assertTrue(ok)
+        body = mock_put.call_args.kwargs['data']
+        self.assertNotIsInstance(body, (bytes, str))
+        self.assertEqual(len(json.loads(b''.join(body))['transcript']), 3)
+        self.assertEqual(mock_put.call_args.args[0], 'http://localhost:3999/api/sessions/test-session-123/transcript')
+
+
+if __name__ == '__main__':
+    unittest.main()
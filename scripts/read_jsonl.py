@@ -6,6 +6,10 @@ import json
 import sys
 from pathlib import Path
 
+# Shared transcript reader (see shared/transcript_index.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'shared'))
+from transcript_index import TranscriptIndex
+
 
 def read_jsonl(file_path):
     """Read and print JSONL file line by line, extracting structured data for user/assistant messages"""
@@ -20,15 +24,22 @@ def read_jsonl(file_path):
 
     line_number = 0
     filtered_count = 0
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    # A one-off read: index in memory rather than leaving an .idx file beside the transcript
+    with TranscriptIndex(str(path), sidecar=False) as index:
+        for i in index.entries():
+            line_number = i + 1
+
+            # The index knows each line's role, so only messages (and broken lines) get parsed;
+            # messages of only tool calls and results have no text to show
+            _, _, entry_type, role, is_meta, is_tool = index.record(i)
+            if entry_type != 'invalid' and (is_meta or is_tool or role is None):
+                if is_tool and role == 'assistant' and not is_meta:
+                    # Assistant messages are counted even when there's no text to show
+                    filtered_count += 1
                 continue
 
-            line_number += 1
             try:
-                data = json.loads(line)
+                data = index.load_entry(i)
 
                 # Skip lines with isMeta: true
                 if data.get('isMeta') is True:
@@ -101,7 +112,9 @@ def read_jsonl(file_path):
                             print(json.dumps(extracted, indent=2, ensure_ascii=False))
                             print()
 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
+                # JSON errors, or bytes that aren't UTF-8
+                line = index.line(i).decode('utf-8', errors='replace').strip()
                 print(f"\n--- Line {line_number} (Parse Error) ---")
                 print(f"Error: {e}")
                 print(f"Raw content: {line[:200]}...")
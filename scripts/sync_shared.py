@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Copy the shared modules in shared/ into the plugins that use them.
+
+Each plugin is installed on its own (hooks refer to ${CLAUDE_PLUGIN_ROOT}),
+so a module several plugins import has to ship inside each of them. The
+copy in shared/ is the one to edit; run this script afterwards, or with
+--check to fail if any plugin copy is out of date.
+"""
+import argparse
+import filecmp
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Session start collection, used by every insights plugin (see session_context.py)
+SESSION_CONTEXT_PLUGINS = [
+    'claude-insights-plugin/scripts',
+    'claude-insights-dev-plugin/scripts',
+    'claude-insights-local-plugin/scripts',
+]
+
+# Transcript readers (see transcript_index.py and json_codec.py)
+TRANSCRIPT_PLUGINS = [
+    'claude-insights-plugin/scripts',
+    'claude-insights-dev-plugin/scripts',
+    'text-to-speech-plugin/scripts',
+]
+
+# Shared module -> plugin script directories it is copied into
+TARGETS = {
+    'transcript_index.py': TRANSCRIPT_PLUGINS,
+    'json_codec.py': TRANSCRIPT_PLUGINS,
+    'session_context.py': SESSION_CONTEXT_PLUGINS,
+    'context_scanner.py': SESSION_CONTEXT_PLUGINS,
+    'frontmatter.py': SESSION_CONTEXT_PLUGINS,
+    'scan_cache.py': SESSION_CONTEXT_PLUGINS,
+    'text_budget.py': SESSION_CONTEXT_PLUGINS,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync shared modules into plugins')
+    parser.add_argument('--check', action='store_true', help='Only report out-of-date copies')
+    args = parser.parse_args()
+
+    stale = []
+    for name, directories in TARGETS.items():
+        source = ROOT / 'shared' / name
+        for directory in directories:
+            target = ROOT / directory / name
+            if target.exists() and filecmp.cmp(source, target, shallow=False):
+                continue
+            stale.append(target)
+            if not args.check:
+                shutil.copyfile(source, target)
+                print(f"Updated {target.relative_to(ROOT)}")
+
+    if args.check and stale:
+        for target in stale:
+            print(f"Out of date: {target.relative_to(ROOT)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+JSON codec for the bulk transcript paths.
+
+Transcripts run to hundreds of MB, so the places that do bulk JSON work
+on them (SessionEnd's transcript upload, read_jsonl, the text-to-speech
+chat dump) go through this module. It uses msgspec or orjson when one is
+installed and falls back to the standard library otherwise, choosing in
+that order unless CLAUDE_INSIGHTS_JSON_CODEC names one (msgspec, orjson or
+json). Neither package is required; the stdlib codec produces exactly the
+bytes the hooks sent before.
+
+The codec is chosen (and imported) on first use. Importing orjson costs
+6-10 ms, more than it saves on a session start payload or a per-event hook
+body, so those stay on the json module.
+
+- loads(data): decode JSON text (bytes or str).
+- dumps(obj): encode to UTF-8 bytes.
+- dumps_indented(obj): encode to bytes with a two-space indent.
+- decode_entry(line): decode one transcript line for the conversation
+  readers. With msgspec the line is decoded into the typed structs below,
+  which skip everything but the conversation fields (tool inputs,
+  toolUseResult, usage, ...) without building them; the result is a plain
+  dict either way. Lines that don't fit the structs are decoded as usual.
+
+Decode errors are raised as json.JSONDecodeError (a ValueError) whatever
+the codec, so callers keep catching what they caught before.
+
+This file is the canonical copy; scripts/sync_shared.py copies it into each
+plugin that uses it. Edit it here and re-run the sync script.
+"""
+
+import json
+import os
+from typing import Any, Callable, List, NamedTuple, Optional, Union
+
+# Codecs tried in order when none is configured
+PREFERENCE = ('msgspec', 'orjson', 'json')
+
+
+class Codec(NamedTuple):
+    """One JSON implementation's entry points (see the module docstring)."""
+    name: str
+    loads: Callable[[Any], Any]
+    dumps: Callable[[Any], bytes]
+    dumps_indented: Callable[[Any], bytes]
+    decode_entry: Callable[[Any], dict]
+
+
+def stdlib_codec() -> Codec:
+    def dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def dumps_indented(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
+
+    return Codec('json', json.loads, dumps, dumps_indented, json.loads)
+
+
+def orjson_codec() -> Codec:
+    import orjson
+
+    # orjson.JSONDecodeError is a json.JSONDecodeError already
+    def dumps_indented(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    return Codec('orjson', orjson.loads, orjson.dumps, dumps_indented, orjson.loads)
+
+
+def msgspec_codec() -> Codec:
+    import msgspec
+
+    # Only the fields the conversation readers look at; others are skipped
+    class ContentBlock(msgspec.Struct, omit_defaults=True):
+        type: Optional[str] = None
+        text: Optional[str] = None
+        thinking: Optional[str] = None
+
+    class Message(msgspec.Struct, omit_defaults=True):
+        role: Optional[str] = None
+        content: Union[str, List[ContentBlock], None] = None
+
+    class TranscriptEntry(msgspec.Struct, omit_defaults=True):
+        type: Optional[str] = None
+        timestamp: Optional[str] = None
+        isMeta: Optional[bool] = None
+        message: Optional[Message] = None
+
+    decoder = msgspec.json.Decoder()
+    entry_decoder = msgspec.json.Decoder(TranscriptEntry)
+    encoder = msgspec.json.Encoder()
+
+    def loads(data):
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else '', 0) from None
+
+    def dumps_indented(obj):
+        return msgspec.json.format(encoder.encode(obj), indent=2)
+
+    def decode_entry(line):
+        try:
+            return msgspec.to_builtins(entry_decoder.decode(line))
+        except msgspec.DecodeError:
+            # Valid JSON of another shape (e.g. a string message), or not JSON at all
+            return loads(line)
+
+    return Codec('msgspec', loads, encoder.encode, dumps_indented, decode_entry)
+
+
+CODECS = {
+    'msgspec': msgspec_codec,
+    'orjson': orjson_codec,
+    'json': stdlib_codec,
+}
+
+
+def load_codec(name: str = None) -> Codec:
+    """
+    Return the named codec, or the first importable one in PREFERENCE
+    (after the one CLAUDE_INSIGHTS_JSON_CODEC names, if any). Falls back to
+    the stdlib codec if the one asked for isn't installed.
+    """
+    if name is None:
+        configured = os.environ.get('CLAUDE_INSIGHTS_JSON_CODEC', '')
+        names = ((configured,) if configured in CODECS else ()) + PREFERENCE
+    else:
+        names = (name,)
+
+    for candidate in names:
+        try:
+            return CODECS[candidate]()
+        except ImportError:
+            continue
+    return stdlib_codec()
+
+
+_codec = None
+
+
+def codec() -> Codec:
+    """Return the codec in use, choosing it on first use (importing orjson or msgspec takes several ms)."""
+    global _codec
+    if _codec is None:
+        _codec = load_codec()
+    return _codec
+
+
+def loads(data):
+    return codec().loads(data)
+
+
+def dumps(obj) -> bytes:
+    return codec().dumps(obj)
+
+
+def dumps_indented(obj) -> bytes:
+    return codec().dumps_indented(obj)
+
+
+def decode_entry(line) -> dict:
+    return codec().decode_entry(line)
@@ -0,0 +1,367 @@
+"""
+Session start context collection shared by the insights plugins.
+
+Every insights plugin sends the same project context when a session starts
+(memory, README, command and agent trees, ...); they differ only in how the
+payload is shaped and where it goes. Each plugin's session_start.py creates
+one SessionContext with its payload schema and sends what it builds to its
+own target, so the scan cache, the parallel collectors and the byte budgets
+below apply to all of them.
+
+A payload schema maps each payload field to where its value comes from:
+
+- a collector name: that collector's result ('memory', 'readme',
+  'mcpServers', a tree such as 'projectCommands', or one the plugin added);
+- hook_input(key): a field of the hook's input;
+- leveled(kind): the project then user entries of a kind, tagged with
+  their level;
+- any other function of (input_data, collected).
+
+Only the collectors the schema refers to are run. Collectors run
+concurrently under CLAUDE_INSIGHTS_SESSION_START_DEADLINE seconds (default
+3); fields whose collector missed it are sent empty and listed in `partial`.
+File bodies are held to the byte budgets in text_budget.py, and parsed
+command and agent files are kept in a scan cache (scan_cache.py) if the
+plugin gives it a file.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import nullcontext
+
+from context_scanner import CONTEXT_TREES, context_roots, scan_tree
+from frontmatter import read_frontmatter
+from scan_cache import ScanCache
+from text_budget import apply_total_budget, max_file_bytes, read_text
+
+# Collectors whose result is a text body held to the total budget
+TEXT_COLLECTORS = ('memory', 'readme')
+
+
+def metadata_only() -> bool:
+    """Return True if command and agent bodies should be left out (CLAUDE_INSIGHTS_METADATA_ONLY=1)."""
+    return os.environ.get('CLAUDE_INSIGHTS_METADATA_ONLY', '0') == '1'
+
+
+def collect_deadline() -> float:
+    """Return the number of seconds the collectors get before partial data is sent."""
+    try:
+        return float(os.environ.get('CLAUDE_INSIGHTS_SESSION_START_DEADLINE', '3'))
+    except ValueError:
+        return 3.0
+
+
+def tree_name(level: str, kind: str) -> str:
+    """Return the collector name of a command or agent tree, e.g. projectCommands."""
+    return f'{level}{kind.title()}s'
+
+
+def parse_command_file(file_path, metadata_only=False):
+    """
+    Parse a command markdown file and extract metadata and content.
+    With metadata_only, reading stops at the end of the frontmatter and content is empty.
+    """
+    try:
+        # Streams the frontmatter; the body is read within the per-file budget
+        metadata, content = read_frontmatter(file_path, metadata_only=metadata_only)
+        return {
+            'metadata': metadata,
+            'content': content or ''
+        }
+    except Exception as e:
+        print(f"Error parsing command file {file_path}: {e}", file=sys.stderr)
+        return None
+
+
+def read_project_memory(cwd):
+    """Read AGENTS.md from the project directory, falling back to CLAUDE.md."""
+    if not cwd:
+        return ''
+
+    # Try AGENTS.md first
+    agents_md_path = os.path.join(cwd, 'AGENTS.md')
+    claude_md_path = os.path.join(cwd, 'CLAUDE.md')
+
+    try:
+        return read_text(agents_md_path)
+    except FileNotFoundError:
+        # AGENTS.md doesn't exist, try CLAUDE.md
+        try:
+            return read_text(claude_md_path)
+        except FileNotFoundError:
+            # Neither file exists, leave empty
+            pass
+        except Exception as e:
+            # Log but don't fail if we can't read CLAUDE.md
+            print(f"Could not read CLAUDE.md: {e}", file=sys.stderr)
+    except Exception as e:
+        # Log but don't fail if we can't read AGENTS.md
+        print(f"Could not read AGENTS.md: {e}", file=sys.stderr)
+    return ''
+
+
+def read_project_readme(cwd):
+    """Read README.md from the project directory."""
+    if not cwd:
+        return ''
+
+    readme_path = os.path.join(cwd, 'README.md')
+    try:
+        return read_text(readme_path)
+    except FileNotFoundError:
+        # README.md doesn't exist, leave empty
+        pass
+    except Exception as e:
+        # Log but don't fail if we can't read README.md
+        print(f"Could not read README.md: {e}", file=sys.stderr)
+    return ''
+
+
+def collect_mcp_servers(cwd):
+    """Collect MCP server names from .mcp.json file at project root."""
+    if not cwd:
+        return []
+
+    mcp_json_path = os.path.join(cwd, '.mcp.json')
+    if not os.path.exists(mcp_json_path):
+        return []
+
+    try:
+        with open(mcp_json_path, 'r', encoding='utf-8') as f:
+            mcp_config = json.load(f)
+
+        # Extract server names from mcpServers object
+        mcp_servers = mcp_config.get('mcpServers', {})
+        return list(mcp_servers.keys())
+    except json.JSONDecodeError as e:
+        print(f"Error parsing .mcp.json: {e}", file=sys.stderr)
+        return []
+    except Exception as e:
+        print(f"Error reading .mcp.json: {e}", file=sys.stderr)
+        return []
+
+
+# Collector name -> (collect(cwd), value sent if it missed the deadline)
+COLLECTORS = {
+    'memory': (read_project_memory, ''),
+    'readme': (read_project_readme, ''),
+    'mcpServers': (collect_mcp_servers, []),
+}
+
+
+def hook_input(key: str, default='unknown'):
+    """Schema value: a field of the hook's input."""
+    def value(input_data, collected):
+        return input_data.get(key, default)
+    return value
+
+
+def project_name(input_data, collected):
+    """Schema value: the project directory's name."""
+    cwd = input_data.get('cwd', '')
+    return os.path.basename(cwd) if cwd else 'unknown'
+
+
+def leveled(kind: str):
+    """Schema value: the project then user entries of a kind ('command' or 'agent'), each tagged with its level."""
+    names = [(level, tree_name(level, kind)) for level, tree_kind, _ in CONTEXT_TREES if tree_kind == kind]
+
+    def value(input_data, collected):
+        return [dict(item, level=level) for level, name in names for item in collected.get(name, [])]
+    value.collectors = [name for _, name in names]
+    return value
+
+
+def run_collectors(collectors: dict, deadline: float, timings=None) -> tuple:
+    """
+    Run each collector in its own thread, in the order given.
+    Returns the results that finished within the deadline (in seconds) and
+    the names of the collectors that didn't (or failed). With timings, each
+    collector's duration is recorded there under its name.
+    """
+    results = {}
+    done = threading.Semaphore(0)
+
+    def run(name, collect, args):
+        start = time.perf_counter()
+        try:
+            results[name] = collect(*args)
+        except Exception as e:
+            print(f"Collector {name} failed: {e}", file=sys.stderr)
+        finally:
+            if timings is not None:
+                timings.record(name, time.perf_counter() - start)
+            done.release()
+
+    # Daemon threads rather than an executor: executor workers are joined at
+    # interpreter exit, which would let a late collector hold up the hook anyway
+    for name, (collect, *args) in collectors.items():
+        threading.Thread(target=run, args=(name, collect, args), daemon=True).start()
+
+    give_up_at = time.monotonic() + deadline
+    for _ in collectors:
+        if not done.acquire(timeout=max(0, give_up_at - time.monotonic())):
+            break
+
+    # Snapshot, since late collectors may still write to results
+    finished = dict(results)
+    return finished, [name for name in collectors if name not in finished]
+
+
+class SessionContext:
+    """One plugin's session start collection: what to collect and how to shape the payload."""
+
+    def __init__(self, schema: dict, collectors: dict = None, cache_file=None):
+        """
+        schema: payload field -> value source (see the module docstring).
+        collectors: extra collector name -> (collect(cwd), empty value), e.g. a git remote lookup.
+        cache_file: returns the scan cache's path; without it trees are parsed every time.
+        """
+        self.schema = schema
+        self.collectors = {**(collectors or {}), **COLLECTORS}
+        self.cache_file = cache_file
+        self.cache = None
+
+        self.needed = set()
+        for source in schema.values():
+            if isinstance(source, str):
+                self.needed.add(source)
+            else:
+                self.needed.update(getattr(source, 'collectors', ()))
+
+    def scan_cache(self):
+        """Return the scan cache, loading it on first use, or None if the plugin keeps none."""
+        if self.cache is None and self.cache_file is not None:
+            # Parsed files depend on these settings, so changing them starts a new cache
+            self.cache = ScanCache(self.cache_file(), settings={'max_file_bytes': max_file_bytes(), 'metadata_only': metadata_only()})
+        return self.cache
+
+    def collect_tree(self, level, kind, root):
+        """Collect the commands or agents in one tree as payload entries."""
+        if not os.path.isdir(root):
+            return []
+
+        cache = self.scan_cache()
+        skip_bodies = metadata_only()
+        parse = lambda path: parse_command_file(path, metadata_only=skip_bodies)
+        entries = []
+
+        # Listing and parsed files are reused from the cache while unchanged
+        for found in scan_tree(root, level, kind, cache.markdown_files(root) if cache else None):
+            parsed = cache.parse(found.path, parse) if cache else parse(found.path)
+            if parsed:
+                entries.append({
+                    'name': found.name,
+                    'namespace': found.namespace,
+                    'metadata': parsed['metadata'],
+                    'content': parsed['content'],
+                })
+
+        return entries
+
+    def collect(self, cwd, timings=None) -> tuple:
+        """
+        Run the collectors the schema needs for a project concurrently under the deadline.
+        Returns the collected fields and the names of collectors that missed it.
+        """
+        needed = {name: (collector, cwd) for name, (collector, _) in self.collectors.items() if name in self.needed}
+        scans = {
+            tree_name(level, kind): (self.collect_tree, level, kind, root)
+            for level, kind, root in context_roots(cwd)
+            if tree_name(level, kind) in self.needed
+        }
+        # The plugin's own collectors (git, ...) start first, as they tend to be the slowest
+        collected, late = run_collectors({
+            **{name: job for name, job in needed.items() if name not in COLLECTORS},
+            **scans,
+            **{name: job for name, job in needed.items() if name in COLLECTORS},
+        }, collect_deadline(), timings)
+
+        # Persist whatever the scans had to (re)parse, unless a scan is still running
+        if self.cache is not None and not set(scans) & set(late):
+            with timings.span('scanCacheSave') if timings is not None else nullcontext():
+                self.cache.save()
+
+        return collected, late
+
+    def empty(self, name: str):
+        """Return what is sent for a collector that missed the deadline."""
+        return self.collectors[name][1] if name in self.collectors else []
+
+    def build_payload(self, input_data: dict, collected: dict, late=()) -> dict:
+        """
+        Shape collected context into the plugin's payload, holding file
+        bodies to the total byte budget (memory and README first).
+        """
+        payload = {}
+        for field, source in self.schema.items():
+            if not isinstance(source, str):
+                payload[field] = source(input_data, collected)
+                continue
+            value = collected.get(source, self.empty(source))
+            if isinstance(value, list):
+                # Copied, because budgets edit entries and collections may be reused
+                value = [dict(item) if isinstance(item, dict) else item for item in value]
+            payload[field] = value
+
+        texts = [(payload, field) for field, source in self.schema.items() if source in TEXT_COLLECTORS]
+        entries = [
+            (item, 'content')
+            for value in payload.values() if isinstance(value, list)
+            for item in value if isinstance(item, dict) and 'content' in item
+        ]
+        apply_total_budget(texts + entries)
+
+        if late:
+            # Let the backend know these fields are incomplete rather than empty
+            payload['partial'] = list(late)
+        return payload
+
+
+def run(context: SessionContext, url: str) -> None:
+    """
+    SessionStart hook for plugins that POST the payload straight to url:
+    read the hook input from stdin, collect and send. Never fails the hook.
+    """
+    try:
+        # Read JSON input from stdin
+        input_data = json.loads(sys.stdin.read())
+
+        collected, late = context.collect(input_data.get('cwd', ''))
+        payload = context.build_payload(input_data, collected, late)
+
+        headers = {
+            'Content-Type': 'application/json'
+        }
+
+        # Add Authorization header if API key is set
+        api_key = os.environ.get('CLAUDE_INSIGHTS_API_KEY', '')
+        if api_key:
+            headers['x-api-key'] = api_key
+
+        data = json.dumps(payload).encode('utf-8')
+        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
+
+        with urllib.request.urlopen(req, timeout=5) as response:
+            response.read()
+
+        # Success
+        sys.exit(0)
+
+    except json.JSONDecodeError as e:
+        # Handle JSON decode errors gracefully
+        print(f"JSON decode error: {e}", file=sys.stderr)
+        sys.exit(0)
+    except urllib.error.URLError as e:
+        # Handle network errors gracefully (API might not be running)
+        print(f"Failed to connect to API: {e}", file=sys.stderr)
+        sys.exit(0)
+    except Exception as e:
+        # Handle any other errors gracefully
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(0)
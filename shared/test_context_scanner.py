@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Unit tests for context_scanner.py command and agent tree scanning."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import context_scanner
+
+
+class TestContextScanner(unittest.TestCase):
+    """Test cases for walking command and agent trees."""
+
+    def setUp(self):
+        """Set up a temporary commands tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'commands')
+        for name in ('review.md', os.path.join('git', 'commit.md'),
+                     os.path.join('git', 'deep', 'squash.md'), 'notes.txt'):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('body')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scan_tags_names_and_namespaces(self):
+        """Test that files are named by stem and namespaced by their top-level folder."""
+        found = sorted(context_scanner.scan_tree(self.root, 'project', 'command'), key=lambda entry: entry.path)
+        self.assertEqual([(entry.level, entry.kind, entry.namespace, entry.name) for entry in found], [
+            ('project', 'command', 'git', 'commit'),
+            ('project', 'command', 'git', 'squash'),
+            ('project', 'command', '', 'review'),
+        ])
+
+    def test_walk_records_directory_mtimes(self):
+        """Test that every directory walked is returned with its mtime."""
+        files, dirs = context_scanner.walk_markdown(self.root)
+        self.assertEqual(len(files), 3)
+        self.assertEqual(set(dirs), {
+            self.root, os.path.join(self.root, 'git'), os.path.join(self.root, 'git', 'deep'),
+        })
+
+    def test_symlink_loop_is_walked_once(self):
+        """Test that a symlink back up the tree doesn't recurse forever."""
+        os.symlink(self.root, os.path.join(self.root, 'git', 'loop'))
+        files, _ = context_scanner.walk_markdown(self.root)
+        self.assertEqual(len(files), 3)
+
+    def test_context_roots_cover_project_and_user_trees(self):
+        """Test that project trees are skipped without a cwd and user trees always scanned."""
+        with patch.dict(os.environ, {'HOME': self.tmp.name}):
+            self.assertEqual([(level, kind) for level, kind, _ in context_scanner.context_roots('')],
+                             [('user', 'command'), ('user', 'agent')])
+            roots = context_scanner.context_roots('/project')
+        self.assertEqual(roots[0], ('project', 'command', os.path.join('/project', '.claude', 'commands')))
+        self.assertEqual(len(roots), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
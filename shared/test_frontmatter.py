@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Unit tests for frontmatter.py streaming frontmatter reader."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import frontmatter
+import text_budget
+
+AGENT = """---
+name: code-reviewer
+description: Reviews code. Use when: the user asks
+tools: [Read, Grep, "Bash(git diff:*)"]
+allowed-tools:
+  - Read
+  - Bash(git log:*)
+color: 'it''s blue'  # comment
+max-turns: 5
+enabled: true
+hooks:
+  pre:
+    - name: lint
+      run: make lint
+prompt: |
+  Line one
+    indented
+  Line three
+
+summary: >-
+  folded one
+  folded two
+
+  new paragraph
+long: a plain
+  scalar continued
+empty:
+---
+
+# Body
+Text here
+"""
+
+
+class TestFrontmatter(unittest.TestCase):
+    """Test cases for reading frontmatter and bodies."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content):
+        path = os.path.join(self.tmp.name, 'agent.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_yaml_values(self):
+        """Test scalars, lists, nested mappings and block strings."""
+        metadata, body = frontmatter.read_frontmatter(self.write(AGENT))
+        self.assertEqual(metadata, {
+            'name': 'code-reviewer',
+            'description': 'Reviews code. Use when: the user asks',
+            'tools': ['Read', 'Grep', 'Bash(git diff:*)'],
+            'allowed-tools': ['Read', 'Bash(git log:*)'],
+            'color': "it's blue",
+            'max-turns': 5,
+            'enabled': True,
+            'hooks': {'pre': [{'name': 'lint', 'run': 'make lint'}]},
+            'prompt': 'Line one\n  indented\nLine three\n',
+            'summary': 'folded one folded two\nnew paragraph',
+            'long': 'a plain scalar continued',
+            'empty': None,
+        })
+        self.assertEqual(body, '# Body\nText here')
+
+    def test_metadata_only_never_reads_the_body(self):
+        """Test that reading stops at the closing delimiter."""
+        path = self.write('---\ndescription: Review\n---\n' + 'x' * 100000)
+        with patch.object(frontmatter, 'read_remaining', side_effect=AssertionError('read the body')):
+            metadata, body = frontmatter.read_frontmatter(path, metadata_only=True)
+        self.assertEqual(metadata, {'description': 'Review'})
+        self.assertIsNone(body)
+
+    def test_file_without_frontmatter_is_all_body(self):
+        """Test that files without (or with unclosed) frontmatter keep their text."""
+        for content in ('Just a prompt\n', '---\ndescription: never closed\n'):
+            metadata, body = frontmatter.read_frontmatter(self.write(content))
+            self.assertEqual(metadata, {})
+            self.assertEqual(body, content)
+
+    def test_unsupported_yaml_falls_back_to_key_value_lines(self):
+        """Test that YAML the parser doesn't handle still yields the old string pairs."""
+        path = self.write('---\nbase: &anchor value\ndescription: Review\n---\nBody')
+        metadata, _ = frontmatter.read_frontmatter(path)
+        self.assertEqual(metadata, {'base': '&anchor value', 'description': 'Review'})
+
+    def test_bracketed_words_are_not_a_flow_list(self):
+        """Test that an argument hint like `[issue-number] [priority]` keeps its text."""
+        path = self.write('---\nargument-hint: [issue-number] [priority]\ntags: [a, [b, c]]\n---\nBody')
+        metadata, _ = frontmatter.read_frontmatter(path)
+        self.assertEqual(metadata['argument-hint'], '[issue-number] [priority]')
+        self.assertEqual(frontmatter.parse_frontmatter(['tags: [a, [b, c]]']), {'tags': ['a', ['b', 'c']]})
+        self.assertEqual(frontmatter.parse_frontmatter(['hint: [a, "b]']), {'hint': '[a, "b]'})
+
+    def test_plain_values_keep_their_text(self):
+        """Test that ` #` stays in plain values and numbers keep text a float would lose, as the old parser sent them."""
+        metadata = frontmatter.parse_frontmatter([
+            'description: Fix issue #123', 'title: "Fix issue #123"  # quoted', 'version: 1.10', 'ratio: 0.5', 'retries: 3',
+        ])
+        self.assertEqual(metadata, {'description': 'Fix issue #123', 'title': 'Fix issue #123', 'version': '1.10',
+                                    'ratio': 0.5, 'retries': 3})
+
+    def test_body_respects_the_byte_budget(self):
+        """Test that a large body is read head and tail only."""
+        path = self.write('---\ndescription: Big\n---\n' + 'a' * 50 + 'b' * 1000 + 'c' * 50)
+        _, body = frontmatter.read_frontmatter(path, limit=100)
+        self.assertEqual(body, 'a' * 50 + text_budget.TRUNCATION_MARKER.format(omitted=1000) + 'c' * 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Unit tests for json_codec.py optional fast JSON codecs."""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import json_codec
+
+
+def installed_codecs():
+    """Return the codecs importable here (the stdlib one always is)."""
+    codecs = [json_codec.load_codec(name) for name in json_codec.PREFERENCE]
+    return [codec for codec, name in zip(codecs, json_codec.PREFERENCE) if codec.name == name]
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Test cases for choosing a codec and what each one produces."""
+
+    ENTRY = {
+        'parentUuid': 'u0',
+        'message': {'role': 'assistant', 'content': [
+            {'type': 'thinking', 'thinking': 'Hmm', 'signature': 'sig'},
+            {'type': 'text', 'text': 'Café ✓'},
+        ], 'usage': {'input_tokens': 3}},
+        'type': 'assistant',
+        'timestamp': '2025-01-01T00:00:00.000Z',
+    }
+
+    def test_stdlib_codec_matches_json(self):
+        """Test that the fallback codec sends exactly the bytes json.dumps did."""
+        codec = json_codec.load_codec('json')
+        self.assertEqual(codec.dumps(self.ENTRY), json.dumps(self.ENTRY).encode('utf-8'))
+        self.assertEqual(codec.dumps_indented(self.ENTRY), json.dumps(self.ENTRY, indent=2).encode('utf-8'))
+
+    def test_codecs_round_trip(self):
+        """Test that every installed codec encodes and decodes the same values."""
+        for codec in installed_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.loads(codec.dumps(self.ENTRY)), self.ENTRY)
+                self.assertEqual(json.loads(codec.dumps_indented(self.ENTRY)), self.ENTRY)
+                self.assertIn(b'\n  ', codec.dumps_indented(self.ENTRY))
+                with self.assertRaises(json.JSONDecodeError):
+                    codec.loads(b'{"type": ')
+
+    def test_decode_entry_keeps_conversation_fields(self):
+        """Test that decode_entry returns the fields the conversation readers use, whatever the line's shape."""
+        line = json.dumps(self.ENTRY).encode('utf-8')
+        other = json.dumps({'type': 'user', 'message': 'plain', 'isMeta': True}).encode('utf-8')
+        for codec in installed_codecs():
+            with self.subTest(codec=codec.name):
+                entry = codec.decode_entry(line)
+                self.assertEqual(entry['type'], 'assistant')
+                self.assertEqual(entry['timestamp'], '2025-01-01T00:00:00.000Z')
+                self.assertEqual(entry['message']['role'], 'assistant')
+                self.assertEqual([(block['type'], block.get('text') or block.get('thinking'))
+                                  for block in entry['message']['content']], [('thinking', 'Hmm'), ('text', 'Café ✓')])
+                self.assertEqual(codec.decode_entry(other), {'type': 'user', 'message': 'plain', 'isMeta': True})
+
+    def test_configured_codec_is_preferred(self):
+        """Test that CLAUDE_INSIGHTS_JSON_CODEC picks the codec, and unknown names are ignored."""
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_JSON_CODEC': 'json'}):
+            self.assertEqual(json_codec.load_codec().name, 'json')
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_JSON_CODEC': 'simplejson'}):
+            self.assertEqual(json_codec.load_codec().name, installed_codecs()[0].name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Unit tests for scan_cache.py cached command and agent scans."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import scan_cache
+
+
+def age(path, seconds=60):
+    """Backdate a file or directory so the cache trusts its mtime."""
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+class TestScanCache(unittest.TestCase):
+    """Test cases for tree listings and parsed file reuse."""
+
+    def setUp(self):
+        """Set up a temporary state dir and a small commands tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, 'state', 'scan-cache.json')
+        self.root = os.path.join(self.tmp.name, 'commands')
+        os.makedirs(os.path.join(self.root, 'git'))
+        self.write('review.md', 'Review the code')
+        self.write(os.path.join('git', 'commit.md'), 'Commit the changes')
+        self.write('notes.txt', 'not a command')
+        self.age_tree()
+        self.parsed = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def age_tree(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                age(os.path.join(dirpath, name))
+            age(dirpath)
+
+    def parser(self, path):
+        self.parsed.append(path)
+        with open(path, encoding='utf-8') as f:
+            return {'metadata': {}, 'content': f.read()}
+
+    def scan(self):
+        cache = scan_cache.ScanCache(self.cache_path)
+        results = {path: cache.parse(path, self.parser) for path in cache.markdown_files(self.root)}
+        cache.save()
+        return results
+
+    def test_lists_markdown_files_recursively(self):
+        """Test that only .md files are listed, including nested ones."""
+        results = self.scan()
+        self.assertEqual(sorted(os.path.relpath(path, self.root) for path in results),
+                         [os.path.join('git', 'commit.md'), 'review.md'])
+        self.assertEqual(results[os.path.join(self.root, 'review.md')]['content'], 'Review the code')
+
+    def test_unchanged_tree_is_not_reparsed(self):
+        """Test that a second scan reuses the listing and parsed files from disk."""
+        self.scan()
+        self.parsed.clear()
+        with patch.object(scan_cache, 'walk_markdown', side_effect=AssertionError('tree was walked')):
+            results = self.scan()
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.parsed, [])
+
+    def test_modified_file_is_reparsed(self):
+        """Test that a file whose size or mtime changed is parsed again."""
+        self.scan()
+        self.parsed.clear()
+        path = self.write('review.md', 'Review the code carefully')
+        age(path, 30)
+        results = self.scan()
+        self.assertEqual(self.parsed, [path])
+        self.assertEqual(results[path]['content'], 'Review the code carefully')
+
+    def test_added_and_removed_files_are_noticed(self):
+        """Test that a directory mtime change triggers a re-listing."""
+        self.scan()
+        added = self.write(os.path.join('git', 'push.md'), 'Push')
+        os.unlink(os.path.join(self.root, 'review.md'))
+        age(added, 30)
+        age(os.path.join(self.root, 'git'), 30)
+        age(self.root, 30)
+        results = self.scan()
+        self.assertIn(added, results)
+        self.assertNotIn(os.path.join(self.root, 'review.md'), results)
+
+    def test_recent_changes_are_not_trusted(self):
+        """Test that entries modified within the racy window are re-checked."""
+        self.scan()
+        self.parsed.clear()
+        # Same size, fresh mtime: a second scan can't rely on the cached stat
+        path = self.write('review.md', 'Review the edit!')
+        self.scan()
+        self.scan()
+        self.assertEqual(self.parsed, [path, path])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Unit tests for session_context.py shared session start collection."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import session_context
+from session_context import SessionContext, hook_input, leveled, project_name
+
+
+class TestSessionContext(unittest.TestCase):
+    """Test cases for collecting and shaping payloads from a schema."""
+
+    def setUp(self):
+        """Set up a temporary project and home with a command in each."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.tmp.name, 'project')
+        self.home = os.path.join(self.tmp.name, 'home')
+        self.write(self.project, 'CLAUDE.md', '# Memory')
+        self.write(self.project, os.path.join('.claude', 'commands', 'git', 'commit.md'),
+                   '---\ndescription: Commit\n---\nCommit the changes')
+        self.write(self.home, os.path.join('.claude', 'commands', 'review.md'), 'Review the code')
+        self.env = patch.dict(os.environ, {'HOME': self.home})
+        self.env.start()
+        self.input_data = {'session_id': 'test-session-123', 'cwd': self.project}
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def write(self, base, name, content):
+        path = os.path.join(base, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def build(self, context):
+        collected, late = context.collect(self.project)
+        return context.build_payload(self.input_data, collected, late)
+
+    def test_schema_shapes_the_payload(self):
+        """Test that collector names, hook input and helpers all resolve."""
+        context = SessionContext({
+            'sessionId': hook_input('session_id'),
+            'source': hook_input('source'),
+            'projectName': project_name,
+            'projectMemory': 'memory',
+            'projectCommands': 'projectCommands',
+            'commands': leveled('command'),
+        })
+        payload = self.build(context)
+
+        self.assertEqual(payload['sessionId'], 'test-session-123')
+        self.assertEqual(payload['source'], 'unknown')
+        self.assertEqual(payload['projectName'], 'project')
+        self.assertEqual(payload['projectMemory'], '# Memory')
+        self.assertEqual(payload['projectCommands'], [{
+            'name': 'commit', 'namespace': 'git', 'metadata': {'description': 'Commit'},
+            'content': 'Commit the changes',
+        }])
+        self.assertEqual([(item['name'], item['level']) for item in payload['commands']],
+                         [('commit', 'project'), ('review', 'user')])
+        self.assertNotIn('partial', payload)
+
+    def test_only_needed_collectors_run(self):
+        """Test that collectors the schema doesn't refer to are skipped."""
+        git = MagicMock(return_value='git@example.com:org/repo.git')
+        context = SessionContext({'memory': 'memory'}, collectors={'gitRepository': (git, '')})
+        with patch.object(session_context, 'read_text', wraps=session_context.read_text) as read_text:
+            collected, late = context.collect(self.project)
+
+        self.assertEqual(set(collected), {'memory'})
+        git.assert_not_called()
+        self.assertEqual(read_text.call_count, 2)
+
+    def test_failed_collector_is_sent_empty_and_partial(self):
+        """Test that a plugin collector's empty value stands in when it fails."""
+        git = MagicMock(side_effect=RuntimeError('boom'))
+        context = SessionContext({'gitRepository': 'gitRepository', 'mcpServers': 'mcpServers'},
+                                 collectors={'gitRepository': (git, '')})
+        payload = self.build(context)
+        self.assertEqual(payload['gitRepository'], '')
+        self.assertEqual(payload['mcpServers'], [])
+        self.assertEqual(payload['partial'], ['gitRepository'])
+
+    def test_total_budget_charges_memory_before_entries(self):
+        """Test that the total budget is spent on memory first, then entry bodies."""
+        context = SessionContext({'memory': 'memory', 'commands': leveled('command')})
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_MAX_TOTAL_BYTES': '12'}):
+            payload = self.build(context)
+        self.assertEqual(payload['memory'], '# Memory')
+        self.assertIn('truncated', payload['commands'][0]['content'])
+
+    def test_scan_cache_is_used_and_saved(self):
+        """Test that a cache file makes later collections reuse parsed files."""
+        cache_path = os.path.join(self.tmp.name, 'state', 'scan-cache.json')
+        context = SessionContext({'commands': leveled('command')}, cache_file=lambda: cache_path)
+        first = self.build(context)
+        self.assertTrue(os.path.exists(cache_path))
+
+        context = SessionContext({'commands': leveled('command')}, cache_file=lambda: cache_path)
+        self.assertEqual(len(context.scan_cache().files), 2)
+        self.assertEqual(self.build(context), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Unit tests for text_budget.py bounded file reads."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import text_budget
+
+
+class TestTextBudget(unittest.TestCase):
+    """Test cases for per-file and total byte budgets."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'README.md')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data: bytes):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_small_file_is_read_whole(self):
+        """Test that a file within the budget is returned unchanged (newlines normalized)."""
+        self.write(b'# Title\r\nBody\n')
+        self.assertEqual(text_budget.read_text(self.path, limit=100), '# Title\nBody\n')
+
+    def test_large_file_keeps_head_and_tail(self):
+        """Test that only the head and tail of an oversized file are read."""
+        self.write(b'H' * 10 + b'M' * 1000 + b'T' * 10)
+        text = text_budget.read_text(self.path, limit=20)
+        self.assertEqual(text, 'H' * 10 + text_budget.TRUNCATION_MARKER.format(omitted=1000) + 'T' * 10)
+
+    def test_cut_never_splits_a_character(self):
+        """Test that multi-byte characters cut by the budget are dropped, not mangled."""
+        self.write('é'.encode('utf-8') * 20)
+        text = text_budget.read_text(self.path, limit=11)
+        head, tail = text.split(text_budget.TRUNCATION_MARKER.format(omitted=29))
+        self.assertEqual(head, 'é' * 2)
+        self.assertEqual(tail, 'é' * 3)
+
+    def test_default_limit_comes_from_environment(self):
+        """Test that CLAUDE_INSIGHTS_MAX_FILE_BYTES sets the per-file budget."""
+        self.write(b'x' * 50)
+        with patch.dict(os.environ, {'CLAUDE_INSIGHTS_MAX_FILE_BYTES': '10'}):
+            self.assertIn('[... 40 bytes truncated ...]', text_budget.read_text(self.path))
+
+    def test_total_budget_truncates_later_fields(self):
+        """Test that fields past the total budget are cut, earlier ones kept."""
+        payload = {'memory': 'm' * 30, 'readme': 'r' * 30}
+        commands = [{'content': 'c' * 30}, {'content': ''}]
+        fields = [(payload, 'memory'), (payload, 'readme')] + [(item, 'content') for item in commands]
+        text_budget.apply_total_budget(fields, limit=40)
+
+        self.assertEqual(payload['memory'], 'm' * 30)
+        self.assertEqual(payload['readme'], 'r' * 5 + text_budget.TRUNCATION_MARKER.format(omitted=20) + 'r' * 5)
+        self.assertEqual(commands[0]['content'], text_budget.TRUNCATION_MARKER.format(omitted=30))
+        self.assertEqual(commands[1]['content'], '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Unit tests for transcript_index.py memory-mapped transcript index."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import transcript_index
+from transcript_index import TranscriptIndex
+
+
+class TestTranscriptIndex(unittest.TestCase):
+    """Test cases for indexing and seeking transcript lines."""
+
+    def setUp(self):
+        """Set up a temporary transcript file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transcript_path = os.path.join(self.tmp.name, 'session.jsonl')
+        self.write([
+            {'type': 'summary', 'summary': 'Earlier work'},
+            {'type': 'user', 'message': {'role': 'user', 'content': 'Hello'}},
+            {'type': 'user', 'isMeta': True, 'message': {'role': 'user', 'content': '/exit'}},
+            {'type': 'assistant', 'message': {'role': 'assistant', 'content': [{'type': 'text', 'text': 'Hi'}]}},
+        ], mode='w')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, entries, mode='a', raw=''):
+        with open(self.transcript_path, mode, encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+            f.write(raw)
+
+    def test_entries_filter_by_type_role_and_meta(self):
+        """Test that filters select lines without parsing them."""
+        with TranscriptIndex(self.transcript_path) as index:
+            messages = [index.load(i) for i in index.entries(types=('user', 'assistant'), skip_meta=True)]
+            assistant = list(index.entries(roles=('assistant',)))
+
+        self.assertEqual([entry['type'] for entry in messages], ['user', 'assistant'])
+        self.assertEqual(assistant, [3])
+
+    def test_entries_from_a_byte_offset(self):
+        """Test that line_at finds the line at an offset and entries can be limited to a range."""
+        self.write([], raw='{"type": "user"')
+        with TranscriptIndex(self.transcript_path) as index:
+            self.assertEqual(index.complete, index.record(4)[0])
+            self.assertEqual([index.line_at(index.record(i)[0]) for i in range(5)], [0, 1, 2, 3, 4])
+            self.assertEqual(index.line_at(index.record(1)[0] + 1), 2)
+            self.assertEqual(index.line_at(os.path.getsize(self.transcript_path)), 5)
+            self.assertEqual(list(index.entries(types=('user', 'assistant'), start=2, stop=4)), [2, 3])
+            self.assertEqual(list(index.entries(start=index.line_at(index.complete))), [4])
+            self.assertEqual(list(index.entries(reverse=True, start=1, stop=3)), [2, 1])
+
+    def test_sidecar_is_private(self):
+        """Test that the sidecar index is only readable by its owner, like the transcript."""
+        with TranscriptIndex(self.transcript_path):
+            pass
+        self.assertEqual(os.stat(transcript_index.index_path_for(self.transcript_path)).st_mode & 0o777, 0o600)
+
+    def test_in_memory_index_leaves_no_sidecar(self):
+        """Test that sidecar=False indexes the transcript without writing an .idx file."""
+        with TranscriptIndex(self.transcript_path, sidecar=False) as index:
+            self.assertEqual(list(index.entries(types=('user', 'assistant'), skip_meta=True)), [1, 3])
+        self.assertEqual(os.listdir(self.tmp.name), ['session.jsonl'])
+
+    def test_sidecar_is_extended_incrementally(self):
+        """Test that appended lines are indexed without rescanning earlier ones."""
+        with TranscriptIndex(self.transcript_path):
+            pass
+        self.write([{'type': 'user', 'message': {'role': 'user', 'content': 'More'}}])
+
+        with patch.object(transcript_index, 'scan', wraps=transcript_index.scan) as scan:
+            with TranscriptIndex(self.transcript_path) as index:
+                self.assertEqual(len(index), 5)
+                self.assertEqual(index.load(4)['message']['content'], 'More')
+
+        # Only the appended line was scanned (the second call is the empty partial tail)
+        start, end = scan.call_args_list[0][0][1:]
+        self.assertEqual(end - start, index.record(4)[1] + 1)
+
+    def test_truncated_transcript_is_reindexed(self):
+        """Test that a rewritten, shorter transcript gets a fresh index."""
+        with TranscriptIndex(self.transcript_path):
+            pass
+        self.write([{'type': 'system', 'content': 'Compacted'}], mode='w')
+
+        with TranscriptIndex(self.transcript_path) as index:
+            self.assertEqual(len(index), 1)
+            self.assertEqual(index.record(0)[2], 'system')
+
+    def test_partial_and_invalid_lines(self):
+        """Test that broken lines are marked invalid and a partial tail is still readable."""
+        self.write([], raw='not json\n{"type": "user", "message": {"role": "user", "content": "tail"}}')
+
+        with TranscriptIndex(self.transcript_path) as index:
+            self.assertEqual(index.record(4)[2], 'invalid')
+            self.assertEqual(index.tail(1, types=('user',))[0]['message']['content'], 'tail')
+
+        with open(transcript_index.index_path_for(self.transcript_path), 'rb') as f:
+            header = transcript_index.HEADER.unpack(f.read(transcript_index.HEADER.size))
+        self.assertEqual(header[3], 5)
+
+    def test_read_entries_skips_invalid_lines(self):
+        """Test that read_entries with VALID_TYPES yields every parsable entry."""
+        self.write([], raw='not json\n')
+
+        entries = list(transcript_index.read_entries(self.transcript_path, types=transcript_index.VALID_TYPES))
+
+        self.assertEqual(len(entries), 4)
+
+    def test_prefilter_agrees_with_decoding(self):
+        """Test that lines classified from their ends match a full decode."""
+        lines = [
+            # Assistant entries put the message before their type
+            {'parentUuid': None, 'message': {'id': 'msg_1', 'type': 'message', 'role': 'assistant',
+                                             'content': [{'type': 'tool_use', 'name': 'Read', 'input': {'type': 'x'}}]},
+             'requestId': 'req_1', 'type': 'assistant', 'uuid': 'u1'},
+            {'parentUuid': 'u1', 'type': 'user', 'message': {'role': 'user', 'content': [
+                {'tool_use_id': 'toolu_1', 'type': 'tool_result', 'content': 'x' * 5000}]},
+             'toolUseResult': {'type': 'text', 'file': {'content': '"type": "summary"'}}},
+            {'type': 'user', 'message': {'role': 'user', 'content': 'Say "type": "system" {'}},
+            {'type': 'user', 'isMeta': True, 'message': {'role': 'user', 'content': '/exit'}},
+            {'type': 'user', 'toolUseResult': {'isMeta': True}, 'message': {'role': 'user', 'content': 'Hi'}},
+            {'type': 'file-history-snapshot', 'snapshot': {'trackedFileBackups': {'a.py': {'version': 1}}}},
+            {'snapshot': {'messageId': 'm'}, 'type': 'file-history-snapshot'},
+            {'type': 'progress', 'data': {'type': 'hook_progress'}},
+        ]
+        for separators in ((', ', ': '), (',', ':')):
+            for entry in lines:
+                line = json.dumps(entry, separators=separators).encode('utf-8')
+                found = transcript_index.prefilter(line, 0, len(line))
+                if found is not None:
+                    self.assertEqual(found, transcript_index.classify(line), line[:80])
+
+        # The common shapes are placed without decoding
+        for entry in lines[:3] + lines[5:]:
+            line = json.dumps(entry, separators=(',', ':')).encode('utf-8')
+            self.assertIsNotNone(transcript_index.prefilter(line, 0, len(line)), line[:80])
+
+    def test_tool_messages_are_skipped_without_decoding(self):
+        """Test that skip_tools leaves out tool calls and results, and the index decodes none of them."""
+        self.write([
+            {'type': 'assistant', 'message': {'role': 'assistant', 'content': [{'type': 'tool_use', 'name': 'Read'}]}},
+            {'type': 'user', 'message': {'role': 'user', 'content': [{'type': 'tool_result', 'content': 'x' * 5000}]}},
+        ])
+
+        with patch.object(transcript_index, 'classify', wraps=transcript_index.classify) as classify:
+            with TranscriptIndex(self.transcript_path) as index:
+                kept = list(index.entries(types=('user', 'assistant'), skip_meta=True, skip_tools=True))
+                tools = [i for i in range(len(index)) if index.record(i)[5]]
+
+        self.assertEqual(kept, [1, 3])
+        self.assertEqual(tools, [4, 5])
+        # Only the meta line is decoded
+        self.assertEqual(classify.call_count, 1)
+
+    def test_tool_messages_with_text_are_kept(self):
+        """Test that a message with text after its tool blocks is not flagged as tool traffic."""
+        self.write([
+            {'type': 'user', 'message': {'role': 'user', 'content': [
+                {'type': 'tool_result', 'content': 'ok'}, {'type': 'text', 'text': 'Now the tests'}]}},
+            {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+                {'type': 'tool_use', 'name': 'Read'}, {'type': 'thinking', 'thinking': 'Hmm'}]}},
+            # Text nested in a tool result is not the message's own
+            {'type': 'user', 'message': {'role': 'user', 'content': [
+                {'type': 'tool_result', 'content': [{'type': 'text', 'text': 'output'}]}]}},
+        ])
+
+        with TranscriptIndex(self.transcript_path) as index:
+            kept = list(index.entries(types=('user', 'assistant'), skip_meta=True, skip_tools=True))
+            tools = [i for i in range(len(index)) if index.record(i)[5]]
+
+        self.assertEqual(kept, [1, 3, 4, 5])
+        self.assertEqual(tools, [6])
+
+    def test_partial_tail_is_decoded(self):
+        """Test that a line still being written is never classified by the prefilter."""
+        self.write([], raw='{"type": "user", "message": {"role": "user", "content": "Say \\"type\\": \\"summary\\"}')
+
+        with patch.object(transcript_index, 'prefilter', wraps=transcript_index.prefilter) as prefilter:
+            with TranscriptIndex(self.transcript_path) as index:
+                self.assertEqual(index.record(4)[2:4], ('invalid', None))
+        self.assertEqual(prefilter.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
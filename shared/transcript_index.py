@@ -0,0 +1,352 @@
+"""
+Memory-mapped JSONL index for Claude transcript files.
+
+Transcripts are append-only JSONL files that grow to hundreds of MB, and
+several hooks and tools read them. Instead of each one rescanning and
+parsing every line, the transcript is mmapped and a sidecar index
+(`<transcript>.idx`) records the byte offset, length, entry type, message
+role and meta flag of every non-blank line. The index is extended
+incrementally as the file grows and rebuilt if the file is replaced or
+truncated, so consumers can jump straight to user/assistant entries or to
+the tail and only parse the lines they need.
+
+Indexing doesn't decode most lines either: the type, message role and
+flags are read off a line's first and last PREFILTER_BYTES with anchored
+regexes (see prefilter()), which only accept a `"type"` or `"role"` key
+they can prove is at the top level of the entry or its message. Lines they
+can't place (and a trailing partial line) are decoded as before. The index
+also flags messages whose content is only tool_use and tool_result
+blocks, so readers after conversation text can skip tool traffic, which is
+most of a transcript's bytes, without decoding it.
+
+If the sidecar can't be written (read-only directory), or sidecar=False is
+passed, the index is kept in memory for the lifetime of the TranscriptIndex.
+
+This file is the canonical copy; plugins are installed on their own, so
+scripts/sync_shared.py copies it into each plugin that uses it. Edit it
+here and re-run the sync script.
+"""
+
+import bisect
+import mmap
+import os
+import re
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; updates are then unlocked
+    fcntl = None
+
+from json_codec import decode_entry, loads
+
+# Header: magic, transcript inode, bytes of the transcript covered, line count
+HEADER = struct.Struct('<4sQQQ')
+MAGIC = b'TJX3'
+
+# One record per non-blank line: offset, length, type code, role code, flags
+RECORD = struct.Struct('<QIBBB')
+
+TYPES = ('other', 'user', 'assistant', 'system', 'summary', 'file-history-snapshot', 'invalid')
+ROLES = (None, 'user', 'assistant')
+FLAG_META = 1
+FLAG_TOOL = 2
+
+# Every entry type that parsed as JSON
+VALID_TYPES = TYPES[:-1]
+
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+ROLE_CODES = {name: code for code, name in enumerate(ROLES) if name}
+
+
+def index_path_for(transcript_path: str) -> str:
+    """Return the sidecar index path for a transcript."""
+    return f"{transcript_path}.idx"
+
+
+# Bytes at each end of a line the prefilter looks at
+PREFILTER_BYTES = 1024
+
+TOOL_BLOCKS = (b'tool_use', b'tool_result')
+
+# "key": scalar (string, number, true, false or null), i.e. no nested value
+_FIELD = rb'"[^"\\]*"\s*:\s*(?:"[^"\\]*(?:\\.[^"\\]*)*"|-?[0-9][0-9.eE+-]*|true|false|null)'
+# Lazy, so each key is checked before a (possibly huge) field is skipped
+_FIELDS = rb'(?:' + _FIELD + rb'\s*,\s*)*?'
+# Only scalar fields before "type": it is the entry's own
+HEAD_TYPE = re.compile(rb'\{\s*' + _FIELDS + rb'"type"\s*:\s*"([^"\\]*)"')
+# Only scalar fields after "type" up to the final brace: it is the entry's own
+TAIL_TYPE = re.compile(rb'"type"\s*:\s*"([^"\\]*)"(?:\s*,\s*' + _FIELD + rb')*\s*\}\s*\Z')
+# The message's role (only scalar fields before it), and the type of its first content block
+MESSAGE_HEAD = re.compile(
+    rb'\{\s*' + _FIELDS + rb'"message"\s*:\s*\{\s*' + _FIELDS + rb'"role"\s*:\s*"([^"\\]*)"'
+    rb'(?:\s*,\s*"content"\s*:\s*\[\s*\{\s*' + _FIELDS + rb'"type"\s*:\s*"([^"\\]*)")?'
+)
+COMPLETE = re.compile(rb'\}\s*\Z')
+# The name of a content block with conversation text, as a value or as a key (with a string value or not)
+TEXT_BLOCK_NAME = re.compile(rb'"(text|thinking)"(\s*:\s*("?))?')
+META = re.compile(rb'"isMeta"\s*:\s*true')
+
+
+def classify(line: bytes) -> tuple:
+    """Return the (type code, role code, flags) of one transcript line."""
+    try:
+        entry = loads(line)
+    except ValueError:
+        return TYPE_CODES['invalid'], 0, 0
+    if not isinstance(entry, dict):
+        return TYPE_CODES['invalid'], 0, 0
+
+    message = entry.get('message')
+    role = message.get('role') if isinstance(message, dict) else None
+    flags = FLAG_META if entry.get('isMeta') else 0
+    content = message.get('content') if isinstance(message, dict) else None
+    if isinstance(content, list) and content and all(
+            isinstance(block, dict) and block.get('type') in ('tool_use', 'tool_result') for block in content):
+        flags |= FLAG_TOOL
+    return TYPE_CODES.get(entry.get('type'), 0), ROLE_CODES.get(role, 0), flags
+
+
+def may_hold_text(data, start, end: int) -> bool:
+    """
+    Return whether data[start:end] may hold a text or thinking block: the
+    block's name appears both as a value (its type) and as a key with a
+    string value (its text), anywhere in the line.
+    """
+    values = set()
+    keys = set()
+    for found in TEXT_BLOCK_NAME.finditer(data, start, end):
+        name = found.group(1)
+        if found.group(2) is None:
+            values.add(name)
+        elif found.group(3):
+            keys.add(name)
+        if name in values and name in keys:
+            return True
+    return False
+
+
+def prefilter(data, start: int, end: int):
+    """
+    Classify the line data[start:end] from its ends without decoding it.
+    Returns (type code, role code, flags), or None if the line has to be decoded.
+    """
+    head_end = min(end, start + PREFILTER_BYTES)
+    tail_start = max(start, end - PREFILTER_BYTES)
+    if not COMPLETE.search(data, max(start, end - 64), end):
+        return None
+
+    found = HEAD_TYPE.match(data, start, head_end)
+    if found is None:
+        # The entry's own "type" is the last one in the line, if it is at the end
+        last = data.rfind(b'"type"', tail_start, end)
+        found = TAIL_TYPE.match(data, last, end) if last != -1 else None
+    if found is None:
+        return None
+    entry_type = found.group(1).decode('utf-8', errors='replace')
+
+    message = MESSAGE_HEAD.match(data, start, head_end)
+    if message is None and entry_type in ROLE_CODES:
+        # A user or assistant entry whose role we can't see
+        return None
+
+    if META.search(data, start, end):
+        # Could be a nested field; meta lines are rare and short, so decode them
+        return None
+
+    # Other entry types only get a role if the head shows one
+    role = message.group(1).decode('utf-8', errors='replace') if message else None
+    flags = 0
+    if message and message.group(2) in TOOL_BLOCKS:
+        if may_hold_text(data, start, end):
+            # A later block may carry text; only decoding can tell
+            return None
+        flags = FLAG_TOOL
+    return TYPE_CODES.get(entry_type, 0), ROLE_CODES.get(role, 0), flags
+
+
+def scan(data, start: int, end: int, exact: bool = False) -> list:
+    """
+    Index the lines in data[start:end], returning packed records.
+    With exact, every line is decoded (for a partial line still being written).
+    """
+    records = []
+    pos = start
+    while pos < end:
+        newline = data.find(b'\n', pos, end)
+        if newline < 0:
+            newline = end
+        # Blank lines are short; anything longer is indexed
+        if newline - pos > PREFILTER_BYTES or data[pos:newline].strip():
+            found = None if exact else prefilter(data, pos, newline)
+            if found is None:
+                found = classify(data[pos:newline])
+            records.append(RECORD.pack(pos, newline - pos, *found))
+        pos = newline + 1
+    return records
+
+
+class TranscriptIndex:
+    """
+    A transcript file mapped into memory with its line index.
+
+    Use as a context manager:
+
+        with TranscriptIndex(path) as index:
+            for i in index.entries(types=('user', 'assistant'), skip_meta=True):
+                entry = index.load(i)
+
+    With sidecar=False the index is only kept in memory, for one-off readers
+    that shouldn't leave an `.idx` file next to the transcript.
+    """
+
+    def __init__(self, transcript_path: str, index_path: str = None, sidecar: bool = True):
+        self.path = transcript_path
+        self.index_path = index_path or index_path_for(transcript_path)
+        self.sidecar = sidecar
+        self.file = open(transcript_path, 'rb')
+        self.map = None
+        self.records = b''
+        self.count = 0
+        self.inode = 0
+        self.complete = 0
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Release the mapping and the transcript file."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def refresh(self) -> None:
+        """Map the current file and bring the index up to date with it."""
+        stat_result = os.fstat(self.file.fileno())
+        if self.map is not None:
+            self.map.close()
+        # An empty file can't be mapped; it simply has no lines
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if stat_result.st_size else None
+        data = self.map if self.map is not None else b''
+
+        # Only complete lines go into the sidecar; a trailing partial line is indexed in memory
+        complete = data.rfind(b'\n') + 1
+        records = None
+        if self.sidecar:
+            try:
+                records = self._update_sidecar(data, stat_result.st_ino, complete)
+            except OSError:
+                # Read-only directory: keep the index in memory
+                pass
+        if records is None:
+            records = b''.join(scan(data, 0, complete))
+
+        tail = scan(data, complete, len(data), exact=True)
+        self.records = records + b''.join(tail)
+        self.count = len(self.records) // RECORD.size
+        # Bytes of the transcript in complete lines; later lines may still change
+        self.inode = stat_result.st_ino
+        self.complete = complete
+
+    def _update_sidecar(self, data, inode: int, complete: int) -> bytes:
+        """Extend (or rebuild) the sidecar index up to `complete` and return its records."""
+        # Owner-only, like the transcript
+        fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+
+            header = f.read(HEADER.size)
+            magic, indexed_inode, indexed_size, count = (
+                HEADER.unpack(header) if len(header) == HEADER.size else (b'', 0, 0, 0)
+            )
+            if magic != MAGIC or indexed_inode != inode or indexed_size > complete:
+                # New, replaced or truncated transcript: index from scratch
+                indexed_size, count = 0, 0
+
+            f.seek(HEADER.size)
+            records = f.read(count * RECORD.size)
+            if len(records) != count * RECORD.size:
+                records, indexed_size, count = b'', 0, 0
+
+            if indexed_size < complete:
+                new = b''.join(scan(data, indexed_size, complete))
+                f.seek(HEADER.size + len(records))
+                f.write(new)
+                f.truncate()
+                records += new
+                count = len(records) // RECORD.size
+                # Header last, so a reader never sees records it can't find
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, inode, complete, count))
+        return records
+
+    def record(self, i: int) -> tuple:
+        """Return (offset, length, type, role, is_meta, is_tool) for line i."""
+        offset, length, type_code, role_code, flags = RECORD.unpack_from(self.records, i * RECORD.size)
+        return offset, length, TYPES[type_code], ROLES[role_code], bool(flags & FLAG_META), bool(flags & FLAG_TOOL)
+
+    def line(self, i: int) -> bytes:
+        """Return the raw bytes of line i."""
+        offset, length = RECORD.unpack_from(self.records, i * RECORD.size)[:2]
+        return self.map[offset:offset + length]
+
+    def load(self, i: int) -> dict:
+        """Parse line i as JSON."""
+        return loads(self.line(i))
+
+    def load_entry(self, i: int) -> dict:
+        """Parse line i for reading its conversation (see json_codec.decode_entry)."""
+        return decode_entry(self.line(i))
+
+    def line_at(self, offset: int) -> int:
+        """Return the index of the first line starting at or after byte offset (len(self) if none)."""
+        return bisect.bisect_left(range(self.count), offset, key=lambda i: RECORD.unpack_from(self.records, i * RECORD.size)[0])
+
+    def entries(self, types=None, roles=None, skip_meta: bool = False, skip_tools: bool = False, reverse: bool = False,
+                start: int = 0, stop: int = None):
+        """
+        Yield the indices of lines matching the given entry types and message roles.
+        skip_tools leaves out messages whose content is only tool_use and tool_result blocks.
+        Only lines start to stop (exclusive) are considered.
+        """
+        type_codes = {TYPE_CODES[name] for name in types} if types else None
+        role_codes = {ROLE_CODES.get(name, 0) for name in roles} if roles else None
+        stop = self.count if stop is None else min(stop, self.count)
+        indices = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+
+        for i in indices:
+            _, _, type_code, role_code, flags = RECORD.unpack_from(self.records, i * RECORD.size)
+            if type_codes is not None and type_code not in type_codes:
+                continue
+            if role_codes is not None and role_code not in role_codes:
+                continue
+            if skip_meta and flags & FLAG_META:
+                continue
+            if skip_tools and flags & FLAG_TOOL:
+                continue
+            yield i
+
+    def tail(self, n: int, **filters) -> list:
+        """Return the last n matching entries, parsed, oldest first."""
+        found = []
+        for i in self.entries(reverse=True, **filters):
+            if len(found) == n:
+                break
+            found.append(self.load(i))
+        return found[::-1]
+
+
+def read_entries(transcript_path: str, **filters):
+    """Yield the parsed transcript entries matching the TranscriptIndex.entries() filters."""
+    with TranscriptIndex(transcript_path) as index:
+        for i in index.entries(**filters):
+            yield index.load(i)
@@ -14,6 +14,9 @@ import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from json_codec import dumps_indented
+from transcript_index import VALID_TYPES, read_entries
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -94,22 +97,14 @@ def main():
             os.makedirs(log_dir, exist_ok=True)
             transcript_path = input_data['transcript_path']
             if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
+                # Read .jsonl file and convert to JSON array (invalid lines are skipped)
                 try:
-                    with open(transcript_path, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-                    
+                    chat_data = list(read_entries(transcript_path, types=VALID_TYPES))
+
                     # Write to logs/chat.json
                     chat_file = os.path.join(log_dir, 'chat.json')
-                    with open(chat_file, 'w') as f:
-                        json.dump(chat_data, f, indent=2)
+                    with open(chat_file, 'wb') as f:
+                        f.write(dumps_indented(chat_data))
                 except Exception:
                     pass  # Fail silently
 